@@ -0,0 +1,92 @@
+"""Load tests the SSH and RESTCONF collectors against a simulated fleet of switches
+(`utilities/device_simulator.py`) running in a separate process on the loopback
+interface, and reports throughput and tail latency per collector worker count.
+
+Every host is collected and parsed through a SwitchPipeline, the way
+parse_from_SSH_output/parse_from_restconf(pipelined=True) do. Latency is the time from a
+collector thread starting a host until its config is collected (or collection fails).
+SSH latency includes netmiko's send_command_timing wait for output to stop (about 2
+seconds per host), as it does against real switches. Run from the
+cisco_switchport_auditor directory:
+
+    python -m benchmarks.bench_collectors
+"""
+import statistics
+import threading
+import time
+
+from utilities.collectors import (collect_config_via_restconf, collect_running_config_via_ssh, parse_restconf_config,
+                                  parse_running_config)
+from utilities.device_simulator import FleetProcess
+from utilities.pipeline import SwitchPipeline
+
+USERNAME = 'admin'
+PASSWORD = 'admin'
+
+
+def timed_collect_function(method, endpoints, latencies):
+    """Returns a collect function for SwitchPipeline that collects a simulated device by
+    hostname and records (seconds, collected) for it"""
+    lock = threading.Lock()
+
+    def collect(hostname):
+        address, ssh_port, https_port = endpoints[hostname]
+        start = time.perf_counter()
+        raw_config = None
+        try:
+            if method == 'ssh':
+                raw_config = collect_running_config_via_ssh(address, USERNAME, PASSWORD, session_log_level='off',
+                                                            port=ssh_port)
+            else:
+                raw_config = collect_config_via_restconf(address, USERNAME, PASSWORD, port=https_port)
+            return raw_config
+        finally:
+            with lock:
+                latencies.append((time.perf_counter() - start, raw_config is not None))
+
+    return collect
+
+
+def percentile(sorted_values, share):
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+
+def run(method, endpoints, collector_workers):
+    latencies = []
+    pipeline = SwitchPipeline(timed_collect_function(method, endpoints, latencies),
+                              parse_running_config if method == 'ssh' else parse_restconf_config,
+                              collector_workers=collector_workers)
+    start = time.perf_counter()
+    switches = pipeline.run(list(endpoints))
+    wall_seconds = time.perf_counter() - start
+
+    seconds = sorted(latency for latency, _ in latencies)
+    failed = sum(1 for _, collected in latencies if not collected)
+    print(f"{method:<10}{collector_workers:>8}{len(switches):>8}{failed:>8}{wall_seconds:>10.1f}"
+          f"{len(switches) / wall_seconds:>12.1f}{statistics.median(seconds):>9.2f}{percentile(seconds, 0.95):>9.2f}"
+          f"{percentile(seconds, 0.99):>9.2f}{seconds[-1]:>9.2f}")
+
+
+def main(number_of_devices=1000, methods=('ssh', 'restconf'), collector_workers=(32, 128), latency=0.05, jitter=0.05,
+         bandwidth=None, failure_rate=0.01, auth_failure_rate=0.01):
+    fleet_arguments = {
+        'number_of_devices': number_of_devices, 'username': USERNAME, 'password': PASSWORD, 'latency': latency,
+        'jitter': jitter, 'bandwidth': bandwidth, 'failure_rate': failure_rate, 'auth_failure_rate': auth_failure_rate,
+    }
+
+    with FleetProcess(**fleet_arguments) as fleet:
+        print(f'{number_of_devices} simulated devices | latency {latency}s + jitter {jitter}s '
+              f'| failure rate {failure_rate} | auth failure rate {auth_failure_rate}')
+        print(f"{'Method':<10}{'Workers':>8}{'Hosts':>8}{'Failed':>8}{'Wall (s)':>10}{'Hosts/s':>12}"
+              f"{'p50 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}{'Max (s)':>9}")
+
+        for method in methods:
+            for workers in collector_workers:
+                run(method, fleet.endpoints, workers)
+
+    print(f"Fleet - Connections: {fleet.stats['connections']} | Failures injected: {fleet.stats['failures_injected']} "
+          f"| Auth failures injected: {fleet.stats['auth_failures_injected']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Benchmarks the per-switch, per-site and per-VLAN compliance rollups of an audit of
+200,000 ports: Python loops over the Switch/Interface objects against
+`summarise_compliance` (one frame of every interface and grouped aggregations), from
+Switch objects and from an InterfaceTable, and writing the summary excel file.
+
+Switches come from generated specs (48 port stack members, 40 sites). Run from the
+cisco_switchport_auditor directory:
+
+    python -m benchmarks.bench_compliance_summary
+"""
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.bench_interface_table import build_switch
+from models.interface_table import InterfaceTable
+from utilities.compliance_summary import site_from_hostname, summarise_compliance, write_compliance_summary
+from utilities.config_generator import generate_switch_spec
+
+
+def loop_rollups(switches):
+    """The rollups computed by looping over every Interface object. Kept here as the
+    benchmark baseline
+    """
+    per_switch = {}
+    per_site = defaultdict(Counter)
+    per_vlan = defaultdict(Counter)
+    vlan_switches = defaultdict(set)
+
+    for switch in switches:
+        counts = Counter()
+        for interface in switch.interfaces:
+            counts['ports'] += 1
+            counts['trunk_ports'] += bool(interface.is_trunk_port)
+            counts['shutdown_ports'] += bool(interface.admin_down)
+            if interface.is_access_port:
+                counts['access_ports'] += 1
+                counts['ise_compliant_access_ports'] += bool(interface.ise_compliant)
+                counts['access_ports_without_description'] += not (interface.description or '').strip()
+                if interface.vlan is not None:
+                    per_vlan[interface.vlan]['access_ports'] += 1
+                    vlan_switches[interface.vlan].add(switch.hostname)
+            if interface.voice_vlan is not None:
+                per_vlan[interface.voice_vlan]['voice_ports'] += 1
+                vlan_switches[interface.voice_vlan].add(switch.hostname)
+
+        per_switch[switch.hostname] = counts
+        per_site[site_from_hostname(switch.hostname)].update(counts)
+
+    return per_switch, per_site, per_vlan, vlan_switches
+
+
+def timed(function, repeats=3):
+    """Returns (result, best of repeats seconds)"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main(number_of_ports=200_000, ports_per_switch=192, sites=40):
+    number_of_switches = number_of_ports // ports_per_switch
+    specs = [generate_switch_spec(f'SITE{number % sites:02d}-SW{number:05d}', number_of_vlans=40,
+                                  number_of_interfaces=ports_per_switch, seed=number)
+             for number in range(number_of_switches)]
+    switches = [build_switch(spec, keep_config=False) for spec in specs]
+    table = InterfaceTable.from_switches(switches)
+    print(f'{len(switches)} switches, {len(table)} ports, {sites} sites')
+
+    (per_switch, _, _, _), loop_seconds = timed(lambda: loop_rollups(switches))
+    summary, objects_seconds = timed(lambda: summarise_compliance(switches))
+    table_summary, table_seconds = timed(lambda: summarise_compliance(table))
+
+    # Both ways must give the same answers
+    for hostname, counts in per_switch.items():
+        for column, count in counts.items():
+            assert summary.switches.loc[hostname, column] == count, (hostname, column)
+    assert summary.switches.equals(table_summary.switches)
+
+    with tempfile.TemporaryDirectory() as directory:
+        _, write_seconds = timed(lambda: write_compliance_summary(summary, os.path.join(directory, 'summary.xlsx')), 1)
+
+    print(f"{'Rollups':<44}{'Seconds':>9}{'Speed-up':>10}")
+    print(f"{'Python loops over Switch/Interface objects':<44}{loop_seconds:>9.2f}{1:>9.1f}x")
+    print(f"{'summarise_compliance(Switch objects)':<44}{objects_seconds:>9.2f}{loop_seconds / objects_seconds:>9.1f}x")
+    print(f"{'summarise_compliance(InterfaceTable)':<44}{table_seconds:>9.2f}{loop_seconds / table_seconds:>9.1f}x")
+    print(f"{'Writing the summary excel file':<44}{write_seconds:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmarks retrieving running-configs by copying them over SCP and SFTP
+(`copy_config_file`) against reading "show running-config" off an interactive Netmiko
+channel, on simulated switches (`utilities/device_simulator.py`) of growing size
+running in a separate process.
+
+Seconds and CPU seconds are per host and only cover collection; CPU seconds are this
+process' (the collector's). The channel time includes netmiko's send_command_timing
+wait for output to stop, as it does against real switches. Every method must parse
+into the same Switch. Run from the cisco_switchport_auditor directory:
+
+    python -m benchmarks.bench_file_transfer
+"""
+import statistics
+import time
+
+from utilities.collectors import collect_config_via_file_transfer, collect_running_config_via_ssh, parse_running_config
+from utilities.device_simulator import FleetProcess
+from utilities.serialization import switch_to_dict
+
+USERNAME = 'admin'
+PASSWORD = 'admin'
+METHODS = ('channel', 'scp', 'sftp')
+
+
+def collect(method, address, port):
+    if method == 'channel':
+        return collect_running_config_via_ssh(address, USERNAME, PASSWORD, session_log_level='off', port=port)
+    return collect_config_via_file_transfer(address, USERNAME, PASSWORD, protocol=method, port=port)
+
+
+def run(method, endpoints):
+    seconds = []
+    cpu_seconds = []
+    switches = {}
+
+    for hostname, (address, ssh_port, _) in endpoints.items():
+        start, cpu_start = time.perf_counter(), time.process_time()
+        running_config = collect(method, address, ssh_port)
+        seconds.append(time.perf_counter() - start)
+        cpu_seconds.append(time.process_time() - cpu_start)
+        switches[hostname] = switch_to_dict(parse_running_config(address, running_config))
+
+    return statistics.median(seconds), statistics.median(cpu_seconds), len(running_config), switches
+
+
+def main(interfaces_per_device=(48, 384, 2000), devices=5, latency=0.05, jitter=0.0, bandwidth=None):
+    print(f'{devices} simulated devices per size | latency {latency}s | bandwidth '
+          f"{f'{bandwidth / 1e6:.1f} MB/s' if bandwidth else 'unlimited'}")
+    print(f"{'Interfaces':>10}{'Config (KB)':>13}{'Method':>9}{'Seconds':>10}{'CPU (s)':>10}{'Speed-up':>10}")
+
+    for interfaces in interfaces_per_device:
+        fleet_arguments = {
+            'number_of_devices': devices, 'username': USERNAME, 'password': PASSWORD, 'latency': latency,
+            'jitter': jitter, 'bandwidth': bandwidth, 'interfaces_per_device': interfaces, 'restconf': False,
+        }
+
+        with FleetProcess(**fleet_arguments) as fleet:
+            results = {method: run(method, fleet.endpoints) for method in METHODS}
+
+        channel_seconds = results['channel'][0]
+        for method, (seconds, cpu_seconds, config_bytes, _) in results.items():
+            print(f"{interfaces:>10}{config_bytes / 1000:>13.0f}{method:>9}{seconds:>10.2f}{cpu_seconds:>10.3f}"
+                  f"{channel_seconds / seconds:>9.1f}x")
+
+        # File transfer must not change what is parsed
+        assert results['channel'][3] == results['scp'][3] == results['sftp'][3], 'retrieval changed the parsed switches'
+
+
+if __name__ == '__main__':
+    main()
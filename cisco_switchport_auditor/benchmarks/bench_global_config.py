@@ -0,0 +1,67 @@
+"""Benchmarks reading the hostname and VLANs from a running-config: the previous
+CiscoConfParse approach (one `find_objects` for the hostname, `find_objects_w_child`
+plus two regex scans per VLAN) against the one-pass `extract_global_config`.
+
+Run from the cisco_switchport_auditor directory:
+
+    python -m benchmarks.bench_global_config
+"""
+import re
+import time
+from collections import namedtuple
+
+from ciscoconfparse import CiscoConfParse
+
+from parsers.parser_config_global_regex import extract_global_config
+from utilities.config_generator import generate_switch_spec, render_running_config
+
+
+def ciscoconfparse_hostname_and_vlans(parser):
+    """The hostname/VLAN parsing ParserRunningConfigSwitch used before
+    extract_global_config. Kept here as the benchmark baseline
+    """
+    hostname = parser.find_objects(r'^hostname')[0].re_match_typed(r'^hostname\s+(\S+)', default='')
+
+    vlans = []
+    for vlan_parse_object in parser.find_objects_w_child(r'^vlan\s+\d+$', r'^\s+name\s+\S+$'):
+        vlan_tuple = namedtuple('vlan', ['id', 'name'])
+        vlan_id = _regex_search(r'^vlan\s+(\d+)$', vlan_parse_object.ioscfg)
+        vlan_name = _regex_search(r'^\s+name\s+(\S+)$', vlan_parse_object.ioscfg)
+        vlans.append(vlan_tuple(int(vlan_id), vlan_name))
+
+    return hostname, vlans
+
+
+def _regex_search(regex, configuration):
+    for entry in configuration:
+        if re.search(regex, entry):
+            return re.search(regex, entry).group(1)
+    return False
+
+
+def best_of(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(vlan_counts=(100, 1000, 3900), repeats=3):
+    print(f"{'VLANs':>6}{'Config lines':>14}{'CiscoConfParse (ms)':>22}{'One pass (ms)':>16}{'Speed-up':>10}")
+
+    for number_of_vlans in vlan_counts:
+        spec = generate_switch_spec('BENCH_SWITCH', number_of_vlans=number_of_vlans, number_of_interfaces=96, seed=1)
+        config_split = render_running_config(spec).splitlines()
+        parser = CiscoConfParse(config_split, syntax='ios')
+
+        baseline = best_of(lambda: ciscoconfparse_hostname_and_vlans(parser), repeats)
+        one_pass = best_of(lambda: extract_global_config(config_split), repeats)
+
+        print(f"{number_of_vlans:>6}{len(config_split):>14}{baseline * 1000:>22.1f}{one_pass * 1000:>16.1f}"
+              f"{baseline / one_pass:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
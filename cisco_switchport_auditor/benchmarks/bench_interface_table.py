@@ -0,0 +1,114 @@
+"""Benchmarks holding an audit of 200,000 ports as Switch objects with lists of Interface
+objects (with and without their raw configs) against an InterfaceTable, and converting
+each to a pandas DataFrame.
+
+Interface attributes come from generated switches (48 port stack members, so names,
+hostnames and VLAN names repeat the way they do in a real estate). Memory is what
+stays allocated once the results are built (tracemalloc, which also makes the build
+times several times slower than normal; the run takes a few minutes). Run from the
+cisco_switchport_auditor directory:
+
+    python -m benchmarks.bench_interface_table
+"""
+import gc
+import time
+import tracemalloc
+
+import pandas as pd
+
+from models.interface import Interface
+from models.interface_table import INTERFACE_TABLE_COLUMNS, InterfaceTable
+from models.switch import Switch
+from models.vlan import Vlan
+from parsers.parser_config_global_regex import default_vlan_name
+from utilities.config_generator import generate_switch_spec, render_running_config
+
+
+def build_switch(spec, keep_config):
+    """Builds the Switch object the parsers would return for a generated switch spec"""
+    vlans = [Vlan(vlan_id, name or default_vlan_name(vlan_id)) for vlan_id, name in spec['vlans']]
+    vlan_names = dict(vlans)
+    config = render_running_config(spec) if keep_config else None
+    interface_configs = config.split('!\ninterface ')[1:] if keep_config else None
+
+    interfaces = []
+    for position, port in enumerate(spec['interfaces']):
+        interfaces.append(Interface(
+            admin_down=port['shutdown'],
+            config=f'interface {interface_configs[position]}' if keep_config else None,
+            description=port['description'],
+            IPDT_policy=port['ipdt_policy'],
+            is_access_port=port['mode'] == 'access',
+            is_trunk_port=port['mode'] == 'trunk',
+            ise_compliant=port['ise'],
+            name=f"{port['type']}{port['name']}",
+            switch_hostname=spec['hostname'],
+            switch_vlans=vlans,
+            trunk_allowed_vlans=port['trunk_allowed_vlans'],
+            type=port['type'],
+            vlan=port['vlan'],
+            vlan_name=vlan_names.get(port['vlan']),
+            voice_vlan=port['voice_vlan'],
+            voice_vlan_name=vlan_names.get(port['voice_vlan']),
+        ))
+
+    return Switch(hostname=spec['hostname'], config=config, vlans=vlans, interfaces=interfaces)
+
+
+def retained_bytes(build):
+    """Returns (result, bytes still allocated after building it, seconds to build)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, seconds
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def objects_to_pandas(switches):
+    columns = set(INTERFACE_TABLE_COLUMNS)
+    return pd.DataFrame([interface.dict(include=columns) for switch in switches for interface in switch.interfaces])
+
+
+def build_table(specs):
+    table = InterfaceTable(capacity=sum(len(spec['interfaces']) for spec in specs))
+    for spec in specs:
+        # The Switch/Interface objects only live until their interfaces are in the table
+        table.add_switch(build_switch(spec, keep_config=False))
+    return table
+
+
+def main(number_of_ports=200_000, ports_per_switch=192):
+    specs = [generate_switch_spec(f'SWITCH{number:05d}', number_of_vlans=40, number_of_interfaces=ports_per_switch,
+                                  seed=number)
+             for number in range(number_of_ports // ports_per_switch)]
+    ports = sum(len(spec['interfaces']) for spec in specs)
+    print(f'{len(specs)} switches, {ports} ports')
+    print(f"{'Result type':<36}{'Memory (MB)':>12}{'Bytes/port':>12}{'Build (s)':>11}{'To pandas (s)':>15}")
+
+    results = [
+        ('Switch/Interface objects with config', lambda: [build_switch(spec, keep_config=True) for spec in specs],
+         objects_to_pandas),
+        ('Switch/Interface objects', lambda: [build_switch(spec, keep_config=False) for spec in specs],
+         objects_to_pandas),
+        ('InterfaceTable', lambda: build_table(specs), InterfaceTable.to_pandas),
+    ]
+
+    for name, build, to_pandas in results:
+        result, retained, build_seconds = retained_bytes(build)
+        _, pandas_seconds = timed(lambda: to_pandas(result))
+        print(f'{name:<36}{retained / 1e6:>12.1f}{retained / ports:>12.0f}{build_seconds:>11.1f}{pandas_seconds:>15.2f}')
+        del result
+
+
+if __name__ == '__main__':
+    main()
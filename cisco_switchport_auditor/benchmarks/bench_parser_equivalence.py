@@ -0,0 +1,21 @@
+"""Checks that every parser engine (`PARSER_ENGINES` in utilities/parser_equivalence.py)
+gives the same Switch and Interface attributes as the regex parser, on randomized
+running-configs with matching RESTCONF documents, and times the engines on the same
+inputs.
+
+Timings include decoding the engine's input (JSON for the RESTCONF engines). Each
+difference is printed with an example and a minimised reproducer. Run from the
+cisco_switchport_auditor directory:
+
+    python -m benchmarks.bench_parser_equivalence
+"""
+from utilities.parser_equivalence import check_parser_equivalence, print_equivalence_report
+
+
+def main(number_of_switches=200, seed=0):
+    report = check_parser_equivalence(number_of_switches=number_of_switches, seed=seed)
+    print_equivalence_report(report)
+
+
+if __name__ == '__main__':
+    main()
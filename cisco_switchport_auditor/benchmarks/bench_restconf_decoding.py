@@ -0,0 +1,70 @@
+"""Benchmarks decoding a Cisco-IOS-XE-native:native RESTCONF response: the standard
+library json module (what `requests`' `.json()` uses), the fastest JSON backend
+installed (`decode_json`) and the incremental `extract_native_config`, on generated
+payloads of 1 to 8 member stacks.
+
+Peak memory is the peak of Python allocations while decoding (tracemalloc), not
+counting the response body itself. Run from the cisco_switchport_auditor directory:
+
+    python -m benchmarks.bench_restconf_decoding
+"""
+import io
+import json
+import time
+import tracemalloc
+
+from models.switch import Switch
+from parsers.parser_config_switch_restconf import ParserConfigSwitchRestconf
+from utilities.config_generator import generate_switch_spec, render_restconf
+from utilities.json_decoding import JSON_BACKEND, decode_json, extract_native_config, extract_vlans, ijson
+
+
+def measure(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(timings), peak
+
+
+def parsed_interfaces(native_config, vlans_config):
+    switch = Switch()
+    ParserConfigSwitchRestconf(switch, native_config, vlans_config)
+    return [interface.dict(exclude={'config_restconf', 'switch_vlans'}) for interface in switch.interfaces]
+
+
+def main(stack_members=(1, 4, 8), acl_entries_per_member=10000, repeats=3):
+    print(f"JSON backend: {JSON_BACKEND}. Incremental decoding: {'ijson' if ijson else 'not installed (full decode, then trim)'}")
+    print(f"{'Members':>8}{'Payload (MB)':>14}{'Decoder':>14}{'Time (ms)':>12}{'Peak (MB)':>12}")
+
+    for members in stack_members:
+        spec = generate_switch_spec('BENCH_SWITCH', number_of_vlans=200, number_of_interfaces=48 * members, seed=1)
+        native_config, vlans_config = render_restconf(spec, number_of_acl_entries=acl_entries_per_member * members)
+        payload = json.dumps(native_config).encode()
+        vlans_payload = json.dumps(vlans_config).encode()
+
+        decoders = [
+            ('json', lambda: json.loads(payload)),
+            (JSON_BACKEND, lambda: decode_json(payload)),
+            ('incremental', lambda: extract_native_config(io.BytesIO(payload))),
+        ]
+
+        for name, decoder in decoders:
+            seconds, peak = measure(decoder, repeats)
+            print(f"{members:>8}{len(payload) / 1e6:>14.1f}{name:>14}{seconds * 1000:>12.1f}{peak / 1e6:>12.1f}")
+
+        # The trimmed documents must parse into exactly the same interfaces
+        full = parsed_interfaces(json.loads(payload), json.loads(vlans_payload))
+        trimmed = parsed_interfaces(extract_native_config(io.BytesIO(payload)), extract_vlans(io.BytesIO(vlans_payload)))
+        assert full == trimmed, 'incremental decoding changed the parsed interfaces'
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,28 @@
+from functools import partial
 from getpass import getpass
 import os
+import time
 
-from models.switch import Switch
-from parsers.parser_config_switch_regex import ParserRunningConfigSwitch
-from parsers.parser_config_switch_restconf import ParserConfigSwitchRestconf
 from utilities import excel_functions
-from utilities.ssh_handler import ssh_handler
-from utilities.restconf_requests import restconf_request, validate_yang_model_availability
-
-
-def parse_from_restconf(list_of_hosts, save_to_excel=False):
+from utilities.audit_service import AuditService
+from utilities.compliance_summary import summarise_compliance, summary_filename, write_compliance_summary
+from utilities.config_archive import ConfigArchive, archive_collected_configs
+from utilities.config_watcher import ConfigDirectoryWatcher
+from utilities.excel_functions import ExcelSwitchSink
+from utilities.collectors import (collect_running_config_via_ssh, collect_config_via_restconf, read_config_file,
+                                  collect_config_via_file_transfer,
+                                  parse_running_config, parse_config_file, parse_restconf_config,
+                                  parse_archived_config, collect_running_config_if_changed,
+                                  parse_running_config_if_changed, parse_restconf_config_if_changed)
+from utilities.distributed import DEFAULT_PORT, AuditCoordinator, AuditWorker
+from utilities.pipeline import SwitchPipeline
+from utilities.reachability import check_hosts_reachable, print_unreachable_hosts
+
+
+def parse_from_restconf(list_of_hosts, save_to_excel=False, precheck_reachability=False,
+                        pipelined=False, collector_workers=8, parser_workers=None, incremental_decoding=False,
+                        concurrency_limiter=None, config_archive=None, response_cache=None, checkpoint=None,
+                        duration_history=None):
     """Queries a list of switches via RESTCONF. YANG model data is returned as JSON
     and then parsed through to return a list of switch objects that can be iterated
     through to view configuration details. 
@@ -28,6 +41,48 @@ def parse_from_restconf(list_of_hosts, save_to_excel=False):
         save_to_excel (bool, optional): Set to True to export interface object
         data to excel. Defaults to False.
 
+        precheck_reachability (bool, optional): Set to True to probe TCP 443 on all
+        hosts at the same time first. Hosts that do not answer are skipped and
+        reported. Defaults to False.
+
+        pipelined (bool, optional): Set to True to collect with a pool of threads while
+        a pool of processes parses. See `utilities/pipeline.py`. Defaults to False.
+
+        collector_workers (int, optional): Collector threads when pipelined. Defaults to 8.
+
+        parser_workers (int, optional): Parser processes when pipelined. Defaults to the
+        number of CPUs.
+
+        incremental_decoding (bool, optional): Set to True to stream RESTCONF responses
+        and only keep the hostname, audited interfaces and VLANs instead of the whole
+        native configuration. Lowers memory use on large stacks; the switch's
+        `config_restconf` then only holds those parts. Defaults to False.
+
+        concurrency_limiter (AdaptiveConcurrencyLimiter, optional): Adapts how many hosts
+        are collected at the same time to login latency, timeouts and authentication
+        failures/rate limiting. When pipelined, collector_workers is raised to the
+        limiter's max_limit so the limiter bounds concurrency. See
+        `utilities/adaptive_concurrency.py`. Defaults to None.
+
+        config_archive (ConfigArchive, optional): Stores every collected config in a
+        content-addressed archive, so past versions can be parsed again with
+        `parse_from_archive`. See `utilities/config_archive.py`. Defaults to None.
+
+        response_cache (RestconfResponseCache, optional): Sends conditional requests
+        (If-None-Match/If-Modified-Since) and reuses the switch stored by the previous
+        run instead of downloading and parsing its documents when the switch answers
+        304 Not Modified. See `utilities/restconf_cache.py`. Defaults to None.
+
+        checkpoint (CheckpointJournal, optional): Journals each switch as soon as it is
+        parsed. Hosts already in the journal (when it was opened with resume=True) are
+        not collected again and their switches are added to the results. See
+        `utilities/checkpoint.py`. Defaults to None.
+
+        duration_history (DurationHistory, optional): When pipelined, records how long
+        each host takes and starts the hosts expected to take longest first, so a slow
+        stack does not hold up the end of the run. Switches are still returned in the
+        order of list_of_hosts. See `utilities/host_scheduling.py`. Defaults to None.
+
     Returns:
         list: list of Switch objects
     """     
@@ -35,32 +90,50 @@ def parse_from_restconf(list_of_hosts, save_to_excel=False):
     username = input('Username: ')
     password = getpass()
 
-    switches = []
+    hosts_to_collect = _remaining_hosts(list_of_hosts, checkpoint)
 
-    for host in list_of_hosts:
-        
-        yang_model_check = validate_yang_model_availability(host, username, password)
+    if precheck_reachability is True:
+        hosts_to_collect, unreachable_hosts = check_hosts_reachable(hosts_to_collect, port=443)
+        print_unreachable_hosts(unreachable_hosts, port=443)
+
+    collect_function = partial(collect_config_via_restconf, username=username, password=password,
+                               incremental_decoding=incremental_decoding, limiter=concurrency_limiter,
+                               response_cache=response_cache)
+    parse_function = parse_restconf_config if response_cache is None else parse_restconf_config_if_changed
+
+    if config_archive is not None:
+        collect_function = archive_collected_configs(collect_function, config_archive, 'restconf')
 
-        if yang_model_check is True:
+    if concurrency_limiter is not None:
+        collector_workers = max(collector_workers, concurrency_limiter.max_limit)
 
-            switch = Switch(ip_address=host)
+    switches = _collect_and_parse(hosts_to_collect, collect_function, parse_function,
+                                  pipelined, collector_workers, parser_workers, checkpoint=checkpoint,
+                                  switch_cache=response_cache, duration_history=duration_history)
 
-            config_restconf = restconf_request(host, username, password, "Cisco-IOS-XE-native", ":native")
-            vlans_restconf = restconf_request(host, username, password, "Cisco-IOS-XE-vlan-oper", ":vlans")
+    if concurrency_limiter is not None:
+        concurrency_limiter.print_summary()
 
-            ParserConfigSwitchRestconf(switch, config_restconf, vlans_restconf)
-            
-            switches.append(switch)
+    if duration_history is not None and pipelined is True:
+        duration_history.print_summary()
 
-            if save_to_excel is True:
-                output_switchport_info_to_excel(switches)
+    if response_cache is not None:
+        response_cache.print_summary()
+
+    if checkpoint is not None:
+        checkpoint.print_summary(list_of_hosts)
+        switches = checkpoint.merge(list_of_hosts, switches)
+
+    if save_to_excel is True:
+        output_switchport_info_to_excel(switches)
 
     print_total_switches_and_switchports_searched(switches)
 
     return switches
 
 
-def parse_from_config_file(config_files_directory, save_to_excel=False):
+def parse_from_config_file(config_files_directory, save_to_excel=False,
+                           pipelined=False, collector_workers=8, parser_workers=None):
     """Parses switch running-configs and returns a list of switch objects
     that can be iterated through to view configuration details. 
     
@@ -78,19 +151,68 @@ def parse_from_config_file(config_files_directory, save_to_excel=False):
         save_to_excel (bool, optional): Set to True to export interface object
         data to excel. Defaults to False.
 
+        pipelined (bool, optional): Set to True to read files with a pool of threads while
+        a pool of processes parses. See `utilities/pipeline.py`. Defaults to False.
+
+        collector_workers (int, optional): File reader threads when pipelined. Defaults to 8.
+
+        parser_workers (int, optional): Parser processes when pipelined. Defaults to the
+        number of CPUs.
+
     Returns:
         list: list of Switch objects
     """
 
-    switches = []
+    collect_function = partial(read_config_file, config_files_directory=config_files_directory)
+
+    switches = _collect_and_parse(os.listdir(config_files_directory), collect_function, parse_config_file,
+                                  pipelined, collector_workers, parser_workers)
+
+    if save_to_excel is True:
+        output_switchport_info_to_excel(switches)
+
+    print_total_switches_and_switchports_searched(switches)
+
+    return switches
 
-    for file in os.listdir(config_files_directory):
-        switch = Switch(config_filename=file)
 
-        with open(f'{config_files_directory}/{file}', 'r') as text_file:
-            config = text_file.read()
-            ParserRunningConfigSwitch(switch, config)
-            switches.append(switch)
+def parse_from_archive(archive_path='config_archive.db', as_of=None, save_to_excel=False,
+                       pipelined=False, collector_workers=8, parser_workers=None):
+    """Parses the estate as it was at a point in time from a ConfigArchive filled by
+    earlier runs (see the `config_archive` argument of parse_from_SSH_output and
+    parse_from_restconf) and returns a list of switch objects. Each host's config is
+    looked up in the archive's timeline index, so no directories are scanned and only
+    the configs that are parsed are read
+
+    Args:
+        archive_path (str, optional): Path of the archive. Defaults to 'config_archive.db'.
+
+        as_of (datetime, date or str, optional): Point in time, e.g. '2026-10-01' for the
+        end of that day. Defaults to None which parses each host's latest config.
+
+        save_to_excel (bool, optional): Set to True to export interface object
+        data to excel. Defaults to False.
+
+        pipelined (bool, optional): Set to True to load configs with a pool of threads while
+        a pool of processes parses. See `utilities/pipeline.py`. Defaults to False.
+
+        collector_workers (int, optional): Loader threads when pipelined. Defaults to 8.
+
+        parser_workers (int, optional): Parser processes when pipelined. Defaults to the
+        number of CPUs.
+
+    Returns:
+        list: list of Switch objects
+    """
+
+    with ConfigArchive(archive_path) as archive:
+        config_versions = archive.as_of(as_of)
+
+        def collect_function(host):
+            return archive.load(config_versions[host])
+
+        switches = _collect_and_parse(list(config_versions), collect_function, parse_archived_config,
+                                      pipelined, collector_workers, parser_workers)
 
     if save_to_excel is True:
         output_switchport_info_to_excel(switches)
@@ -99,7 +221,10 @@ def parse_from_config_file(config_files_directory, save_to_excel=False):
 
     return switches
 
-def parse_from_SSH_output(list_of_hosts, save_to_excel=False):
+def parse_from_SSH_output(list_of_hosts, save_to_excel=False, precheck_reachability=False,
+                          pipelined=False, collector_workers=8, parser_workers=None, session_log_level='full',
+                          concurrency_limiter=None, config_archive=None, change_cache=None, checkpoint=None,
+                          duration_history=None, transfer_protocol=None):
     """Logs into a list of switches via SSH, does "show running-config"
     and parses the switch running-configs and returns a list of switch objects
     that can be iterated through to view configuration details. There is
@@ -116,23 +241,451 @@ def parse_from_SSH_output(list_of_hosts, save_to_excel=False):
         save_to_excel (bool, optional): Set to True to export interface object
         data to excel. Defaults to False.
 
+        precheck_reachability (bool, optional): Set to True to probe TCP 22 on all
+        hosts at the same time first. Hosts that do not answer are skipped and
+        reported. Defaults to False.
+
+        pipelined (bool, optional): Set to True to collect with a pool of threads while
+        a pool of processes parses. See `utilities/pipeline.py`. Defaults to False.
+
+        collector_workers (int, optional): Collector threads when pipelined. Defaults to 8.
+
+        parser_workers (int, optional): Parser processes when pipelined. Defaults to the
+        number of CPUs.
+
+        session_log_level (str, optional): 'off' to not save session logs, 'errors' to
+        only save logs of failed sessions, 'full' to save every session. Defaults to 'full'.
+
+        concurrency_limiter (AdaptiveConcurrencyLimiter, optional): Adapts how many hosts
+        are collected at the same time to login latency, timeouts and authentication
+        failures/rate limiting. When pipelined, collector_workers is raised to the
+        limiter's max_limit so the limiter bounds concurrency. See
+        `utilities/adaptive_concurrency.py`. Defaults to None.
+
+        config_archive (ConfigArchive, optional): Stores every collected config in a
+        content-addressed archive, so past versions can be parsed again with
+        `parse_from_archive`. See `utilities/config_archive.py`. Defaults to None.
+
+        change_cache (ChangeDetectionCache, optional): Asks each switch for its "Last
+        configuration change" header first and reuses the switch stored by the previous
+        run instead of pulling and parsing "show running-config" when it has not changed.
+        See `utilities/change_detection.py`. Defaults to None.
+
+        checkpoint (CheckpointJournal, optional): Journals each switch as soon as it is
+        parsed. Hosts already in the journal (when it was opened with resume=True) are
+        not collected again and their switches are added to the results. See
+        `utilities/checkpoint.py`. Defaults to None.
+
+        duration_history (DurationHistory, optional): When pipelined, records how long
+        each host takes and starts the hosts expected to take longest first, so a slow
+        stack does not hold up the end of the run. Switches are still returned in the
+        order of list_of_hosts. See `utilities/host_scheduling.py`. Defaults to None.
+
+        transfer_protocol (str, optional): 'scp' or 'sftp' to copy the running-config
+        as a file instead of reading "show running-config" off an interactive channel.
+        Faster for large configs. No session logs are kept and change_cache cannot be
+        used with it. See `copy_config_file` in `utilities/ssh_handler.py`. Defaults to
+        None.
+
     Returns:
         list: list of Switch objects
     """
+    if transfer_protocol is not None and change_cache is not None:
+        raise ValueError('change_cache cannot be used with transfer_protocol')
 
     username = input('Username: ')
     password = getpass()
 
-    switches = []
+    hosts_to_collect = _remaining_hosts(list_of_hosts, checkpoint)
 
-    for host in list_of_hosts:
-        switch = Switch(ip_address=host)
+    if precheck_reachability is True:
+        hosts_to_collect, unreachable_hosts = check_hosts_reachable(hosts_to_collect, port=22)
+        print_unreachable_hosts(unreachable_hosts, port=22)
 
-        with ssh_handler(host=host, username=username, password=password) as ssh_session:
-            running_config = ssh_session.send_command_timing('show running-config')
+    if change_cache is not None:
+        collect_function = partial(collect_running_config_if_changed, username=username, password=password,
+                                   change_cache=change_cache, session_log_level=session_log_level,
+                                   limiter=concurrency_limiter)
+        parse_function = parse_running_config_if_changed
+    elif transfer_protocol is not None:
+        collect_function = partial(collect_config_via_file_transfer, username=username, password=password,
+                                   protocol=transfer_protocol, limiter=concurrency_limiter)
+        parse_function = parse_running_config
+    else:
+        collect_function = partial(collect_running_config_via_ssh, username=username, password=password,
+                                   session_log_level=session_log_level, limiter=concurrency_limiter)
+        parse_function = parse_running_config
 
-        ParserRunningConfigSwitch(switch, running_config)
-        switches.append(switch)
+    if config_archive is not None:
+        collect_function = archive_collected_configs(collect_function, config_archive, 'ssh')
+
+    if concurrency_limiter is not None:
+        collector_workers = max(collector_workers, concurrency_limiter.max_limit)
+
+    switches = _collect_and_parse(hosts_to_collect, collect_function, parse_function,
+                                  pipelined, collector_workers, parser_workers, checkpoint=checkpoint,
+                                  switch_cache=change_cache, duration_history=duration_history)
+
+    if concurrency_limiter is not None:
+        concurrency_limiter.print_summary()
+
+    if duration_history is not None and pipelined is True:
+        duration_history.print_summary()
+
+    if change_cache is not None:
+        change_cache.print_summary()
+
+    if checkpoint is not None:
+        checkpoint.print_summary(list_of_hosts)
+        switches = checkpoint.merge(list_of_hosts, switches)
+
+    if save_to_excel is True:
+        output_switchport_info_to_excel(switches)
+
+    print_total_switches_and_switchports_searched(switches)
+
+    return switches
+
+
+def iter_from_restconf(list_of_hosts, ordered=False, save_to_excel=False, precheck_reachability=False,
+                       collector_workers=8, parser_workers=None, incremental_decoding=False,
+                       concurrency_limiter=None, config_archive=None, response_cache=None, duration_history=None):
+    """Generator variant of `parse_from_restconf`. Each switch object is yielded as soon
+    as it has been parsed instead of returning a list once every switch is done, so
+    results can be consumed (e.g. written to a database) while the audit is running
+
+    Args:
+        list_of_hosts (list): list of hostnames or IP addresses
+
+        ordered (bool, optional): Set to True to yield switches in the order of
+        list_of_hosts. Defaults to False which yields switches as they finish.
+
+        save_to_excel (bool, optional): Set to True to write each switch to an excel
+        file as it is yielded. Defaults to False.
+
+        precheck_reachability (bool, optional): Set to True to skip hosts that do not
+        answer on TCP 443. Defaults to False.
+
+        collector_workers (int, optional): Collector threads. Defaults to 8.
+
+        parser_workers (int, optional): Parser processes. Defaults to the number of CPUs.
+
+        incremental_decoding (bool, optional): Set to True to stream RESTCONF responses
+        and only keep what is parsed. Defaults to False.
+
+        concurrency_limiter (AdaptiveConcurrencyLimiter, optional): Adapts how many hosts
+        are collected at the same time. Defaults to None.
+
+        config_archive (ConfigArchive, optional): Stores every collected config in a
+        content-addressed archive. Defaults to None.
+
+        response_cache (RestconfResponseCache, optional): Reuses the previous run's switch
+        when the switch answers 304 Not Modified. Defaults to None.
+
+        duration_history (DurationHistory, optional): Starts the hosts expected to take
+        longest first. Defaults to None.
+
+    Yields:
+        Switch: Switch object
+    """
+
+    username = input('Username: ')
+    password = getpass()
+
+    if precheck_reachability is True:
+        list_of_hosts, unreachable_hosts = check_hosts_reachable(list_of_hosts, port=443)
+        print_unreachable_hosts(unreachable_hosts, port=443)
+
+    collect_function = partial(collect_config_via_restconf, username=username, password=password,
+                               incremental_decoding=incremental_decoding, limiter=concurrency_limiter,
+                               response_cache=response_cache)
+    parse_function = parse_restconf_config if response_cache is None else parse_restconf_config_if_changed
+
+    if config_archive is not None:
+        collect_function = archive_collected_configs(collect_function, config_archive, 'restconf')
+
+    if concurrency_limiter is not None:
+        collector_workers = max(collector_workers, concurrency_limiter.max_limit)
+
+    yield from _iter_collect_and_parse(list_of_hosts, collect_function, parse_function,
+                                       ordered, save_to_excel, collector_workers, parser_workers,
+                                       switch_cache=response_cache, duration_history=duration_history)
+
+    if concurrency_limiter is not None:
+        concurrency_limiter.print_summary()
+
+    if duration_history is not None:
+        duration_history.print_summary()
+
+    if response_cache is not None:
+        response_cache.print_summary()
+
+
+def iter_from_config_file(config_files_directory, ordered=False, save_to_excel=False,
+                          collector_workers=8, parser_workers=None):
+    """Generator variant of `parse_from_config_file`. Each switch object is yielded as
+    soon as its config file has been parsed
+
+    Args:
+        config_files_directory (str): Path of location where running config files are
+
+        ordered (bool, optional): Set to True to yield switches in directory listing
+        order. Defaults to False which yields switches as they finish.
+
+        save_to_excel (bool, optional): Set to True to write each switch to an excel
+        file as it is yielded. Defaults to False.
+
+        collector_workers (int, optional): File reader threads. Defaults to 8.
+
+        parser_workers (int, optional): Parser processes. Defaults to the number of CPUs.
+
+    Yields:
+        Switch: Switch object
+    """
+
+    collect_function = partial(read_config_file, config_files_directory=config_files_directory)
+
+    yield from _iter_collect_and_parse(os.listdir(config_files_directory), collect_function, parse_config_file,
+                                       ordered, save_to_excel, collector_workers, parser_workers)
+
+
+def iter_from_SSH_output(list_of_hosts, ordered=False, save_to_excel=False, precheck_reachability=False,
+                         collector_workers=8, parser_workers=None, session_log_level='full',
+                         concurrency_limiter=None, config_archive=None, change_cache=None, duration_history=None,
+                         transfer_protocol=None):
+    """Generator variant of `parse_from_SSH_output`. Each switch object is yielded as
+    soon as its running-config has been parsed
+
+    Args:
+        list_of_hosts (list): list of hostnames or IP addresses
+
+        ordered (bool, optional): Set to True to yield switches in the order of
+        list_of_hosts. Defaults to False which yields switches as they finish.
+
+        save_to_excel (bool, optional): Set to True to write each switch to an excel
+        file as it is yielded. Defaults to False.
+
+        precheck_reachability (bool, optional): Set to True to skip hosts that do not
+        answer on TCP 22. Defaults to False.
+
+        collector_workers (int, optional): Collector threads. Defaults to 8.
+
+        parser_workers (int, optional): Parser processes. Defaults to the number of CPUs.
+
+        session_log_level (str, optional): 'off', 'errors' or 'full'. Defaults to 'full'.
+
+        concurrency_limiter (AdaptiveConcurrencyLimiter, optional): Adapts how many hosts
+        are collected at the same time. Defaults to None.
+
+        config_archive (ConfigArchive, optional): Stores every collected config in a
+        content-addressed archive. Defaults to None.
+
+        change_cache (ChangeDetectionCache, optional): Reuses the previous run's switch
+        when the "Last configuration change" header has not changed. Defaults to None.
+
+        duration_history (DurationHistory, optional): Starts the hosts expected to take
+        longest first. Defaults to None.
+
+        transfer_protocol (str, optional): 'scp' or 'sftp' to copy the running-config
+        as a file instead of reading it off an interactive channel. Defaults to None.
+
+    Yields:
+        Switch: Switch object
+    """
+    if transfer_protocol is not None and change_cache is not None:
+        raise ValueError('change_cache cannot be used with transfer_protocol')
+
+    username = input('Username: ')
+    password = getpass()
+
+    if precheck_reachability is True:
+        list_of_hosts, unreachable_hosts = check_hosts_reachable(list_of_hosts, port=22)
+        print_unreachable_hosts(unreachable_hosts, port=22)
+
+    if change_cache is not None:
+        collect_function = partial(collect_running_config_if_changed, username=username, password=password,
+                                   change_cache=change_cache, session_log_level=session_log_level,
+                                   limiter=concurrency_limiter)
+        parse_function = parse_running_config_if_changed
+    elif transfer_protocol is not None:
+        collect_function = partial(collect_config_via_file_transfer, username=username, password=password,
+                                   protocol=transfer_protocol, limiter=concurrency_limiter)
+        parse_function = parse_running_config
+    else:
+        collect_function = partial(collect_running_config_via_ssh, username=username, password=password,
+                                   session_log_level=session_log_level, limiter=concurrency_limiter)
+        parse_function = parse_running_config
+
+    if config_archive is not None:
+        collect_function = archive_collected_configs(collect_function, config_archive, 'ssh')
+
+    if concurrency_limiter is not None:
+        collector_workers = max(collector_workers, concurrency_limiter.max_limit)
+
+    yield from _iter_collect_and_parse(list_of_hosts, collect_function, parse_function,
+                                       ordered, save_to_excel, collector_workers, parser_workers,
+                                       switch_cache=change_cache, duration_history=duration_history)
+
+    if concurrency_limiter is not None:
+        concurrency_limiter.print_summary()
+
+    if duration_history is not None:
+        duration_history.print_summary()
+
+    if change_cache is not None:
+        change_cache.print_summary()
+
+
+def run_audit_service(list_of_hosts, method='ssh', interval=3600, jitter=0.1, max_workers=8,
+                      host_intervals=None, query_port=8080):
+    """Runs the auditor as a long-running service instead of a one-off run. Credentials
+    are asked for once. Each host is collected and parsed on its own schedule through a
+    bounded worker pool, with first runs spread evenly over the interval and every run
+    shifted by a random jitter, so device and AAA load is spread over time.
+
+    The latest Switch object of every host is kept in memory and can be queried through
+    a local HTTP API (see `AuditService.serve_query_api`). Runs until interrupted
+    (Ctrl+C)
+
+    Args:
+        list_of_hosts (list): list of hostnames or IP addresses
+
+        method (str, optional): 'ssh' or 'restconf'. Defaults to 'ssh'.
+
+        interval (float, optional): Seconds between collections of a host. Defaults to 3600.
+
+        jitter (float, optional): Fraction of the interval each run is randomly shifted
+        by. Defaults to 0.1.
+
+        max_workers (int, optional): Maximum number of hosts collected at the same time.
+        Defaults to 8.
+
+        host_intervals (dict, optional): Per host intervals overriding `interval`.
+        Defaults to None.
+
+        query_port (int, optional): Local port of the query API. Set to None to not start
+        the query API. Defaults to 8080.
+
+    Returns:
+        AuditService: The stopped service, holding the latest results
+    """
+    if method == 'ssh':
+        collect_function, parse_function = collect_running_config_via_ssh, parse_running_config
+    elif method == 'restconf':
+        collect_function, parse_function = collect_config_via_restconf, parse_restconf_config
+    else:
+        raise ValueError(f"method must be 'ssh' or 'restconf', not {method!r}")
+
+    username = input('Username: ')
+    password = getpass()
+
+    service = AuditService(list_of_hosts, partial(collect_function, username=username, password=password),
+                           parse_function, interval, jitter, max_workers, host_intervals)
+    service.start()
+
+    if query_port is not None:
+        service.serve_query_api(port=query_port)
+
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print('Stopping the audit service. Waiting for running collections to finish')
+        service.stop()
+
+    return service
+
+
+def watch_config_directory(config_files_directory, on_change=None, debounce_seconds=2.0, poll_interval=2.0,
+                           use_inotify=True):
+    """Parses every config file in a directory, then keeps watching it and parses only
+    the files that are added or changed (e.g. as a backup system drops new
+    running-configs in). The latest Switch object of every file is kept in memory.
+    Runs until interrupted (Ctrl+C)
+
+    Uses inotify on Linux and polls the directory elsewhere. A file is parsed once it
+    has not changed for debounce_seconds, so backups are not parsed half-written. See
+    `utilities/config_watcher.py`
+
+    Args:
+        config_files_directory (str): Path of location where running config files are
+
+        on_change (function, optional): Called as on_change(event) with a
+        ConfigChangeEvent (kind, filename, switch) for every file added, changed or
+        removed. Defaults to None which prints each change.
+
+        debounce_seconds (float, optional): Seconds a file must stay unchanged before it
+        is parsed. Defaults to 2.0.
+
+        poll_interval (float, optional): Seconds between directory scans when polling.
+        Defaults to 2.0.
+
+        use_inotify (bool, optional): Set to False to always poll. Defaults to True.
+
+    Returns:
+        ConfigDirectoryWatcher: The stopped watcher, holding the latest results
+    """
+    if on_change is None:
+        def on_change(event):
+            interfaces = f' | Switchports: {len(event.switch.interfaces)}' if event.switch is not None else ''
+            print(f"{time.strftime('%H:%M:%S')} {event.kind}: {event.filename}{interfaces}")
+
+    watcher = ConfigDirectoryWatcher(config_files_directory, on_change, debounce_seconds, poll_interval, use_inotify)
+    watcher.start()
+    print_total_switches_and_switchports_searched(watcher.snapshot())
+
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print('Stopping the directory watcher')
+        watcher.stop()
+
+    return watcher
+
+
+def parse_from_distributed(list_of_hosts, save_to_excel=False, address='127.0.0.1', port=DEFAULT_PORT,
+                           shard_size=8, lease_timeout=900, token=None):
+    """Runs a coordinator that shares list_of_hosts out to worker agents started with
+    `run_distributed_worker` (on this machine, or on jump hosts closer to the switches)
+    and returns the Switch objects they send back. Hosts of a worker that dies are
+    reassigned to the remaining workers. See `utilities/distributed.py`
+
+    Note: Switch objects are rebuilt from the workers' results and do not include the
+    raw configs (`config`/`config_restconf`)
+
+    Args:
+        list_of_hosts (list): list of hostnames or IP addresses
+
+        save_to_excel (bool, optional): Set to True to export interface object
+        data to excel. Defaults to False.
+
+        address (str, optional): Address to listen for workers on. Set to '0.0.0.0' for
+        workers on other machines. Defaults to '127.0.0.1'.
+
+        port (int, optional): TCP port to listen for workers on. Defaults to 9700.
+
+        shard_size (int, optional): Maximum hosts handed to a worker at a time. Defaults to 8.
+
+        lease_timeout (float, optional): Seconds a worker has to return a host before it
+        is reassigned. Defaults to 900.
+
+        token (str, optional): Shared secret workers must present. Defaults to None.
+
+    Returns:
+        list: list of Switch objects
+    """
+    coordinator = AuditCoordinator(list_of_hosts, address=address, port=port, shard_size=shard_size,
+                                   lease_timeout=lease_timeout, token=token)
+    coordinator.start()
+
+    try:
+        coordinator.wait()
+    finally:
+        coordinator.stop()
+
+    coordinator.print_summary()
+    switches = coordinator.results()
 
     if save_to_excel is True:
         output_switchport_info_to_excel(switches)
@@ -142,6 +695,146 @@ def parse_from_SSH_output(list_of_hosts, save_to_excel=False):
     return switches
 
 
+def run_distributed_worker(coordinator_address, port=DEFAULT_PORT, method='ssh', collector_workers=8,
+                           parser_workers=None, token=None):
+    """Runs a worker agent for a coordinator started with `parse_from_distributed`.
+    Credentials are asked for once. The worker pulls hosts from the coordinator, collects
+    and parses them, and streams each result back until no hosts are left
+
+    Args:
+        coordinator_address (str): Hostname or IP address of the coordinator
+
+        port (int, optional): Coordinator TCP port. Defaults to 9700.
+
+        method (str, optional): 'ssh' or 'restconf'. Defaults to 'ssh'.
+
+        collector_workers (int, optional): Hosts collected at the same time. Defaults to 8.
+
+        parser_workers (int, optional): Parser processes. Defaults to the number of CPUs.
+
+        token (str, optional): Shared secret expected by the coordinator. Defaults to None.
+
+    Returns:
+        int: Number of switches this worker audited
+    """
+    if method == 'ssh':
+        collect_function, parse_function = collect_running_config_via_ssh, parse_running_config
+    elif method == 'restconf':
+        collect_function, parse_function = collect_config_via_restconf, parse_restconf_config
+    else:
+        raise ValueError(f"method must be 'ssh' or 'restconf', not {method!r}")
+
+    username = input('Username: ')
+    password = getpass()
+
+    worker = AuditWorker(coordinator_address, partial(collect_function, username=username, password=password),
+                         parse_function, coordinator_port=port, collector_workers=collector_workers,
+                         parser_workers=parser_workers, token=token)
+
+    return worker.run()
+
+
+def _collect_and_parse(list_of_hosts, collect_function, parse_function, pipelined, collector_workers, parser_workers,
+                       checkpoint=None, switch_cache=None, duration_history=None):
+    """Runs the collect and parse tasks for every host, either one host after the other
+    or through a SwitchPipeline
+
+    Args:
+        list_of_hosts (list): list of hostnames, IP addresses or config filenames
+        collect_function (function): Called as collect_function(host), returns the raw config
+        parse_function (function): Called as parse_function(host, raw_config), returns a Switch
+        pipelined (bool): Set to True to use a SwitchPipeline
+        collector_workers (int): Collector threads when pipelined
+        parser_workers (int): Parser processes when pipelined
+        checkpoint (CheckpointJournal, optional): Journals each switch as soon as it is
+        parsed. Defaults to None.
+        switch_cache (ChangeDetectionCache, RestconfResponseCache, optional): Stores each
+        switch as soon as it is parsed. Defaults to None.
+        duration_history (DurationHistory, optional): Starts the longest hosts first when
+        pipelined. Defaults to None.
+
+    Returns:
+        list: list of Switch objects
+    """
+    if pipelined is True:
+        pipeline = SwitchPipeline(collect_function, parse_function, collector_workers, parser_workers,
+                                  duration_history=duration_history)
+        if checkpoint is None and switch_cache is None:
+            switches = pipeline.run(list_of_hosts)
+        else:
+            switches = [None] * len(list_of_hosts)
+            for index, switch in pipeline.iter_results(list_of_hosts):
+                _record_switch(switch, checkpoint, switch_cache)
+                switches[index] = switch
+            switches = [switch for switch in switches if switch is not None]
+        pipeline.print_metrics()
+        return switches
+
+    switches = []
+
+    for host in list_of_hosts:
+        raw_config = collect_function(host)
+        if raw_config is None:
+            continue
+        switch = parse_function(host, raw_config)
+        _record_switch(switch, checkpoint, switch_cache)
+        switches.append(switch)
+
+    return switches
+
+
+def _record_switch(switch, checkpoint, switch_cache):
+    """Stores a switch in the checkpoint journal and the switch cache (change detection
+    or RESTCONF response cache) used by the run, so a run that stops early keeps every
+    switch parsed so far"""
+    if checkpoint is not None:
+        checkpoint.record(switch)
+    if switch_cache is not None:
+        switch_cache.record(switch)
+
+
+def _remaining_hosts(list_of_hosts, checkpoint):
+    """Returns the hosts not in the checkpoint journal yet, or every host without one"""
+    if checkpoint is None:
+        return list_of_hosts
+    return checkpoint.remaining(list_of_hosts)
+
+
+def _iter_collect_and_parse(list_of_hosts, collect_function, parse_function, ordered, save_to_excel,
+                            collector_workers, parser_workers, switch_cache=None, duration_history=None):
+    """Runs a SwitchPipeline and yields each switch as it is parsed. When save_to_excel
+    is set, each switch is written to the excel file before it is yielded. When
+    switch_cache is set, each switch is stored in it as soon as it is parsed
+
+    Yields:
+        Switch: Switch object
+    """
+    pipeline = SwitchPipeline(collect_function, parse_function, collector_workers, parser_workers,
+                              duration_history=duration_history)
+    excel_sink = ExcelSwitchSink() if save_to_excel is True else None
+
+    number_of_switches = 0
+    total_number_of_switchports = 0
+
+    try:
+        for _, switch in pipeline.iter_results(list_of_hosts, ordered=ordered):
+            _record_switch(switch, None, switch_cache)
+
+            if excel_sink is not None:
+                excel_sink.write(switch)
+
+            number_of_switches += 1
+            total_number_of_switchports += len(switch.interfaces)
+
+            yield switch
+    finally:
+        if excel_sink is not None:
+            excel_sink.close()
+
+    pipeline.print_metrics()
+    print(f"Searched - Total Switches: {number_of_switches} | Total Switchports: {total_number_of_switchports}")
+
+
 def print_total_switches_and_switchports_searched(switch_objects):
     """Iterates through a list of switch objects and prints the
     total number of switches and total number of interfaces searched
@@ -161,19 +854,30 @@ def print_total_switches_and_switchports_searched(switch_objects):
     print(f"Searched - Total Switches: {number_of_switches} | Total Switchports: {total_number_of_switchports}")
 
 
-def output_switchport_info_to_excel(switch_objects):
+def output_switchport_info_to_excel(switch_objects, include_summary=True, site_of=None):
     """Creates a list of pandas DFs. Each DF is comprised of a switch's
     interface objects (which is a list attribute of the switch object).
     DFs are then written to an excel sheet. One DF per excel sheet and
     the excel sheet is named after the switch hostname
 
+    A compliance summary (per switch, per site and per VLAN rollups, see
+    `utilities/compliance_summary.py`) is written next to it, named after it
+    with a `_summary` suffix
 
     Args:
         switch_objects (list): list of switch objects
+        include_summary (bool, optional): Set to False to skip the compliance
+        summary. Defaults to True.
+        site_of (dict, function, optional): Maps a switch hostname to its site. See
+        `summarise_compliance`. Defaults to None.
 
     Returns:
         An excel file is written to the working directory
     """
     switch_interface_dfs = excel_functions.create_list_of_dfs_from_switch_interface_objects(
         switch_objects)
-    excel_functions.write_dfs_to_excel_sheets(switch_interface_dfs)
+    filename = excel_functions.write_dfs_to_excel_sheets(switch_interface_dfs)
+
+    if include_summary is True:
+        summary = summarise_compliance(switch_objects, site_of=site_of)
+        write_compliance_summary(summary, summary_filename(filename))
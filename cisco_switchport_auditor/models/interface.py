@@ -1,6 +1,8 @@
 from typing import Optional, List
 from pydantic import BaseModel
 
+from models.vlan_range_set import VlanRangeSet
+
 class Interface(BaseModel):
 
     """Interface object to correlate configuration information to object attributes"""
@@ -16,6 +18,7 @@ class Interface(BaseModel):
     name: Optional[str]
     switch_hostname: Optional[str]
     switch_vlans: Optional[List]
+    trunk_allowed_vlans: Optional[VlanRangeSet]
     type: Optional[str]
     vlan: Optional[int]
     vlan_name: Optional[str]
@@ -0,0 +1,328 @@
+import numpy as np
+import pandas as pd
+
+from models.vlan_range_set import VlanRangeSet
+
+# Interface attributes stored by InterfaceTable and how each is stored. Raw configs
+# (config, config_restconf) are not kept and switch_vlans is kept once per switch
+CATEGORY = 'category'
+NULLABLE_BOOLEAN = 'boolean'
+NULLABLE_VLAN = 'vlan'
+
+INTERFACE_TABLE_COLUMNS = {
+    'admin_down': NULLABLE_BOOLEAN,
+    'description': CATEGORY,
+    'IPDT_policy': CATEGORY,
+    'is_access_port': NULLABLE_BOOLEAN,
+    'is_trunk_port': NULLABLE_BOOLEAN,
+    'ise_compliant': NULLABLE_BOOLEAN,
+    'name': CATEGORY,
+    'switch_hostname': CATEGORY,
+    'trunk_allowed_vlans': CATEGORY,
+    'type': CATEGORY,
+    'vlan': NULLABLE_VLAN,
+    'vlan_name': CATEGORY,
+    'voice_vlan': NULLABLE_VLAN,
+    'voice_vlan_name': CATEGORY,
+}
+
+# Code widths pandas uses for a given number of categories. Codes are kept in the same
+# width so pandas can use them as they are
+_CODE_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+class _CategoryColumn:
+    """Dictionary encoded string column. Each row holds a code into `categories`,
+    -1 for None"""
+    def __init__(self, capacity):
+        self.codes = np.full(capacity, -1, dtype=np.int8)
+        self.categories = []
+        self._codes_by_value = {}
+
+    def code_for(self, value):
+        if value is None:
+            return -1
+
+        code = self._codes_by_value.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._codes_by_value[value] = code
+            if len(self.categories) >= np.iinfo(self.codes.dtype).max:
+                self.codes = self.codes.astype(_CODE_DTYPES[_CODE_DTYPES.index(self.codes.dtype.type) + 1])
+        return code
+
+    def set(self, index, value):
+        self.codes[index] = self.code_for(value)
+
+    def get(self, index):
+        code = self.codes[index]
+        return None if code < 0 else self.categories[code]
+
+    def resize(self, capacity, length):
+        codes = np.full(capacity, -1, dtype=self.codes.dtype)
+        codes[:length] = self.codes[:length]
+        self.codes = codes
+
+    def to_pandas(self, length):
+        dtype = pd.CategoricalDtype(self.categories)
+        return pd.Categorical.from_codes(self.codes[:length], dtype=dtype)
+
+    def nbytes(self, length):
+        return self.codes[:length].nbytes + sum(len(category) for category in self.categories)
+
+
+class _NullableColumn:
+    """Fixed width column with a mask of missing values (True = None), the layout of
+    pandas' nullable Int16/boolean arrays"""
+    def __init__(self, dtype, capacity):
+        self.values = np.zeros(capacity, dtype=dtype)
+        self.mask = np.ones(capacity, dtype=bool)
+
+    def set(self, index, value):
+        if value is None:
+            self.mask[index] = True
+        else:
+            self.values[index] = value
+            self.mask[index] = False
+
+    def get(self, index):
+        if self.mask[index]:
+            return None
+        return self.values[index].item()
+
+    def resize(self, capacity, length):
+        values = np.zeros(capacity, dtype=self.values.dtype)
+        mask = np.ones(capacity, dtype=bool)
+        values[:length] = self.values[:length]
+        mask[:length] = self.mask[:length]
+        self.values, self.mask = values, mask
+
+    def to_pandas(self, length):
+        if self.values.dtype == bool:
+            return pd.arrays.BooleanArray(self.values[:length], self.mask[:length])
+        return pd.arrays.IntegerArray(self.values[:length], self.mask[:length])
+
+    def nbytes(self, length):
+        return self.values[:length].nbytes + self.mask[:length].nbytes
+
+
+def _new_column(kind, capacity):
+    if kind == CATEGORY:
+        return _CategoryColumn(capacity)
+    if kind == NULLABLE_BOOLEAN:
+        return _NullableColumn(bool, capacity)
+    return _NullableColumn(np.int16, capacity)
+
+
+class InterfaceRow:
+    """Read-only view of one row of an InterfaceTable. Has the same attributes as an
+    Interface object, except that raw configs (config, config_restconf) are None
+
+    Args:
+        table (InterfaceTable): Table the row belongs to
+        index (int): Row number
+    """
+    __slots__ = ('_table', '_index')
+
+    config = None
+    config_restconf = None
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getattr__(self, attribute):
+        column = self._table._columns.get(attribute)
+        if column is None:
+            raise AttributeError(f"'InterfaceRow' object has no attribute '{attribute}'")
+
+        value = column.get(self._index)
+        if attribute == 'trunk_allowed_vlans' and value is not None:
+            value = VlanRangeSet.from_string(value)
+        return value
+
+    @property
+    def switch_vlans(self):
+        """list: VLANs of the switch the interface belongs to"""
+        return self._table.switch_vlans.get(self.switch_hostname)
+
+    def dict(self):
+        """Returns the row's attributes as a dict (like `Interface.dict()` without the
+        raw configs and switch_vlans)
+
+        Returns:
+            dict: attribute name to value
+        """
+        return {attribute: getattr(self, attribute) for attribute in INTERFACE_TABLE_COLUMNS}
+
+    def __repr__(self):
+        return 'InterfaceRow(' + ', '.join(f'{attribute}={value!r}' for attribute, value in self.dict().items()) + ')'
+
+
+class InterfaceTable:
+    """Columnar container of interfaces. An alternative to a list of Switch objects each
+    holding a list of Interface objects, for audits of many ports:
+
+    * one typed array per attribute instead of one Python object per port
+    * strings (hostnames, interface types/names, descriptions, VLAN names, policies) are
+      dictionary encoded, so each distinct string is stored once
+    * VLAN IDs are int16 with a missing-value mask, True/False attributes are bools with
+      a missing-value mask
+    * raw configs are not kept; each switch's VLAN list is kept once in `switch_vlans`
+
+    Rows can be read as InterfaceRow views that have the same attributes as Interface
+    objects. `to_pandas` wraps the arrays in a DataFrame without copying them.
+
+    Tables can be filled directly by the parsers (see the `interface_table` argument of
+    ParserRunningConfigSwitch and ParserConfigSwitchRestconf) or from Switch objects with
+    `add_switch`, e.g. as switches are yielded by the iter_from_* functions.
+
+    Args:
+        capacity (int, optional): Rows to allocate up front. Grows as needed. Defaults to 1024.
+    """
+    def __init__(self, capacity=1024):
+        self._length = 0
+        self._capacity = max(1, capacity)
+        self._columns = {attribute: _new_column(kind, self._capacity) for attribute, kind in INTERFACE_TABLE_COLUMNS.items()}
+        self.switch_vlans = {}
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('InterfaceTable index out of range')
+        return InterfaceRow(self, index)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield InterfaceRow(self, index)
+
+    def _reserve(self, rows):
+        """Makes room for `rows` more rows, doubling the capacity when it runs out"""
+        needed = self._length + rows
+        if needed <= self._capacity:
+            return
+
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+
+        for column in self._columns.values():
+            column.resize(capacity, self._length)
+        self._capacity = capacity
+
+    def append(self, interface):
+        """Adds one interface
+
+        Args:
+            interface (object): Interface object, or any object with the same attributes
+        """
+        self._reserve(1)
+        index = self._length
+
+        for attribute, column in self._columns.items():
+            value = getattr(interface, attribute, None)
+            if attribute == 'trunk_allowed_vlans' and value is not None:
+                value = str(value)
+            column.set(index, value)
+
+        self._length += 1
+
+    def add_switch_interfaces(self, hostname, vlans, interfaces):
+        """Adds a switch's interfaces and records its VLANs
+
+        Args:
+            hostname (str): Hostname of the switch
+            vlans (list): The switch's Vlan named tuples
+            interfaces (list): The switch's Interface objects
+        """
+        self.switch_vlans[hostname] = vlans
+        self._reserve(len(interfaces))
+        for interface in interfaces:
+            self.append(interface)
+
+    def add_switch(self, switch):
+        """Adds the interfaces of a Switch object. The Switch object (and its Interface
+        objects) can be discarded afterwards
+
+        Args:
+            switch (object): Switch object
+        """
+        self.add_switch_interfaces(switch.hostname, switch.vlans, switch.interfaces or [])
+
+    def extend(self, other):
+        """Appends every row of another InterfaceTable (e.g. one built in a parser process)
+
+        Args:
+            other (InterfaceTable): Table to append
+        """
+        rows = len(other)
+        self._reserve(rows)
+        start, end = self._length, self._length + rows
+
+        for attribute, column in self._columns.items():
+            other_column = other._columns[attribute]
+
+            if isinstance(column, _CategoryColumn):
+                recoded = np.array([column.code_for(category) for category in other_column.categories] + [-1],
+                                   dtype=np.int64)
+                # Code -1 (None) indexes the trailing -1
+                column.codes[start:end] = recoded[other_column.codes[:rows]]
+            else:
+                column.values[start:end] = other_column.values[:rows]
+                column.mask[start:end] = other_column.mask[:rows]
+
+        self.switch_vlans.update(other.switch_vlans)
+        self._length = end
+
+    @classmethod
+    def from_switches(cls, switch_objects):
+        """Builds a table from a list of Switch objects
+
+        Args:
+            switch_objects (list): list of Switch objects
+
+        Returns:
+            InterfaceTable
+        """
+        table = cls(capacity=sum(len(switch.interfaces or []) for switch in switch_objects))
+        for switch in switch_objects:
+            table.add_switch(switch)
+        return table
+
+    def to_pandas(self):
+        """Returns the table as a DataFrame. String columns are pandas categoricals and
+        VLAN/True-False columns are nullable Int16/boolean columns. The DataFrame uses the
+        table's arrays rather than copies of them; rows appended to the table later do
+        not appear in it
+
+        Returns:
+            DataFrame: One row per interface
+        """
+        return pd.DataFrame(
+            {attribute: column.to_pandas(self._length) for attribute, column in self._columns.items()},
+            copy=False
+        )
+
+    def memory_usage(self):
+        """Returns the bytes used by the table's rows: arrays (without spare capacity)
+        plus the characters of each distinct string
+
+        Returns:
+            int: Bytes
+        """
+        return sum(column.nbytes(self._length) for column in self._columns.values())
+
+    def __getstate__(self):
+        # Spare capacity is not pickled, so tables sent between processes stay small
+        self._capacity = max(1, self._length)
+        for column in self._columns.values():
+            column.resize(self._capacity, self._length)
+        return self.__dict__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
@@ -8,10 +8,13 @@ class Switch(BaseModel):
     config: Optional[str]
     config_filename: Optional[str]
     config_restconf: Optional[dict]
+    domain_name: Optional[str]
     hostname: Optional[str]
     interfaces: Optional[List]
     ip_address: Optional[str]
+    spanning_tree_mode: Optional[str]
     vlans: Optional[List]
+    vtp_mode: Optional[str]
 
     class Config:
         validate_assignment = True
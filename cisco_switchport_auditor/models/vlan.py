@@ -0,0 +1,5 @@
+from collections import namedtuple
+
+# Defined once at module level so switch objects holding VLANs can be pickled
+# (e.g. when returned from a parser process)
+Vlan = namedtuple('Vlan', ['id', 'name'])
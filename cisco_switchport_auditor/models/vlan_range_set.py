@@ -0,0 +1,141 @@
+from bisect import bisect_right
+
+import numpy as np
+
+MIN_VLAN_ID = 1
+MAX_VLAN_ID = 4094
+
+
+class VlanRangeSet:
+    """Immutable set of VLAN IDs stored as sorted, non-overlapping (start, end) ranges
+    rather than an expanded list. `switchport trunk allowed vlan 1-4094` is stored as a
+    single range. Membership tests are a binary search over the range starts.
+
+    Can be used as a pydantic field type. Strings in IOS notation (e.g. "10,20-30")
+    are accepted and converted.
+
+    Args:
+        ranges (iterable, optional): (start, end) tuples, inclusive. Ranges may overlap
+        or be unsorted. Defaults to an empty set.
+    """
+    __slots__ = ('_ranges', '_starts')
+
+    def __init__(self, ranges=()):
+        self._ranges = self._merge_ranges(ranges)
+        self._starts = tuple(start for start, _ in self._ranges)
+
+    @staticmethod
+    def _merge_ranges(ranges):
+        merged = []
+        for start, end in sorted((int(start), int(end)) for start, end in ranges):
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return tuple(merged)
+
+    @classmethod
+    def from_string(cls, vlan_list):
+        """Creates a VlanRangeSet from IOS VLAN list notation
+
+        Args:
+            vlan_list (str): e.g. "1,10,20-30". "all" and "none" are also accepted
+
+        Returns:
+            VlanRangeSet
+        """
+        vlan_list = vlan_list.strip()
+
+        if vlan_list == 'all':
+            return cls.all()
+        if vlan_list == 'none' or vlan_list == '':
+            return cls()
+
+        ranges = []
+        for entry in vlan_list.split(','):
+            start, _, end = entry.strip().partition('-')
+            ranges.append((start, end or start))
+
+        return cls(ranges)
+
+    @classmethod
+    def all(cls):
+        """Returns a VlanRangeSet containing every usable VLAN ID (1-4094)"""
+        return cls([(MIN_VLAN_ID, MAX_VLAN_ID)])
+
+    @property
+    def ranges(self):
+        """tuple: sorted, non-overlapping (start, end) tuples"""
+        return self._ranges
+
+    def __contains__(self, vlan_id):
+        position = bisect_right(self._starts, vlan_id) - 1
+        return position >= 0 and vlan_id <= self._ranges[position][1]
+
+    def __iter__(self):
+        for start, end in self._ranges:
+            yield from range(start, end + 1)
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self._ranges)
+
+    def __bool__(self):
+        return len(self._ranges) > 0
+
+    def __eq__(self, other):
+        if isinstance(other, VlanRangeSet):
+            return self._ranges == other._ranges
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._ranges)
+
+    def __or__(self, other):
+        return VlanRangeSet(self._ranges + other._ranges)
+
+    def __sub__(self, other):
+        remaining = []
+        for start, end in self._ranges:
+            for remove_start, remove_end in other._ranges:
+                if remove_end < start or remove_start > end:
+                    continue
+                if remove_start > start:
+                    remaining.append((start, remove_start - 1))
+                start = remove_end + 1
+                if start > end:
+                    break
+            if start <= end:
+                remaining.append((start, end))
+        return VlanRangeSet(remaining)
+
+    def __str__(self):
+        return ','.join(str(start) if start == end else f'{start}-{end}' for start, end in self._ranges)
+
+    def __repr__(self):
+        return f"VlanRangeSet('{self}')"
+
+    def to_bitmap(self):
+        """Converts the set to a packed 4096-bit bitmap (most significant bit first),
+        the same layout used by `utilities.vlan_analytics.VlanMatrix`
+
+        Returns:
+            numpy.ndarray: uint8 array of length 512
+        """
+        bits = np.zeros(MAX_VLAN_ID + 2, dtype=bool)
+        for start, end in self._ranges:
+            bits[start:end + 1] = True
+        return np.packbits(bits)
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value):
+        """pydantic validator. Accepts a VlanRangeSet or an IOS VLAN list string"""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls.from_string(value)
+        raise TypeError('VlanRangeSet or IOS VLAN list string required')
@@ -0,0 +1,101 @@
+import re
+from collections import namedtuple
+
+from models.vlan import Vlan
+from models.vlan_range_set import VlanRangeSet
+
+GlobalConfig = namedtuple('GlobalConfig', ['hostname', 'vlans', 'domain_name', 'spanning_tree_mode', 'vtp_mode'])
+
+# Patterns are compiled once at import. Each top-level line is only tested against the
+# pattern for its first keyword, so most lines never reach a regex at all
+HOSTNAME_REGEX = re.compile(r'^hostname\s+(\S+)')
+VLAN_REGEX = re.compile(r'^vlan\s+(\d+(?:-\d+)?(?:,\d+(?:-\d+)?)*)\s*$')
+VLAN_NAME_REGEX = re.compile(r'^\s+name\s+(\S+)')
+DOMAIN_NAME_REGEX = re.compile(r'^ip\s+domain[\s-]name\s+(\S+)')
+SPANNING_TREE_MODE_REGEX = re.compile(r'^spanning-tree\s+mode\s+(\S+)')
+VTP_MODE_REGEX = re.compile(r'^vtp\s+mode\s+(\S+)')
+
+
+def default_vlan_name(vlan_id):
+    """Returns the name IOS gives a VLAN that was not configured with one
+
+    Args:
+        vlan_id (int): VLAN ID (e.g. 30)
+
+    Returns:
+        str: Default VLAN name (e.g. VLAN0030)
+    """
+    return f'VLAN{vlan_id:04d}'
+
+
+def extract_global_config(config_lines):
+    """Reads the global (non-interface) settings of a running/startup config in a
+    single pass over its lines:
+
+    * hostname
+    * VLAN ID/name pairs - including VLANs without a name (given the IOS default name,
+      e.g. VLAN0030) and ranges such as `vlan 10,20-30`
+    * ip domain name, spanning-tree mode and VTP mode
+
+    Args:
+        config_lines (list): switch configuration. One line per entry
+
+    Returns:
+        GlobalConfig: named tuple of the settings found. `vlans` is a list of Vlan
+        named tuples in the order they are defined. Settings that are not configured
+        are None
+    """
+    hostname = None
+    domain_name = None
+    spanning_tree_mode = None
+    vtp_mode = None
+
+    vlan_names = {}
+    vlan_block_ids = None
+
+    for line in config_lines:
+        if not line or line[0] == '!':
+            vlan_block_ids = None
+            continue
+
+        if line[0] == ' ':
+            if vlan_block_ids is not None:
+                match = VLAN_NAME_REGEX.match(line)
+                if match:
+                    for vlan_id in vlan_block_ids:
+                        vlan_names[vlan_id] = match.group(1)
+            continue
+
+        vlan_block_ids = None
+
+        if line.startswith('vlan '):
+            match = VLAN_REGEX.match(line)
+            if match:
+                vlan_block_ids = list(VlanRangeSet.from_string(match.group(1)))
+                for vlan_id in vlan_block_ids:
+                    vlan_names.setdefault(vlan_id, None)
+
+        elif line.startswith('hostname '):
+            match = HOSTNAME_REGEX.match(line)
+            if match:
+                hostname = match.group(1)
+
+        elif line.startswith('ip domain'):
+            match = DOMAIN_NAME_REGEX.match(line)
+            if match:
+                domain_name = match.group(1)
+
+        elif line.startswith('spanning-tree mode'):
+            match = SPANNING_TREE_MODE_REGEX.match(line)
+            if match:
+                spanning_tree_mode = match.group(1)
+
+        elif line.startswith('vtp mode'):
+            match = VTP_MODE_REGEX.match(line)
+            if match:
+                vtp_mode = match.group(1)
+
+    vlans = [Vlan(vlan_id, name if name is not None else default_vlan_name(vlan_id))
+             for vlan_id, name in vlan_names.items()]
+
+    return GlobalConfig(hostname, vlans, domain_name, spanning_tree_mode, vtp_mode)
@@ -1,5 +1,11 @@
+import re
+
 from ciscoconfparse import CiscoConfParse
 
+from models.vlan_range_set import VlanRangeSet
+
+TRUNK_ALLOWED_VLAN_REGEX = re.compile(r'^\s*switchport\strunk\sallowed\svlan\s+(?:(add|except|remove)\s+)?(\S+)$')
+
 class ParserRunningConfigInterface:
     def __init__(self, Interface, interface_config):
         """This class will parse interface specific configuration to obtain
@@ -71,6 +77,8 @@ class ParserRunningConfigInterface:
         self._interface.admin_down = self._determine_if_admin_down()
         self._interface.vlan = self._determine_vlan()
         self._interface.voice_vlan = self._determine_voice_vlan()
+        self._interface.is_trunk_port = self._determine_is_trunk_port()
+        self._interface.trunk_allowed_vlans = self._determine_trunk_allowed_vlans()
         self._interface.is_access_port = self._determine_is_access_port()
         self._interface.vlan_name = self._correlate_vlan_id_to_name()
         self._interface.voice_vlan_name = self._correlate_voice_vlan_id_to_name()
@@ -107,7 +115,8 @@ class ParserRunningConfigInterface:
         Note: Sometimes switchport mode access is not present despite a VLAN
         being configured. The extra conditional check accounts for this scenario
 
-        Note: Ensure this method is AFTER _determine_vlan in _parse_config_for_data
+        Note: Ensure this method is AFTER _determine_vlan and _determine_is_trunk_port
+        in _parse_config_for_data
 
         Returns:
             bool: Returns true if is an access port, else False
@@ -115,11 +124,54 @@ class ParserRunningConfigInterface:
 
         if self._check_if_config_line_present('^\s*switchport\smode\saccess$'):
             return True
-        elif self._interface.vlan != None:
+        elif self._interface.vlan != None and self._interface.is_trunk_port is not True:
             return True
         else:
             return False
 
+    def _determine_is_trunk_port(self):
+        """Uses CiscConfParse to ascertain if an interface is a trunk port
+        by using regexes against an interface's configuration
+
+        Returns:
+            bool: Returns true if is a trunk port, else False
+        """
+        return self._check_if_config_line_present('^\s*switchport\smode\strunk$')
+
+    def _determine_trunk_allowed_vlans(self):
+        """Builds the set of VLANs allowed on a trunk from `switchport trunk allowed vlan`
+        lines. Lines are applied in order so `add`, `except` and `remove` continuation
+        lines are accounted for. A trunk without an allowed VLAN list carries all VLANs
+
+        Note: Ensure this method is AFTER _determine_is_trunk_port in _parse_config_for_data
+
+        Returns:
+            VlanRangeSet: Allowed VLANs (e.g. 10,20-30). None if not a trunk port
+        """
+        if self._interface.is_trunk_port is not True:
+            return None
+
+        allowed_vlans = VlanRangeSet.all()
+
+        for line in self._interface_config_lines.re_search_children(r'^\s*switchport\strunk\sallowed\svlan\s'):
+            match = TRUNK_ALLOWED_VLAN_REGEX.match(line.text)
+            if match is None:
+                continue
+
+            action, vlan_list = match.groups()
+            vlans = VlanRangeSet.from_string(vlan_list)
+
+            if action == 'add':
+                allowed_vlans = allowed_vlans | vlans
+            elif action == 'remove':
+                allowed_vlans = allowed_vlans - vlans
+            elif action == 'except':
+                allowed_vlans = VlanRangeSet.all() - vlans
+            else:
+                allowed_vlans = vlans
+
+        return allowed_vlans
+
    
     def _determine_if_admin_down(self):
         """Uses CiscConfParse to ascertain if an interface is an admin down
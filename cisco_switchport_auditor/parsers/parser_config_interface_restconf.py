@@ -1,3 +1,5 @@
+from models.vlan_range_set import VlanRangeSet
+
 
 class ParserConfigInterfaceRestconf:
     """This class will parse interface specific RESTCONF configuration
@@ -28,6 +30,7 @@ class ParserConfigInterfaceRestconf:
         self._interface.voice_vlan = self._determine_voice_vlan()
         self._interface.is_access_port = self._determine_is_access_port()
         self._interface.is_trunk_port = self._determine_is_trunk_port()
+        self._interface.trunk_allowed_vlans = self._determine_trunk_allowed_vlans()
         self._interface.IPDT_policy = self._determine_IPDT_policy()
         self._interface.vlan_name = self._correlate_vlan_id_to_name()
         self._interface.voice_vlan_name = self._correlate_voice_vlan_id_to_name()
@@ -129,6 +132,39 @@ class ParserConfigInterfaceRestconf:
         except KeyError:
             return False
 
+    def _determine_trunk_allowed_vlans(self):
+        """Obtains the VLANs allowed on a trunk from interface specific restconf
+        configuration. A trunk without an allowed VLAN list carries all VLANs
+
+        Note: Ensure this method is AFTER _determine_is_trunk_port in _parse_interface_restconf_data
+
+        Returns:
+            VlanRangeSet: Allowed VLANs (e.g. 10,20-30). None if not a trunk port
+        """
+        if self._interface.is_trunk_port is not True:
+            return None
+
+        try:
+            allowed_vlan_config = self._interface_config_restconf['switchport']['Cisco-IOS-XE-switch:trunk']['allowed']['vlan']
+        except KeyError:
+            return VlanRangeSet.all()
+
+        if 'none' in allowed_vlan_config:
+            return VlanRangeSet()
+
+        allowed_vlans = VlanRangeSet.all()
+
+        if 'vlans' in allowed_vlan_config:
+            allowed_vlans = VlanRangeSet.from_string(str(allowed_vlan_config['vlans']))
+        if 'except' in allowed_vlan_config:
+            allowed_vlans = VlanRangeSet.all() - VlanRangeSet.from_string(str(allowed_vlan_config['except']))
+        if 'add' in allowed_vlan_config:
+            allowed_vlans = allowed_vlans | VlanRangeSet.from_string(str(allowed_vlan_config['add']))
+        if 'remove' in allowed_vlan_config:
+            allowed_vlans = allowed_vlans - VlanRangeSet.from_string(str(allowed_vlan_config['remove']))
+
+        return allowed_vlans
+
     def _determine_IPDT_policy(self):
         """Obtains the interface IPDT policy name from the interface
         specific restconf configuration
@@ -1,9 +1,8 @@
-from collections import namedtuple
 from ciscoconfparse import CiscoConfParse
 
 from models.interface import Interface
+from parsers.parser_config_global_regex import extract_global_config
 from parsers.parser_config_interface_regex import ParserRunningConfigInterface
-from utilities.regex_functions import regex_search
 
 class ParserRunningConfigSwitch:
     """This class will parse a switch's configuration to obtain
@@ -13,10 +12,14 @@ class ParserRunningConfigSwitch:
     Args:
         Switch (obj): Switch object
         config (str): A Cisco switch's running/startup config
+        interface_table (InterfaceTable, optional): Table to add the switch's interfaces
+        to instead of the Switch object's `interfaces` (which is then left as None).
+        Defaults to None.
     """
-    def __init__(self, Switch, config):
+    def __init__(self, Switch, config, interface_table=None):
         self._switch = Switch
         self._config = config
+        self._interface_table = interface_table
         self._config_split = self._format_config_for_CiscoConfParse()
 
         self._parser = self._add_config_to_parser()
@@ -55,51 +58,45 @@ class ParserRunningConfigSwitch:
         """Function that consolidates obtaining all the various
         switch configuration details
         """
+        self._global_config = extract_global_config(self._config_split)
+
         self._switch.hostname = self._get_hostname()
         self._switch.vlans = self._get_vlans()
-        self._switch.interfaces = self._get_interfaces()
+        self._switch.domain_name = self._global_config.domain_name
+        self._switch.spanning_tree_mode = self._global_config.spanning_tree_mode
+        self._switch.vtp_mode = self._global_config.vtp_mode
+
+        if self._interface_table is not None:
+            self._interface_table.add_switch_interfaces(self._switch.hostname, self._switch.vlans, self._get_interfaces())
+        else:
+            self._switch.interfaces = self._get_interfaces()
 
     def _get_hostname(self):
-        """Obtains the hostname of a switch via regex from the config
+        """Obtains the hostname of a switch from the global settings read by
+        `extract_global_config`
 
         Returns:
             str: Hostname of the switch (i.e. MY_SWITCH)
         """
-        try:
-            global_obj = self._parser.find_objects(r'^hostname')[0]
-            hostname = global_obj.re_match_typed(r'^hostname\s+(\S+)', default='')
-        except IndexError:
-            if self._switch.config_filename is not None:
-                print(f'Could not find the hostname in file: {self._switch.config_filename}')
-            hostname = None
+        hostname = self._global_config.hostname
+
+        if hostname is None and self._switch.config_filename is not None:
+            print(f'Could not find the hostname in file: {self._switch.config_filename}')
 
         return hostname
 
     def _get_vlans(self):
-        """Finds all VLANs present on a switch as well as the VLAN name. For each VLAN,
-        an entry is made into a named tuple. The VLAN ID is accessed by the id name and
-        the VLAN name is accessed via the name.
+        """Returns all VLANs present on a switch as well as the VLAN name, read by
+        `extract_global_config`. Each VLAN is a named tuple. The VLAN ID is accessed
+        by the id name and the VLAN name is accessed via the name. VLANs configured
+        without a name are given the IOS default name (e.g. VLAN0030)
 
         E.g. vlan.id, vlan.name
 
         Returns:
             list: A list of named tuples
         """
-        vlans = []
-
-        for vlan_parse_object in self._parser.find_objects_w_child('^vlan\s+\d+$', '^\s+name\s+\S+$'):
-            vlan_tuple = namedtuple('vlan', ['id', 'name'])
-            vlan_id_regex = "^vlan\s+(\d+)$"
-            vlan_name_regex = "^\s+name\s+(\S+)$"
-
-            vlan_id = regex_search(vlan_id_regex, vlan_parse_object.ioscfg)
-            vlan_name = regex_search(vlan_name_regex, vlan_parse_object.ioscfg)
-
-            vlan = vlan_tuple(int(vlan_id), vlan_name)
-
-            vlans.append(vlan)
-
-        return vlans
+        return self._global_config.vlans
 
 
     def _get_interfaces(self):
@@ -1,21 +1,33 @@
-from collections import namedtuple
-
 from models.interface import Interface
+from models.vlan import Vlan
 from parsers.parser_config_interface_restconf import ParserConfigInterfaceRestconf
 
+INTERFACE_TYPES_TO_AUDIT = ["FastEthernet", "GigabitEthernet", "TwoGigabitEthernet", "FiveGigabitEthernet", "TenGigabitEthernet"]
+
+# Paths in the Cisco-IOS-XE-native document of the global settings read besides the
+# hostname and interfaces
+DOMAIN_NAME_PATH = ('ip', 'domain', 'name')
+SPANNING_TREE_MODE_PATH = ('spanning-tree', 'Cisco-IOS-XE-spanning-tree:mode')
+VTP_MODE_PATH = ('vtp', 'Cisco-IOS-XE-vtp:mode')
+
 
 class ParserConfigSwitchRestconf:
     """This class will parse a switch's configuration obtained via restconf
-    to obtain configuration details such as hostname, interfaces, VLANs.
+    to obtain configuration details such as hostname, interfaces, VLANs, domain name,
+    spanning-tree mode and VTP mode.
     Those details are then added to the Switch object as attributes
 
     Args:
         Switch (obj): Instantiated switch object
         switch_config_restconf (dict): JSON return from restconf of switch configuration
         switch_vlans_restconf (dict): JSON return from restconf of switch VLANs
+        interface_table (InterfaceTable, optional): Table to add the switch's interfaces
+        to instead of the Switch object's `interfaces` (which is then left as None).
+        Defaults to None.
     """
-    def __init__(self, Switch, switch_config_restconf, switch_vlans_restconf):
+    def __init__(self, Switch, switch_config_restconf, switch_vlans_restconf, interface_table=None):
         self._switch = Switch
+        self._interface_table = interface_table
 
         self.config_restconf = switch_config_restconf["Cisco-IOS-XE-native:native"]
         self._switch_vlans_restconf = switch_vlans_restconf["Cisco-IOS-XE-vlan-oper:vlans"]['vlan']
@@ -37,7 +49,14 @@ class ParserConfigSwitchRestconf:
         """
         self._switch.hostname = self._get_hostname()
         self._switch.vlans = self._get_vlans()
-        self._switch.interfaces = self._get_interfaces()
+        self._switch.domain_name = self._get_domain_name()
+        self._switch.spanning_tree_mode = self._get_spanning_tree_mode()
+        self._switch.vtp_mode = self._get_vtp_mode()
+
+        if self._interface_table is not None:
+            self._interface_table.add_switch_interfaces(self._switch.hostname, self._switch.vlans, self._get_interfaces())
+        else:
+            self._switch.interfaces = self._get_interfaces()
 
     def _get_hostname(self):
         """
@@ -55,6 +74,48 @@ class ParserConfigSwitchRestconf:
 
         return hostname
 
+    def _get_native_value(self, path):
+        """Returns the value at a path of keys in the native config, or None if any of
+        the keys is not configured"""
+        value = self.config_restconf
+        try:
+            for key in path:
+                value = value[key]
+
+        except (KeyError, TypeError):
+            return None
+
+        return value
+
+    def _get_domain_name(self):
+        """Obtains the `ip domain name` of a switch restconf config
+
+        Returns:
+            str: Domain name of the switch (i.e. example.net)
+        """
+        return self._get_native_value(DOMAIN_NAME_PATH)
+
+    def _get_spanning_tree_mode(self):
+        """Obtains the spanning-tree mode of a switch restconf config (Cisco-IOS-XE-spanning-tree)
+
+        Returns:
+            str: Spanning-tree mode (i.e. rapid-pvst)
+        """
+        return self._get_native_value(SPANNING_TREE_MODE_PATH)
+
+    def _get_vtp_mode(self):
+        """Obtains the VTP mode of a switch restconf config (Cisco-IOS-XE-vtp). The mode is
+        a choice, returned as a container keyed by the mode (e.g. {"transparent": {}})
+
+        Returns:
+            str: VTP mode (i.e. transparent)
+        """
+        mode = self._get_native_value(VTP_MODE_PATH)
+        if isinstance(mode, dict):
+            return next(iter(mode), None)
+
+        return mode
+
     def _get_vlans(self):
         """
         Finds all VLANs present on a switch as well as the VLAN name. For each VLAN,
@@ -69,12 +130,10 @@ class ParserConfigSwitchRestconf:
         vlans = []
 
         for vlan in self._switch_vlans_restconf:
-            vlan_tuple = namedtuple('vlan', ['id', 'name'])
-
             vlan_id = vlan['id']
             vlan_name = vlan["name"]
 
-            vlan = vlan_tuple(vlan_id, vlan_name)
+            vlan = Vlan(vlan_id, vlan_name)
 
             vlans.append(vlan)
 
@@ -83,7 +142,7 @@ class ParserConfigSwitchRestconf:
 
     def _get_interfaces(self):
         """Sorts and parses through JSON switch interface configuration. Only certain interface types
-        defined in `interfaces_types_to_audit` are considered. For each interface, an interface object
+        defined in `INTERFACE_TYPES_TO_AUDIT` are considered. For each interface, an interface object
         is instantiated, interface type and switch hostname are set as attributes as they are not
         available in the JSON interface configuration. The interface object is then passed to the
         restconf interface parser to have remaining configuration details assigned to the interface
@@ -95,10 +154,8 @@ class ParserConfigSwitchRestconf:
 
         interfaces = []
 
-        interface_types_to_audit = ["FastEthernet", "GigabitEthernet", "TwoGigabitEthernet", "FiveGigabitEthernet", "TenGigabitEthernet"]
-
         for interface_type in self._switch_interfaces_config_restconf:
-            if interface_type in interface_types_to_audit:
+            if interface_type in INTERFACE_TYPES_TO_AUDIT:
                 for interface_config_restconf in self._switch_interfaces_config_restconf[interface_type]:
                     interface = Interface()
                     interface.type = interface_type
@@ -0,0 +1,251 @@
+import ipaddress
+import socket
+import threading
+import time
+from collections import deque
+
+import requests
+from netmiko import NetmikoAuthenticationException, NetmikoTimeoutException
+
+SUCCESS = 'success'
+SLOW = 'slow'
+TIMEOUT = 'timeout'
+AUTH_FAILURE = 'auth_failure'
+THROTTLED = 'throttled'
+ERROR = 'error'
+
+# Outcomes that mean the devices or AAA servers are overloaded. Any of them shrinks the limit
+OVERLOAD_OUTCOMES = {SLOW, TIMEOUT, AUTH_FAILURE, THROTTLED}
+# Overload outcomes are listed before the outcomes they override when one slot sees several
+OUTCOME_PRIORITY = [THROTTLED, AUTH_FAILURE, TIMEOUT, ERROR, SLOW, SUCCESS]
+
+
+def classify_exception(exception):
+    """Maps an exception raised while collecting from a host to a limiter outcome
+
+    Args:
+        exception (Exception): Exception raised by ssh_handler, netmiko or requests
+
+    Returns:
+        str: One of the outcome constants
+    """
+    if isinstance(exception, NetmikoAuthenticationException):
+        return AUTH_FAILURE
+    if isinstance(exception, (NetmikoTimeoutException, socket.timeout, requests.exceptions.Timeout)):
+        return TIMEOUT
+    return ERROR
+
+
+def classify_status_code(status_code):
+    """Maps a RESTCONF HTTP status code to a limiter outcome
+
+    Args:
+        status_code (int): HTTP status code
+
+    Returns:
+        str: One of the outcome constants
+    """
+    if status_code == 401:
+        return AUTH_FAILURE
+    if status_code in (429, 503):
+        return THROTTLED
+    if status_code < 400:
+        return SUCCESS
+    return ERROR
+
+
+class ConcurrencySlot:
+    """One host's hold on an AdaptiveConcurrencyLimiter. Returned by
+    `AdaptiveConcurrencyLimiter.slot`; records the login latency and outcome of the host
+
+    Args:
+        limiter (AdaptiveConcurrencyLimiter): Limiter the slot belongs to
+        host (str): Hostname or IP address
+        subnet (str): Subnet cap the host counts against, or None
+    """
+    def __init__(self, limiter, host, subnet):
+        self._limiter = limiter
+        self.host = host
+        self.subnet = subnet
+        self.started_at = time.monotonic()
+        self.epoch = limiter._epoch
+        self.latency = None
+        self.outcome = SUCCESS
+
+    def logged_in(self):
+        """Records the login latency (time from the slot being granted until now). Only
+        the first call counts"""
+        if self.latency is None:
+            self.latency = time.monotonic() - self.started_at
+
+    def record_outcome(self, outcome):
+        """Records an outcome. The most severe outcome recorded is kept"""
+        if OUTCOME_PRIORITY.index(outcome) < OUTCOME_PRIORITY.index(self.outcome):
+            self.outcome = outcome
+
+    def record_response(self, response):
+        """Response hook for `restconf_request`. Records the latency of the first response
+        and the outcome of each response
+
+        Args:
+            response (int or Exception): HTTP status code, or the exception the request raised
+        """
+        if isinstance(response, Exception):
+            self.record_outcome(classify_exception(response))
+        else:
+            self.logged_in()
+            self.record_outcome(classify_status_code(response))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if value is not None:
+            self.record_outcome(classify_exception(value))
+        self._limiter.release(self)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limits how many hosts are collected at the same time and adapts the limit with
+    AIMD (additive increase, multiplicative decrease), the way TCP adapts its window:
+
+    * each successful host whose login latency is within `latency_tolerance` times the
+      baseline (a moving average of healthy logins) grows the limit by
+      `additive_increase / limit`, i.e. by `additive_increase` per full window of hosts
+    * a timeout, authentication failure (TACACS+/RADIUS overloaded), HTTP 401/429/503 or
+      a login slower than the tolerance multiplies the limit by `decrease_factor`
+
+    Only hosts started after the last decrease can decrease the limit again, so a burst
+    of failures from one overloaded window only halves the limit once.
+
+    Hosts can also be capped per subnet (e.g. per site), on top of the adaptive limit.
+
+    Args:
+        initial_limit (int, optional): Starting limit. Defaults to 4.
+        min_limit (int, optional): The limit never drops below this. Defaults to 1.
+        max_limit (int, optional): The limit never grows above this. Defaults to 64.
+        additive_increase (float, optional): Growth per window of healthy hosts. Defaults to 1.
+        decrease_factor (float, optional): Multiplier applied on overload. Defaults to 0.5.
+        latency_tolerance (float, optional): Logins slower than this multiple of the
+        baseline count as overload. Defaults to 2.0.
+        subnet_limits (dict, optional): Maximum concurrent hosts per network, e.g.
+        {'10.1.0.0/16': 4}. Defaults to None.
+        default_subnet_prefix (int, optional): Caps every IPv4 /prefix not in subnet_limits
+        at default_subnet_limit (e.g. 24 for one cap per /24). Defaults to None.
+        default_subnet_limit (int, optional): Cap used with default_subnet_prefix. Defaults to None.
+    """
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=64, additive_increase=1, decrease_factor=0.5,
+                 latency_tolerance=2.0, subnet_limits=None, default_subnet_prefix=None, default_subnet_limit=None):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+
+        self._subnet_limits = [(ipaddress.ip_network(network), limit) for network, limit in (subnet_limits or {}).items()]
+        self._default_subnet_prefix = default_subnet_prefix
+        self._default_subnet_limit = default_subnet_limit
+
+        self.baseline_latency = None
+        self.in_flight = 0
+        self._subnet_in_flight = {}
+        self._epoch = 0
+        self._condition = threading.Condition()
+
+        self.outcomes = {outcome: 0 for outcome in OUTCOME_PRIORITY}
+        self.limit_history = deque([(0.0, int(self.limit))], maxlen=1000)
+        self.peak_in_flight = 0
+        self._start_time = time.monotonic()
+
+    def _subnet_of(self, host):
+        """Returns (subnet, cap) for a host, or (None, None) if it is not capped"""
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return None, None
+
+        for network, limit in self._subnet_limits:
+            if address in network:
+                return str(network), limit
+
+        if self._default_subnet_prefix is not None and address.version == 4:
+            network = ipaddress.ip_network(f'{host}/{self._default_subnet_prefix}', strict=False)
+            return str(network), self._default_subnet_limit
+
+        return None, None
+
+    def slot(self, host):
+        """Waits until the host may be collected and returns its slot. Use as a context
+        manager around the collection; exceptions raised inside are recorded
+
+        Args:
+            host (str): Hostname or IP address
+
+        Returns:
+            ConcurrencySlot: The host's slot
+        """
+        subnet, subnet_limit = self._subnet_of(host)
+
+        with self._condition:
+            while (self.in_flight >= int(self.limit)
+                   or (subnet is not None and self._subnet_in_flight.get(subnet, 0) >= subnet_limit)):
+                self._condition.wait()
+
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if subnet is not None:
+                self._subnet_in_flight[subnet] = self._subnet_in_flight.get(subnet, 0) + 1
+
+            return ConcurrencySlot(self, host, subnet)
+
+    def release(self, slot):
+        """Frees a slot and adapts the limit to its outcome. Called by the slot's
+        context manager
+
+        Args:
+            slot (ConcurrencySlot): Slot returned by `slot`
+        """
+        outcome = slot.outcome
+        latency = slot.latency if slot.latency is not None else time.monotonic() - slot.started_at
+
+        with self._condition:
+            self.in_flight -= 1
+            if slot.subnet is not None:
+                self._subnet_in_flight[slot.subnet] -= 1
+
+            if outcome == SUCCESS and self.baseline_latency is not None \
+                    and latency > self.baseline_latency * self.latency_tolerance:
+                outcome = SLOW
+
+            self.outcomes[outcome] += 1
+
+            if outcome == SUCCESS:
+                self.baseline_latency = latency if self.baseline_latency is None \
+                    else 0.9 * self.baseline_latency + 0.1 * latency
+                self._set_limit(self.limit + self.additive_increase / self.limit)
+
+            elif outcome in OVERLOAD_OUTCOMES and slot.epoch == self._epoch:
+                self._epoch += 1
+                self._set_limit(self.limit * self.decrease_factor)
+
+            self._condition.notify_all()
+
+    def _set_limit(self, limit):
+        previous = int(self.limit)
+        self.limit = max(float(self.min_limit), min(float(self.max_limit), limit))
+        if int(self.limit) != previous:
+            self.limit_history.append((round(time.monotonic() - self._start_time, 2), int(self.limit)))
+
+    def print_summary(self):
+        """Prints the outcomes seen, the peak concurrency and how the limit changed
+
+        Returns:
+            None
+        """
+        outcomes = ', '.join(f'{outcome}: {count}' for outcome, count in self.outcomes.items() if count)
+        baseline = f'{self.baseline_latency:.2f}s' if self.baseline_latency is not None else 'n/a'
+        print(f'Adaptive concurrency - Final limit: {int(self.limit)} | Peak in flight: {self.peak_in_flight} '
+              f'| Baseline login latency: {baseline}')
+        print(f'Outcomes - {outcomes}')
+        print('Last limit changes (seconds, limit): ' + ', '.join(f'({at}, {limit})' for at, limit in list(self.limit_history)[-20:]))
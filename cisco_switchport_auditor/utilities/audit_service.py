@@ -0,0 +1,279 @@
+import heapq
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from utilities.serialization import switch_to_dict
+
+
+class HostState:
+    """Schedule and latest result of one host in an AuditService
+
+    Args:
+        host (str): Hostname or IP address
+        interval (float): Seconds between collections of the host
+    """
+    def __init__(self, host, interval):
+        self.host = host
+        self.interval = interval
+        self.next_run = None
+        self.running = False
+        self.switch = None
+        self.collected_at = None
+        self.duration_seconds = None
+        self.last_error = None
+        self.runs = 0
+
+    def to_dict(self):
+        """Returns the schedule and status of the host as plain types (for the query API)"""
+        return {
+            'host': self.host,
+            'hostname': self.switch.hostname if self.switch is not None else None,
+            'interval': self.interval,
+            'next_run': _isoformat(self.next_run),
+            'running': self.running,
+            'collected_at': _isoformat(self.collected_at),
+            'duration_seconds': self.duration_seconds,
+            'interfaces': len(self.switch.interfaces) if self.switch is not None else None,
+            'last_error': self.last_error,
+            'runs': self.runs,
+        }
+
+
+class AuditService:
+    """Long-running audit service. Keeps a schedule per host, collects and parses each
+    host on its own interval through a bounded worker pool and keeps the latest Switch
+    object of every host in memory between cycles.
+
+    First runs are spread evenly over one interval and every run is shifted by a random
+    jitter, so device and AAA load is spread over time instead of every host being
+    collected in the same minute. A host is never collected twice at the same time; if
+    a collection fails, the previous Switch object is kept and the error recorded.
+
+    Args:
+        list_of_hosts (list): list of hostnames or IP addresses
+        collect_function (function): Called as collect_function(host). Returns the raw
+        config of the host (see `utilities/collectors.py`)
+        parse_function (function): Called as parse_function(host, raw_config). Returns a
+        Switch object
+        interval (float, optional): Default seconds between collections of a host.
+        Defaults to 3600.
+        jitter (float, optional): Fraction of the interval each run is randomly shifted
+        by (0.1 = +/-10%). Defaults to 0.1.
+        max_workers (int, optional): Maximum number of hosts collected at the same time.
+        Defaults to 8.
+        host_intervals (dict, optional): Per host intervals overriding `interval`.
+        Defaults to None.
+    """
+    def __init__(self, list_of_hosts, collect_function, parse_function, interval=3600, jitter=0.1,
+                 max_workers=8, host_intervals=None):
+        self._collect_function = collect_function
+        self._parse_function = parse_function
+        self.jitter = jitter
+        self.max_workers = max_workers
+
+        host_intervals = host_intervals or {}
+        self.hosts = {host: HostState(host, host_intervals.get(host, interval)) for host in list_of_hosts}
+
+        self._schedule = []
+        self._lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._stopped = threading.Event()
+        self._worker_slots = threading.BoundedSemaphore(max_workers)
+        self._worker_pool = None
+        self._scheduler = None
+        self._query_server = None
+
+    def _jittered(self, interval):
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _schedule_first_runs(self):
+        """Spreads the first run of each host evenly over its interval"""
+        now = time.time()
+        number_of_hosts = len(self.hosts)
+
+        for position, state in enumerate(self.hosts.values()):
+            offset = state.interval * position / number_of_hosts
+            state.next_run = now + max(0.0, offset + random.uniform(0, self.jitter * state.interval / number_of_hosts))
+            heapq.heappush(self._schedule, (state.next_run, state.host))
+
+    def start(self):
+        """Starts the scheduler in a background thread"""
+        self._stopped.clear()
+        self._worker_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        with self._lock:
+            self._schedule_first_runs()
+
+        self._scheduler = threading.Thread(target=self._run_scheduler, daemon=True)
+        self._scheduler.start()
+
+    def stop(self):
+        """Stops scheduling new collections, waits for running collections to finish
+        and stops the query API if it was started
+        """
+        self._stopped.set()
+        self._wake_up.set()
+
+        if self._scheduler is not None:
+            self._scheduler.join()
+        if self._worker_pool is not None:
+            self._worker_pool.shutdown(wait=True)
+        if self._query_server is not None:
+            self._query_server.shutdown()
+            self._query_server.server_close()
+
+    def _run_scheduler(self):
+        while not self._stopped.is_set():
+            with self._lock:
+                next_run, host = self._schedule[0] if self._schedule else (None, None)
+
+            if next_run is None:
+                self._wait(None)
+                continue
+
+            delay = next_run - time.time()
+            if delay > 0:
+                self._wait(delay)
+                continue
+
+            while not self._worker_slots.acquire(timeout=0.5):
+                if self._stopped.is_set():
+                    return
+
+            with self._lock:
+                # The earliest entry may have changed while waiting for a worker slot;
+                # it is still due as it can only be earlier than the one peeked at
+                _, host = heapq.heappop(self._schedule)
+                state = self.hosts[host]
+                state.running = True
+                state.next_run = None
+
+            self._worker_pool.submit(self._audit_host, state)
+
+    def _wait(self, timeout):
+        self._wake_up.wait(timeout)
+        self._wake_up.clear()
+
+    def _audit_host(self, state):
+        """Worker task. Collects and parses one host, stores the result and schedules
+        the host's next run
+        """
+        start = time.time()
+        try:
+            raw_config = self._collect_function(state.host)
+            if raw_config is None:
+                raise RuntimeError('no configuration was returned')
+            switch = self._parse_function(state.host, raw_config)
+            error = None
+        except Exception as e:
+            print(f"Audit of {state.host} failed ({type(e).__name__}: {e}). Keeping its previous result")
+            switch = None
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            self._worker_slots.release()
+
+        with self._lock:
+            state.running = False
+            state.runs += 1
+            state.last_error = error
+            state.duration_seconds = round(time.time() - start, 3)
+            if switch is not None:
+                state.switch = switch
+                state.collected_at = start
+
+            state.next_run = start + self._jittered(state.interval)
+            heapq.heappush(self._schedule, (state.next_run, state.host))
+
+        self._wake_up.set()
+
+    def latest(self, host):
+        """Returns the most recent Switch object of a host
+
+        Args:
+            host (str): Hostname or IP address as given in list_of_hosts
+
+        Returns:
+            Switch: Switch object, or None if the host has not been collected yet
+        """
+        with self._lock:
+            return self.hosts[host].switch
+
+    def snapshot(self):
+        """Returns the most recent Switch object of every host that has been collected
+
+        Returns:
+            list: list of Switch objects
+        """
+        with self._lock:
+            return [state.switch for state in self.hosts.values() if state.switch is not None]
+
+    def status(self):
+        """Returns the schedule and latest result status of every host
+
+        Returns:
+            list: list of dicts, one per host
+        """
+        with self._lock:
+            return [state.to_dict() for state in self.hosts.values()]
+
+    def serve_query_api(self, port=8080, address='127.0.0.1'):
+        """Starts a local HTTP query API in a background thread. Responses are JSON:
+
+        * GET /status - schedule and status of every host
+        * GET /switches - latest result of every host, without raw configs
+        * GET /switches/<host> - latest result of one host, without raw configs
+
+        Args:
+            port (int, optional): TCP port to listen on. Defaults to 8080.
+            address (str, optional): Address to listen on. Defaults to '127.0.0.1'.
+
+        Returns:
+            ThreadingHTTPServer: The running server
+        """
+        service = self
+
+        class QueryHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = unquote(self.path.rstrip('/'))
+
+                if path == '/status':
+                    self._send_json(200, service.status())
+                elif path == '/switches':
+                    self._send_json(200, [switch_to_dict(switch) for switch in service.snapshot()])
+                elif path.startswith('/switches/') and path[len('/switches/'):] in service.hosts:
+                    switch = service.latest(path[len('/switches/'):])
+                    if switch is None:
+                        self._send_json(404, {'error': 'host has not been collected yet'})
+                    else:
+                        self._send_json(200, switch_to_dict(switch))
+                else:
+                    self._send_json(404, {'error': 'not found'})
+
+            def _send_json(self, status_code, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._query_server = ThreadingHTTPServer((address, port), QueryHandler)
+        threading.Thread(target=self._query_server.serve_forever, daemon=True).start()
+        print(f'Audit service query API listening on http://{address}:{self._query_server.server_port}')
+
+        return self._query_server
+
+
+def _isoformat(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp).isoformat(timespec='seconds')
@@ -0,0 +1,166 @@
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+from utilities.json_decoding import decode_json
+from utilities.serialization import switch_to_dict
+
+# One line of output, instead of the whole running-config, tells whether the config changed
+LAST_CHANGE_COMMAND = 'show running-config | include Last configuration change'
+LAST_CHANGE_REGEX = re.compile(r'Last configuration change at (.+)')
+
+
+def last_change_indicator(output):
+    """Returns the "Last configuration change at ..." header (time and user) from command
+    output, or None if the device did not report one
+
+    Args:
+        output (str): Output of `LAST_CHANGE_COMMAND` or a running-config
+
+    Returns:
+        str: e.g. '10:21:41 UTC Mon Oct 19 2026 by admin'
+    """
+    match = LAST_CHANGE_REGEX.search(output or '')
+    return match.group(1).strip() if match else None
+
+
+class ChangeDetectionCache:
+    """Remembers, per host, the "Last configuration change" header and the Switch parsed
+    from the config it belonged to, in a SQLite file that persists between runs. Lets
+    the SSH collector skip `show running-config` (and parsing) for switches whose
+    header has not changed since the previous run. Supports context management
+
+    Switches are stored with `switch_to_dict`, so reused Switch objects have no raw
+    configs (`config`) unless include_config is set. A switch is pulled in full again
+    once its stored result is older than refresh_after_days, in case a change did not
+    move the header (e.g. VLANs learnt over VTP).
+
+    Args:
+        cache_path (str, optional): Path of the SQLite file. Defaults to 'change_detection.db'.
+        include_config (bool, optional): Set to True to also store the raw configs, so
+        reused Switch objects keep them. Defaults to False.
+        refresh_after_days (float, optional): Days after which a switch is pulled in full
+        even if unchanged. Defaults to 7.
+    """
+    def __init__(self, cache_path='change_detection.db', include_config=False, refresh_after_days=7):
+        self.cache_path = cache_path
+        self.include_config = include_config
+        self.refresh_after_days = refresh_after_days
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS switches (
+                host TEXT PRIMARY KEY, last_change TEXT NOT NULL, switch BLOB NOT NULL,
+                config_bytes INTEGER NOT NULL, pull_seconds REAL NOT NULL, pulled_at TEXT NOT NULL
+            )
+        """)
+
+        self._pulled = {}
+        self._reset_run_stats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _reset_run_stats(self):
+        self.run_stats = {'unchanged': 0, 'pulled': 0, 'bytes_saved': 0, 'seconds_saved': 0.0, 'bytes_pulled': 0}
+
+    def unchanged_switch(self, host, last_change):
+        """Returns the stored switch of a host if its header is the same as when the
+        switch was stored (and the switch is not due a refresh). Counts the bytes and
+        seconds the skipped pull took last time as saved
+
+        Args:
+            host (str): Hostname or IP address
+            last_change (str): Header reported by the host now
+
+        Returns:
+            dict: Stored switch (see `switch_to_dict`), or None if the config must be pulled
+        """
+        if last_change is None:
+            return None
+
+        refresh_before = (datetime.now() - timedelta(days=self.refresh_after_days)).isoformat(timespec='seconds')
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT switch, config_bytes, pull_seconds FROM switches '
+                'WHERE host = ? AND last_change = ? AND pulled_at >= ?',
+                (host, last_change, refresh_before)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            switch, config_bytes, pull_seconds = row
+            self.run_stats['unchanged'] += 1
+            self.run_stats['bytes_saved'] += config_bytes
+            self.run_stats['seconds_saved'] += pull_seconds
+
+        return decode_json(zlib.decompress(switch))
+
+    def pulled(self, host, last_change, config_bytes, pull_seconds):
+        """Records that a host's config was pulled in full. Stored with the parsed switch
+        by `record`
+
+        Args:
+            host (str): Hostname or IP address
+            last_change (str): Header reported by the host, or None
+            config_bytes (int): Size of the running-config
+            pull_seconds (float): Seconds `show running-config` took
+        """
+        with self._lock:
+            self._pulled[host] = (last_change, config_bytes, pull_seconds)
+            self.run_stats['pulled'] += 1
+            self.run_stats['bytes_pulled'] += config_bytes
+
+    def record(self, switch):
+        """Stores a switch parsed from a config pulled in this run, keyed by the host it
+        was collected from (`switch.ip_address`). Reused switches are left as they are
+
+        Args:
+            switch (object): Switch object
+        """
+        with self._lock:
+            pulled = self._pulled.pop(switch.ip_address, None)
+            if pulled is None:
+                return
+
+            last_change, config_bytes, pull_seconds = pulled
+            if last_change is None:
+                return
+
+            switch_json = json.dumps(switch_to_dict(switch, include_config=self.include_config)).encode()
+            with self._connection:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO switches (host, last_change, switch, config_bytes, pull_seconds, pulled_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (switch.ip_address, last_change, zlib.compress(switch_json), config_bytes, pull_seconds,
+                     datetime.now().isoformat(timespec='seconds'))
+                )
+
+    def print_summary(self):
+        """Prints how many switches were reused and the bytes and seconds of
+        `show running-config` saved this run, then resets the run's counters
+
+        Returns:
+            None
+        """
+        stats = self.run_stats
+        print(f"Change detection - Unchanged (reused): {stats['unchanged']} | Pulled: {stats['pulled']} "
+              f"| Saved: {stats['bytes_saved'] / 1e6:.1f} MB, {stats['seconds_saved']:.0f}s of transfers "
+              f"and {stats['unchanged']} parses | Pulled: {stats['bytes_pulled'] / 1e6:.1f} MB")
+        self._reset_run_stats()
+
+    def close(self):
+        """Closes the cache"""
+        if self._connection is None:
+            return
+
+        self._connection.close()
+        self._connection = None
@@ -0,0 +1,132 @@
+import json
+import os
+
+from utilities.json_decoding import decode_json
+from utilities.serialization import switch_from_dict, switch_to_dict
+
+
+class CheckpointJournal:
+    """Append-only journal of the switches parsed in an audit run, so an interrupted run
+    can be resumed without collecting the hosts that had already finished. Supports
+    context management
+
+    Each switch is written as one JSON line (the host and `switch_to_dict` of the switch)
+    and flushed as soon as it has been parsed, so the journal survives the process
+    crashing or being interrupted. Hosts that failed are not journaled and are tried
+    again on resume.
+
+    With resume set, the switches already in the journal are loaded, `remaining` leaves
+    their hosts out and `merge` adds them back to the run's results. A line cut short by
+    a crash is dropped. Without resume, an existing journal is started over.
+
+    Args:
+        journal_path (str, optional): Path of the journal. Defaults to 'audit_checkpoint.jsonl'.
+        resume (bool, optional): Set to True to continue from an existing journal.
+        Defaults to False.
+        include_config (bool, optional): Set to True to also journal the raw configs, so
+        resumed Switch objects keep them. Defaults to False.
+    """
+    def __init__(self, journal_path='audit_checkpoint.jsonl', resume=False, include_config=False):
+        self.journal_path = journal_path
+        self.include_config = include_config
+        self._completed = {}
+
+        if resume and os.path.exists(journal_path):
+            self._load()
+
+        self._resumed = len(self._completed)
+        self._journal = open(journal_path, 'a' if resume else 'w', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _load(self):
+        with open(self.journal_path, 'rb') as journal:
+            content = journal.read()
+
+        # Anything after the last newline was cut short while being written
+        complete_length = content.rfind(b'\n') + 1
+        for line in content[:complete_length].splitlines():
+            if not line.strip():
+                continue
+            entry = decode_json(line)
+            self._completed[entry['host']] = entry['switch']
+
+        if complete_length < len(content):
+            with open(self.journal_path, 'r+b') as journal:
+                journal.truncate(complete_length)
+
+    @property
+    def completed_hosts(self):
+        """set: Hosts whose switch is in the journal"""
+        return set(self._completed)
+
+    def remaining(self, list_of_hosts):
+        """Returns the hosts that are not in the journal yet
+
+        Args:
+            list_of_hosts (list): list of hostnames or IP addresses
+
+        Returns:
+            list: Hosts still to be collected, in the order given
+        """
+        return [host for host in list_of_hosts if host not in self._completed]
+
+    def record(self, switch):
+        """Appends a parsed switch to the journal, keyed by the host it was collected
+        from (`switch.ip_address`)
+
+        Args:
+            switch (object): Switch object
+        """
+        switch_dict = switch_to_dict(switch, include_config=self.include_config)
+        self._journal.write(json.dumps({'host': switch.ip_address, 'switch': switch_dict}) + '\n')
+        self._journal.flush()
+        self._completed[switch.ip_address] = switch_dict
+
+    def merge(self, list_of_hosts, switches):
+        """Returns the switches of this run together with those resumed from the journal,
+        in the order of list_of_hosts
+
+        Args:
+            list_of_hosts (list): Every host of the run, including the completed ones
+            switches (list): Switch objects parsed in this run
+
+        Returns:
+            list: list of Switch objects
+        """
+        parsed = {switch.ip_address: switch for switch in switches}
+        merged = []
+
+        for host in list_of_hosts:
+            if host in parsed:
+                merged.append(parsed[host])
+            elif host in self._completed:
+                merged.append(switch_from_dict(self._completed[host]))
+
+        return merged
+
+    def print_summary(self, list_of_hosts):
+        """Prints how many hosts were resumed from the journal and how many are still
+        missing after this run
+
+        Args:
+            list_of_hosts (list): Every host of the run
+
+        Returns:
+            None
+        """
+        missing = len(self.remaining(list_of_hosts))
+        print(f"Checkpoint - Resumed from journal: {self._resumed} | Completed this run: "
+              f"{len(self._completed) - self._resumed} | Missing (run again with resume=True): {missing}")
+
+    def close(self):
+        """Closes the journal"""
+        if self._journal is None:
+            return
+
+        self._journal.close()
+        self._journal = None
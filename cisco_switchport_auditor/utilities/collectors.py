@@ -0,0 +1,286 @@
+import time
+from contextlib import nullcontext
+
+from models.switch import Switch
+from parsers.parser_config_switch_regex import ParserRunningConfigSwitch
+from parsers.parser_config_switch_restconf import ParserConfigSwitchRestconf
+from utilities.change_detection import LAST_CHANGE_COMMAND, last_change_indicator
+from utilities.serialization import switch_from_dict
+from utilities.ssh_handler import copy_config_file, ssh_handler
+from utilities.json_decoding import extract_native_config, extract_vlans
+from utilities.restconf_requests import NOT_MODIFIED, restconf_request, restconf_url, validate_yang_model_availability
+
+# Collection tasks are network-bound and return the raw configuration of a host.
+# Parse tasks are CPU-bound and turn that raw configuration into a Switch object.
+# Parse tasks are kept as module-level functions so they can be sent to parser processes.
+
+
+def _concurrency_slot(limiter, host):
+    """Returns the host's slot on an AdaptiveConcurrencyLimiter, or a context manager
+    that does nothing (yielding None) when no limiter is used"""
+    return limiter.slot(host) if limiter is not None else nullcontext()
+
+
+def collect_running_config_via_ssh(host, username, password, session_log_level='full', limiter=None, port=22):
+    """Logs into a switch via SSH and returns the output of "show running-config"
+
+    Args:
+        host (str): Hostname or IP address
+        username (str): SSH device username
+        password (str): SSH device password
+        session_log_level (str, optional): 'off', 'errors' or 'full'. See
+        `utilities/session_logging.py`. Defaults to 'full'.
+        limiter (AdaptiveConcurrencyLimiter, optional): Waits for a slot before logging in
+        and reports the login latency and outcome. See `utilities/adaptive_concurrency.py`.
+        Defaults to None.
+        port (int, optional): SSH port. Defaults to 22.
+
+    Returns:
+        str: The switch's running-config
+    """
+    with _concurrency_slot(limiter, host) as slot:
+        with ssh_handler(host=host, username=username, password=password, port=port,
+                         session_log_level=session_log_level) as ssh_session:
+            if slot is not None:
+                slot.logged_in()
+            return ssh_session.send_command_timing('show running-config')
+
+
+def collect_config_via_file_transfer(host, username, password, filename='running-config', protocol='scp',
+                                     limiter=None, port=22):
+    """Copies a switch's running-config (or startup-config) over SCP or SFTP instead of
+    reading "show running-config" off an interactive SSH channel. The result is parsed
+    the same way, with `parse_running_config`. See `copy_config_file` in
+    `utilities/ssh_handler.py`
+
+    Args:
+        host (str): Hostname or IP address
+        username (str): SSH device username
+        password (str): SSH device password
+        filename (str, optional): 'running-config' or 'startup-config'. Defaults to 'running-config'.
+        protocol (str, optional): 'scp' or 'sftp'. Defaults to 'scp'.
+        limiter (AdaptiveConcurrencyLimiter, optional): See `collect_running_config_via_ssh`.
+        Defaults to None.
+        port (int, optional): SSH port. Defaults to 22.
+
+    Returns:
+        str: The switch's config
+    """
+    with _concurrency_slot(limiter, host) as slot:
+        # The login is reported as soon as it succeeds so the limiter does not count the
+        # transfer time of a large config as login latency
+        config = copy_config_file(host, username, password, filename=filename, protocol=protocol, port=port,
+                                  on_connected=slot.logged_in if slot is not None else None)
+        return config.decode(errors='replace')
+
+
+def collect_running_config_if_changed(host, username, password, change_cache, session_log_level='full', limiter=None,
+                                      port=22):
+    """Logs into a switch via SSH and first asks only for the "Last configuration change"
+    header of its running-config. If the header is the one stored in the change cache,
+    the switch stored from the previous run is returned instead of pulling
+    "show running-config"
+
+    Args:
+        host (str): Hostname or IP address
+        username (str): SSH device username
+        password (str): SSH device password
+        change_cache (ChangeDetectionCache): Headers and switches of previous runs. See
+        `utilities/change_detection.py`
+        session_log_level (str, optional): 'off', 'errors' or 'full'. Defaults to 'full'.
+        limiter (AdaptiveConcurrencyLimiter, optional): See `collect_running_config_via_ssh`.
+        Defaults to None.
+        port (int, optional): SSH port. Defaults to 22.
+
+    Returns:
+        str or dict: The switch's running-config, or the stored switch (see
+        `switch_to_dict`) if its config has not changed
+    """
+    with _concurrency_slot(limiter, host) as slot:
+        with ssh_handler(host=host, username=username, password=password, port=port,
+                         session_log_level=session_log_level) as ssh_session:
+            if slot is not None:
+                slot.logged_in()
+
+            last_change = last_change_indicator(ssh_session.send_command(LAST_CHANGE_COMMAND))
+            stored_switch = change_cache.unchanged_switch(host, last_change)
+            if stored_switch is not None:
+                return stored_switch
+
+            pull_start = time.perf_counter()
+            running_config = ssh_session.send_command_timing('show running-config')
+            change_cache.pulled(host, last_change, len(running_config.encode()), time.perf_counter() - pull_start)
+            return running_config
+
+
+def collect_config_via_restconf(host, username, password, incremental_decoding=False, limiter=None, port=443,
+                                response_cache=None):
+    """Queries a switch via RESTCONF for its native configuration and VLANs
+
+    Args:
+        host (str): Hostname or IP address
+        username (str): Username allowed to make RESTCONF requests
+        password (str): Password of user allowed to make RESTCONF requests
+        incremental_decoding (bool, optional): Set to True to stream the responses and
+        only keep the hostname, audited interfaces and VLAN IDs/names instead of the
+        whole documents. See `utilities/json_decoding.py`. Defaults to False.
+        limiter (AdaptiveConcurrencyLimiter, optional): Waits for a slot before the first
+        request and reports response latency and HTTP 401/429/503s. Defaults to None.
+        port (int, optional): HTTPS port. Defaults to 443.
+        response_cache (RestconfResponseCache, optional): Makes the requests conditional and
+        returns the switch stored from the previous run if neither document changed. See
+        `utilities/restconf_cache.py`. Defaults to None.
+
+    Returns:
+        tuple: (native config JSON, VLAN JSON). None if the YANG models are
+        unavailable or a request failed. With a response_cache, the stored switch (see
+        `switch_to_dict`) if neither document changed
+    """
+    with _concurrency_slot(limiter, host) as slot:
+        response_hook = slot.record_response if slot is not None else None
+
+        if validate_yang_model_availability(host, username, password, response_hook=response_hook,
+                                            port=port) is not True:
+            return None
+
+        native_decoder, vlans_decoder = (extract_native_config, extract_vlans) if incremental_decoding else (None, None)
+
+        config_restconf = restconf_request(host, username, password, "Cisco-IOS-XE-native", ":native",
+                                           port=port, decoder=native_decoder, response_hook=response_hook,
+                                           response_cache=response_cache)
+        vlans_restconf = restconf_request(host, username, password, "Cisco-IOS-XE-vlan-oper", ":vlans",
+                                          port=port, decoder=vlans_decoder, response_hook=response_hook,
+                                          response_cache=response_cache)
+
+    if not config_restconf or not vlans_restconf:
+        return None
+
+    if response_cache is not None:
+        native_url = restconf_url(host, "Cisco-IOS-XE-native", ":native", port=port)
+        vlans_url = restconf_url(host, "Cisco-IOS-XE-vlan-oper", ":vlans", port=port)
+        validators = response_cache.validators([native_url, vlans_url])
+
+        if config_restconf == NOT_MODIFIED and vlans_restconf == NOT_MODIFIED:
+            stored_switch = response_cache.unchanged_switch(host, validators)
+            if stored_switch is not None:
+                return stored_switch
+
+        if config_restconf == NOT_MODIFIED:
+            config_restconf = response_cache.cached_document(native_url, native_decoder)
+        if vlans_restconf == NOT_MODIFIED:
+            vlans_restconf = response_cache.cached_document(vlans_url, vlans_decoder)
+        response_cache.parsing(host, validators)
+
+    return config_restconf, vlans_restconf
+
+
+def parse_restconf_config_if_changed(host, collected):
+    """Parses what `collect_config_via_restconf` returned with a response cache: RESTCONF
+    JSON is parsed, a stored switch is rebuilt without parsing
+
+    Args:
+        host (str): Hostname or IP address the config was collected from
+        collected (tuple or dict): (native config JSON, VLAN JSON), or stored switch
+
+    Returns:
+        Switch: Switch object
+    """
+    if isinstance(collected, dict):
+        return switch_from_dict(collected)
+    return parse_restconf_config(host, collected)
+
+
+def read_config_file(config_filename, config_files_directory):
+    """Reads a running/startup-config file from a directory
+
+    Args:
+        config_filename (str): Name of the config file
+        config_files_directory (str): Path of location where running config files are
+
+    Returns:
+        str: Contents of the config file
+    """
+    with open(f'{config_files_directory}/{config_filename}', 'r') as text_file:
+        return text_file.read()
+
+
+def parse_running_config(host, running_config):
+    """Parses a running-config obtained over SSH into a Switch object
+
+    Args:
+        host (str): Hostname or IP address the config was collected from
+        running_config (str): The switch's running-config
+
+    Returns:
+        Switch: Switch object
+    """
+    switch = Switch(ip_address=host)
+    ParserRunningConfigSwitch(switch, running_config)
+    return switch
+
+
+def parse_running_config_if_changed(host, collected):
+    """Parses what `collect_running_config_if_changed` returned: a running-config is
+    parsed, a stored switch is rebuilt without parsing
+
+    Args:
+        host (str): Hostname or IP address the config was collected from
+        collected (str or dict): Running-config, or stored switch
+
+    Returns:
+        Switch: Switch object
+    """
+    if isinstance(collected, dict):
+        return switch_from_dict(collected)
+    return parse_running_config(host, collected)
+
+
+def parse_config_file(config_filename, config):
+    """Parses the contents of a config file into a Switch object
+
+    Args:
+        config_filename (str): Name of the config file
+        config (str): Contents of the config file
+
+    Returns:
+        Switch: Switch object
+    """
+    switch = Switch(config_filename=config_filename)
+    ParserRunningConfigSwitch(switch, config)
+    return switch
+
+
+def parse_restconf_config(host, restconf_config):
+    """Parses the RESTCONF JSON returned by `collect_config_via_restconf` into a
+    Switch object
+
+    Args:
+        host (str): Hostname or IP address the config was collected from
+        restconf_config (tuple): (native config JSON, VLAN JSON)
+
+    Returns:
+        Switch: Switch object
+    """
+    config_restconf, vlans_restconf = restconf_config
+    switch = Switch(ip_address=host)
+    ParserConfigSwitchRestconf(switch, config_restconf, vlans_restconf)
+    return switch
+
+
+def parse_archived_config(host, archived_config):
+    """Parses a config loaded from a ConfigArchive into a Switch object, the same way
+    it would have been parsed when it was collected
+
+    Args:
+        host (str): Hostname, IP address or config filename the config was collected from
+        archived_config (tuple): (kind, raw config) as returned by `ConfigArchive.load`
+
+    Returns:
+        Switch: Switch object
+    """
+    kind, raw_config = archived_config
+    if kind == 'restconf':
+        return parse_restconf_config(host, raw_config)
+    if kind == 'config_file':
+        return parse_config_file(host, raw_config)
+    return parse_running_config(host, raw_config)
@@ -0,0 +1,240 @@
+import re
+from collections import namedtuple
+from operator import attrgetter
+
+import numpy as np
+import pandas as pd
+
+from models.interface_table import InterfaceTable
+from utilities.vlan_analytics import VLAN_ID_SPACE
+
+ComplianceSummary = namedtuple('ComplianceSummary', ['switches', 'sites', 'vlans'])
+
+# Port counts of the per-switch rollup. The site rollup is the sum of its switches'
+COUNT_COLUMNS = ['ports', 'access_ports', 'trunk_ports', 'shutdown_ports', 'ise_compliant_access_ports',
+                 'access_ports_without_description']
+
+# Interface attributes the rollups are computed from
+SUMMARY_FIELDS = ['switch_hostname', 'is_access_port', 'is_trunk_port', 'admin_down', 'ise_compliant', 'description',
+                  'vlan', 'vlan_name', 'voice_vlan', 'voice_vlan_name']
+
+SUMMARY_SHEETS = {'switches': 'Switches', 'sites': 'Sites', 'vlans': 'VLANs'}
+
+SITE_REGEX = re.compile(r'^([^-_.]+)[-_.]')
+
+
+def site_from_hostname(hostname):
+    """Default site of a switch: its hostname up to the first '-', '_' or '.'
+    (e.g. NYC for NYC-IDF2-SW01). Hostnames without a separator are their own site
+
+    Args:
+        hostname (str): Hostname of the switch
+
+    Returns:
+        str: Site
+    """
+    match = SITE_REGEX.match(hostname)
+    return match.group(1) if match else hostname
+
+
+def audit_to_frame(audit):
+    """Builds one DataFrame of every interface in an audit. An InterfaceTable is used as
+    it is (`InterfaceTable.to_pandas`). For Switch objects only the SUMMARY_FIELDS are
+    read, with the hostname of the switch the interface is on
+
+    Args:
+        audit (list, InterfaceTable, DataFrame): list of Switch objects, an InterfaceTable,
+        or a DataFrame of interfaces (e.g. from `InterfaceTable.to_pandas` or `read_excel_export`)
+
+    Returns:
+        tuple: (DataFrame, list of every switch hostname or None if unknown). Hostnames
+        include switches without interfaces
+    """
+    if isinstance(audit, pd.DataFrame):
+        return audit, None
+
+    if isinstance(audit, InterfaceTable):
+        return audit.to_pandas(), [hostname for hostname in audit.switch_vlans if hostname is not None]
+
+    get_fields = attrgetter(*SUMMARY_FIELDS[1:])
+    rows = [(switch.hostname, *get_fields(interface)) for switch in audit for interface in switch.interfaces or []]
+    frame = pd.DataFrame.from_records(rows, columns=SUMMARY_FIELDS)
+    return frame, [switch.hostname for switch in audit if switch.hostname is not None]
+
+
+def _as_bool(column):
+    """Nullable boolean column as a numpy bool array, missing values as False"""
+    return column.fillna(False).to_numpy(dtype=bool)
+
+
+def _has_text(column):
+    """True where a string column has something other than whitespace. For a
+    categorical column each distinct string is only checked once"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = column.cat.categories.to_series().astype(str).str.strip().str.len().to_numpy() > 0
+        # Code -1 (None) indexes the trailing False
+        return np.append(categories, False)[column.cat.codes.to_numpy()]
+    return column.fillna('').astype(str).str.strip().str.len().to_numpy() > 0
+
+
+def _percentage(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (100 * numerator / denominator.where(denominator > 0)).round(1)
+
+
+def _add_percentages(rollup):
+    rollup['shutdown_pct'] = _percentage(rollup['shutdown_ports'], rollup['ports'])
+    rollup['ise_compliance_pct'] = _percentage(rollup['ise_compliant_access_ports'], rollup['access_ports'])
+    return rollup
+
+
+def summarise_compliance(audit, site_of=None):
+    """Rolls an audit up per switch, per site and per VLAN in one pass over a single
+    DataFrame of every interface. Each count is a True/False column summed per switch
+    with `numpy.bincount` on the switch's row codes, so there is no per-interface Python
+    loop. Sites are summed from their switches, and VLANs are counted the same way on
+    the VLAN ID columns
+
+    Per switch and per site: ports, access and trunk ports, shut down ports (and their
+    percentage of all ports), ISE compliant access ports (and their percentage of access
+    ports) and access ports without a description. Per VLAN: access and voice ports and
+    the switches and sites with at least one of them
+
+    Args:
+        audit (list, InterfaceTable, DataFrame): See `audit_to_frame`
+        site_of (dict, function, optional): Maps a switch hostname to its site. Hostnames
+        missing from a dict are their own site. Defaults to None which uses
+        `site_from_hostname`.
+
+    Returns:
+        ComplianceSummary: (switches, sites, vlans) DataFrames
+    """
+    frame, hostnames = audit_to_frame(audit)
+
+    if site_of is None:
+        site_of = site_from_hostname
+    elif isinstance(site_of, dict):
+        site_of = lambda hostname, sites=site_of: sites.get(hostname, hostname)
+
+    switch_codes, switch_names = pd.factorize(frame['switch_hostname'])
+    switch_names = list(switch_names)
+    if hostnames is not None:
+        with_interfaces = set(switch_names)
+        switch_names += [hostname for hostname in hostnames if hostname not in with_interfaces]
+    switch_names = np.asarray(switch_names, dtype=object)
+
+    # Interfaces without a switch hostname (code -1) are left out
+    has_switch = switch_codes >= 0
+    switch_codes = switch_codes[has_switch]
+
+    access = _as_bool(frame['is_access_port'])[has_switch]
+    counts = {
+        'ports': np.ones(len(switch_codes), dtype=bool),
+        'access_ports': access,
+        'trunk_ports': _as_bool(frame['is_trunk_port'])[has_switch],
+        'shutdown_ports': _as_bool(frame['admin_down'])[has_switch],
+        'ise_compliant_access_ports': access & _as_bool(frame['ise_compliant'])[has_switch],
+        'access_ports_without_description': access & ~_has_text(frame['description'])[has_switch],
+    }
+
+    switches = pd.DataFrame(
+        {column: np.bincount(switch_codes, weights=values, minlength=len(switch_names)).astype(np.int64)
+         for column, values in counts.items()},
+        index=pd.Index(switch_names.astype(str), name='switch')
+    )
+    site_names = switches.index.map(site_of)
+    switches.insert(0, 'site', site_names)
+
+    sites = switches.groupby('site')[COUNT_COLUMNS].sum()
+    sites.insert(0, 'switches', switches.groupby('site').size())
+
+    site_codes = sites.index.get_indexer(site_names)
+    vlans = _vlan_rollup(frame[has_switch], access, switch_codes, site_codes[switch_codes], len(switch_names),
+                         len(sites))
+
+    return ComplianceSummary(_add_percentages(switches.sort_index()), _add_percentages(sites), vlans)
+
+
+def _vlan_ids(column):
+    """VLAN ID column as a numpy int array, missing values as -1"""
+    return pd.to_numeric(column).astype('Int64').to_numpy(dtype=np.int64, na_value=-1)
+
+
+def _vlan_rollup(frame, access, switch_codes, site_codes, number_of_switches, number_of_sites):
+    """Access and voice ports per VLAN, with the number of switches and sites using it.
+    Counts are `numpy.bincount`s indexed by VLAN ID. (VLAN, switch) and (VLAN, site)
+    pairs are encoded as one integer each so distinct pairs can be found with `numpy.unique`"""
+    access_vlans = _vlan_ids(frame['vlan'])
+    voice_vlans = _vlan_ids(frame['voice_vlan'])
+    access_rows = access & (access_vlans >= 0)
+    voice_rows = voice_vlans >= 0
+
+    vlan_ids = np.concatenate([access_vlans[access_rows], voice_vlans[voice_rows]])
+    row_switches = np.concatenate([switch_codes[access_rows], switch_codes[voice_rows]])
+    row_sites = np.concatenate([site_codes[access_rows], site_codes[voice_rows]])
+    row_positions = np.concatenate([np.flatnonzero(access_rows), np.flatnonzero(voice_rows)])
+    named = np.concatenate([frame['vlan_name'].notna().to_numpy()[access_rows],
+                            frame['voice_vlan_name'].notna().to_numpy()[voice_rows]])
+    number_of_access_rows = int(access_rows.sum())
+
+    access_ports = np.bincount(vlan_ids[:number_of_access_rows], minlength=VLAN_ID_SPACE)
+    voice_ports = np.bincount(vlan_ids[number_of_access_rows:], minlength=VLAN_ID_SPACE)
+    switch_pairs = np.unique(vlan_ids * max(1, number_of_switches) + row_switches)
+    site_pairs = np.unique(vlan_ids * max(1, number_of_sites) + row_sites)
+
+    used = np.flatnonzero(access_ports + voice_ports)
+
+    # Each VLAN is named after the first of its rows with a VLAN name. With repeated
+    # indexes the last assignment wins, so the rows are assigned in reverse
+    first_named = np.full(VLAN_ID_SPACE, -1)
+    named_rows = np.flatnonzero(named)
+    first_named[vlan_ids[named_rows][::-1]] = named_rows[::-1]
+    first_rows = first_named[used]
+    names = np.full(len(used), None, dtype=object)
+    for column, picked in (('vlan_name', (first_rows >= 0) & (first_rows < number_of_access_rows)),
+                           ('voice_vlan_name', first_rows >= number_of_access_rows)):
+        names[picked] = frame[column].take(row_positions[first_rows[picked]]).to_numpy(dtype=object)
+
+    return pd.DataFrame({
+        'vlan_name': names,
+        'access_ports': access_ports[used],
+        'voice_ports': voice_ports[used],
+        'switches': np.bincount(switch_pairs // max(1, number_of_switches), minlength=VLAN_ID_SPACE)[used],
+        'sites': np.bincount(site_pairs // max(1, number_of_sites), minlength=VLAN_ID_SPACE)[used],
+    }, index=pd.Index(used, name='vlan'))
+
+
+def write_compliance_summary(summary, filename):
+    """Writes a ComplianceSummary to an excel file with one sheet per rollup (Switches,
+    Sites, VLANs). The header row is frozen and filterable
+
+    Args:
+        summary (ComplianceSummary): From `summarise_compliance`
+        filename (str): Name of the excel file
+
+    Returns:
+        None
+    """
+    with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+        for rollup, sheet_name in SUMMARY_SHEETS.items():
+            df = getattr(summary, rollup).reset_index()
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = writer.sheets[sheet_name]
+            worksheet.freeze_panes(1, 0)
+            worksheet.autofilter(0, 0, len(df), len(df.columns) - 1)
+
+    print(f'An excel file ({filename}) has been saved')
+
+
+def summary_filename(detail_filename):
+    """Returns the name of the summary file written next to a detail export
+    (e.g. 2022-01-01--13-00-00__switchport_audit_summary.xlsx)
+
+    Args:
+        detail_filename (str): Name of the detail excel file
+
+    Returns:
+        str: Name of the summary excel file
+    """
+    stem = detail_filename[:-len('.xlsx')] if detail_filename.endswith('.xlsx') else detail_filename
+    return f'{stem}_summary.xlsx'
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import date, datetime
+
+from utilities.json_decoding import decode_json
+
+# What kind of raw config an archived object is, so it is parsed the way it was collected
+SSH = 'ssh'
+RESTCONF = 'restconf'
+CONFIG_FILE = 'config_file'
+ARCHIVE_KINDS = (SSH, RESTCONF, CONFIG_FILE)
+
+
+class ConfigArchive:
+    """Content-addressed archive of collected raw configs in a single SQLite file.
+    Supports context management
+
+    Each distinct config is stored once, zlib compressed, under the SHA-256 of its
+    content, however many hosts or runs it was collected from. A per-host timeline
+    records when each version was first and last seen, with one row per version rather
+    than one per run, so nightly runs of unchanged switches only update a timestamp.
+
+    `as_of` returns the config each host had at a point in time from the timeline index,
+    without reading or decompressing anything else.
+
+    Two tables are created if missing:
+
+    * objects - sha256, kind (ssh, restconf or config_file), size and the compressed config
+    * timeline - host, object, first_seen, last_seen and the number of times it was seen
+
+    Args:
+        archive_path (str, optional): Path of the SQLite file. Defaults to 'config_archive.db'.
+        compression_level (int, optional): zlib level, 1 (fastest) to 9 (smallest).
+        Defaults to 9.
+    """
+    def __init__(self, archive_path='config_archive.db', compression_level=9):
+        self.archive_path = archive_path
+        self.compression_level = compression_level
+        # Collector threads store configs as they arrive; one connection is shared under a lock
+        self._connection = sqlite3.connect(archive_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._create_tables_if_missing()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _create_tables_if_missing(self):
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS objects (
+                id INTEGER PRIMARY KEY, sha256 TEXT UNIQUE NOT NULL, kind TEXT NOT NULL,
+                size INTEGER NOT NULL, data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS timeline (
+                host TEXT NOT NULL, object_id INTEGER NOT NULL REFERENCES objects (id),
+                first_seen TEXT NOT NULL, last_seen TEXT NOT NULL, times_seen INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS timeline_host_first_seen ON timeline (host, first_seen);
+        """)
+
+    def store(self, host, raw_config, kind=SSH, collected_at=None):
+        """Archives a collected config. The config is only written if no host has had the
+        same content before; otherwise only the host's timeline is updated
+
+        Args:
+            host (str): Hostname, IP address or config filename the config came from
+            raw_config (str or tuple): running-config text, or the (native config JSON,
+            VLAN JSON) tuple returned by `collect_config_via_restconf`
+            kind (str, optional): 'ssh', 'restconf' or 'config_file'. Defaults to 'ssh'.
+            collected_at (datetime, optional): When the config was collected. Defaults to now.
+
+        Returns:
+            str: SHA-256 of the config
+        """
+        if kind not in ARCHIVE_KINDS:
+            raise ValueError(f"kind must be one of {ARCHIVE_KINDS}, not {kind!r}")
+
+        content = _encode(raw_config, kind)
+        sha256 = hashlib.sha256(content).hexdigest()
+        seen_at = _timestamp(collected_at or datetime.now())
+
+        with self._lock, self._connection:
+            row = self._connection.execute('SELECT id FROM objects WHERE sha256 = ?', (sha256,)).fetchone()
+            if row is not None:
+                object_id = row[0]
+            else:
+                object_id = self._connection.execute(
+                    'INSERT INTO objects (sha256, kind, size, data) VALUES (?, ?, ?, ?)',
+                    (sha256, kind, len(content), zlib.compress(content, self.compression_level))
+                ).lastrowid
+
+            latest = self._connection.execute(
+                'SELECT rowid, object_id FROM timeline WHERE host = ? ORDER BY first_seen DESC, rowid DESC LIMIT 1',
+                (host,)
+            ).fetchone()
+
+            if latest is not None and latest[1] == object_id:
+                self._connection.execute(
+                    'UPDATE timeline SET last_seen = MAX(last_seen, ?), times_seen = times_seen + 1 WHERE rowid = ?',
+                    (seen_at, latest[0])
+                )
+            else:
+                self._connection.execute(
+                    'INSERT INTO timeline (host, object_id, first_seen, last_seen, times_seen) VALUES (?, ?, ?, ?, 1)',
+                    (host, object_id, seen_at, seen_at)
+                )
+
+        return sha256
+
+    def load(self, sha256):
+        """Returns an archived config
+
+        Args:
+            sha256 (str): SHA-256 returned by `store`, `as_of` or `timeline`
+
+        Returns:
+            tuple: (kind, raw config) where raw config is the running-config text, or the
+            (native config JSON, VLAN JSON) tuple for RESTCONF
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT kind, data FROM objects WHERE sha256 = ?', (sha256,)).fetchone()
+
+        if row is None:
+            raise KeyError(f'{sha256} is not in the archive {self.archive_path}')
+
+        kind, data = row
+        return kind, _decode(zlib.decompress(data), kind)
+
+    def as_of(self, when=None):
+        """Returns which config each host had at a point in time: the latest version
+        first seen at or before `when`. Hosts first collected after `when` are left out
+
+        Args:
+            when (datetime, date or str, optional): Point in time. A date, or an ISO
+            string with only a date (e.g. '2026-10-01'), means the end of that day.
+            Defaults to None which returns each host's latest version.
+
+        Returns:
+            dict: host to SHA-256 of its config
+        """
+        cutoff = _cutoff(when)
+
+        with self._lock:
+            rows = self._connection.execute("""
+                SELECT timeline.host, objects.sha256 FROM timeline
+                JOIN objects ON objects.id = timeline.object_id
+                WHERE timeline.rowid = (
+                    SELECT latest.rowid FROM timeline AS latest
+                    WHERE latest.host = timeline.host AND latest.first_seen <= ?
+                    ORDER BY latest.first_seen DESC, latest.rowid DESC LIMIT 1
+                )
+                ORDER BY timeline.host
+            """, (cutoff,)).fetchall()
+
+        return dict(rows)
+
+    def timeline(self, host):
+        """Returns every archived version of a host's config, oldest first
+
+        Args:
+            host (str): Hostname, IP address or config filename
+
+        Returns:
+            list: dicts with sha256, kind, size, first_seen, last_seen and times_seen
+        """
+        with self._lock:
+            rows = self._connection.execute("""
+                SELECT objects.sha256, objects.kind, objects.size, timeline.first_seen, timeline.last_seen,
+                       timeline.times_seen
+                FROM timeline JOIN objects ON objects.id = timeline.object_id
+                WHERE timeline.host = ? ORDER BY timeline.first_seen
+            """, (host,)).fetchall()
+
+        columns = ('sha256', 'kind', 'size', 'first_seen', 'last_seen', 'times_seen')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def stats(self):
+        """Returns how much the archive saves over keeping every collected copy
+
+        Returns:
+            dict: hosts, versions, objects, collected_bytes (every config seen, uncompressed),
+            unique_bytes (distinct configs, uncompressed) and stored_bytes (compressed)
+        """
+        with self._lock:
+            hosts, versions, collected_bytes = self._connection.execute("""
+                SELECT COUNT(DISTINCT timeline.host), COUNT(*), COALESCE(SUM(timeline.times_seen * objects.size), 0)
+                FROM timeline JOIN objects ON objects.id = timeline.object_id
+            """).fetchone()
+            objects, unique_bytes, stored_bytes = self._connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM objects'
+            ).fetchone()
+
+        return {'hosts': hosts, 'versions': versions, 'objects': objects, 'collected_bytes': collected_bytes,
+                'unique_bytes': unique_bytes, 'stored_bytes': stored_bytes}
+
+    def print_summary(self):
+        """Prints the archive's size against the size of every collected config
+
+        Returns:
+            None
+        """
+        stats = self.stats()
+        ratio = stats['collected_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+        print(f"Config archive - Hosts: {stats['hosts']} | Versions: {stats['versions']} "
+              f"| Distinct configs: {stats['objects']} | Collected: {stats['collected_bytes'] / 1e6:.1f} MB "
+              f"| Stored: {stats['stored_bytes'] / 1e6:.1f} MB ({ratio:.0f}x smaller)")
+
+    def close(self):
+        """Closes the archive"""
+        if self._connection is None:
+            return
+
+        self._connection.close()
+        self._connection = None
+
+
+def archive_collected_configs(collect_function, archive, kind):
+    """Wraps a collect function so every config it collects is stored in a ConfigArchive
+    before being returned. Failed collections (None) and switches reused by change
+    detection (dicts, see `utilities/change_detection.py`) are not archived
+
+    Args:
+        collect_function (function): Called as collect_function(host)
+        archive (ConfigArchive): Archive to store the configs in
+        kind (str): 'ssh', 'restconf' or 'config_file'
+
+    Returns:
+        function: Collect function with the same signature
+    """
+    def collect(host):
+        raw_config = collect_function(host)
+        if raw_config is not None and not isinstance(raw_config, dict):
+            archive.store(host, raw_config, kind=kind)
+        return raw_config
+
+    return collect
+
+
+def _encode(raw_config, kind):
+    if kind == RESTCONF:
+        config_restconf, vlans_restconf = raw_config
+        # Sorted keys so the same document always hashes the same
+        return json.dumps([config_restconf, vlans_restconf], sort_keys=True, separators=(',', ':')).encode()
+    return raw_config.encode()
+
+
+def _decode(content, kind):
+    if kind == RESTCONF:
+        config_restconf, vlans_restconf = decode_json(content)
+        return config_restconf, vlans_restconf
+    return content.decode()
+
+
+def _timestamp(moment):
+    # Stored as naive local time so timestamps compare as strings
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat(timespec='seconds')
+
+
+def _cutoff(when):
+    """Returns the ISO timestamp `as_of` compares first_seen against"""
+    if when is None:
+        return '9999-12-31T23:59:59'
+    if isinstance(when, datetime):
+        return _timestamp(when)
+    if isinstance(when, date):
+        return f'{when.isoformat()}T23:59:59'
+    if len(when) == 10:
+        return f'{when}T23:59:59'
+    return when
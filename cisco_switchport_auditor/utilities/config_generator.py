@@ -0,0 +1,233 @@
+import random
+
+PORTS_PER_STACK_MEMBER = 48
+
+
+def generate_switch_spec(hostname, number_of_vlans=50, number_of_interfaces=48, trunk_ratio=0.05, seed=None):
+    """Generates a random but realistic description of an access switch that can be
+    rendered into configuration. Used to benchmark and test the parsers and collectors
+    without real devices
+
+    Args:
+        hostname (str): Hostname of the switch
+        number_of_vlans (int, optional): VLANs to define. Defaults to 50.
+        number_of_interfaces (int, optional): GigabitEthernet interfaces to create, 48 per
+        stack member. Defaults to 48.
+        trunk_ratio (float, optional): Fraction of interfaces that are trunks. Defaults to 0.05.
+        seed (int, optional): Seed for repeatable output. Defaults to None.
+
+    Returns:
+        dict: hostname, domain_name, vlans as a list of (id, name) tuples where name may
+        be None, and interfaces as a list of dicts. An interface's mode is 'access', 'trunk'
+        or None (no `switchport mode` line)
+    """
+    rng = random.Random(seed)
+
+    vlan_ids = sorted(rng.sample(range(2, 4000), number_of_vlans))
+    vlans = [(vlan_id, f'VLAN_{vlan_id}' if rng.random() > 0.1 else None) for vlan_id in vlan_ids]
+
+    interfaces = []
+
+    for index in range(number_of_interfaces):
+        member, port = divmod(index, PORTS_PER_STACK_MEMBER)
+        is_trunk = rng.random() < trunk_ratio
+        interface = {
+            'type': 'GigabitEthernet',
+            'name': f'{member + 1}/0/{port + 1}',
+            'description': rng.choice([None, f'Desk {rng.randint(1, 999)}', 'Printer', 'AP']),
+            'shutdown': rng.random() < 0.1,
+            'mode': 'trunk' if is_trunk else 'access',
+            'vlan': None,
+            'voice_vlan': None,
+            'trunk_allowed_vlans': None,
+            'ise': False,
+            'ipdt_policy': None,
+        }
+
+        if is_trunk:
+            allowed = sorted(rng.sample(vlan_ids, min(len(vlan_ids), 4)))
+            interface['trunk_allowed_vlans'] = ','.join(str(vlan_id) for vlan_id in allowed)
+        elif vlan_ids:
+            interface['vlan'] = rng.choice(vlan_ids)
+            interface['voice_vlan'] = rng.choice([None, vlan_ids[0]])
+            interface['ise'] = rng.random() < 0.8
+            interface['ipdt_policy'] = rng.choice([None, 'IPDT_MAX_10'])
+
+        interfaces.append(interface)
+
+    return {
+        'hostname': hostname,
+        'domain_name': 'example.net',
+        'vlans': vlans,
+        'interfaces': interfaces,
+    }
+
+
+def render_running_config(switch_spec, last_change='10:21:41 UTC Mon Oct 19 2026'):
+    """Renders a switch spec from `generate_switch_spec` into "show running-config"
+    output
+
+    Args:
+        switch_spec (dict): Switch spec
+        last_change (str, optional): Timestamp of the "Last configuration change" header.
+        Defaults to '10:21:41 UTC Mon Oct 19 2026'.
+
+    Returns:
+        str: running-config
+    """
+    lines = [
+        'Building configuration...',
+        '',
+        'Current configuration : 0 bytes',
+        '!',
+        f'! Last configuration change at {last_change} by admin',
+        '!',
+        'version 17.3',
+        'service timestamps debug datetime msec',
+        'service password-encryption',
+        '!',
+        f"hostname {switch_spec['hostname']}",
+        '!',
+        'aaa new-model',
+        '!',
+        f"ip domain name {switch_spec['domain_name']}",
+        '!',
+        'spanning-tree mode rapid-pvst',
+        'vtp mode transparent',
+        '!',
+    ]
+
+    for vlan_id, name in switch_spec['vlans']:
+        lines.append(f'vlan {vlan_id}')
+        if name is not None:
+            lines.append(f' name {name}')
+        lines.append('!')
+
+    for interface in switch_spec['interfaces']:
+        lines.append(f"interface {interface['type']}{interface['name']}")
+        if interface['description'] is not None:
+            lines.append(f" description {interface['description']}")
+        if interface['mode'] == 'trunk':
+            if interface['trunk_allowed_vlans'] is not None:
+                lines.append(f" switchport trunk allowed vlan {interface['trunk_allowed_vlans']}")
+            lines.append(' switchport mode trunk')
+        else:
+            if interface['vlan'] is not None:
+                lines.append(f" switchport access vlan {interface['vlan']}")
+            if interface['mode'] == 'access':
+                lines.append(' switchport mode access')
+            if interface['voice_vlan'] is not None:
+                lines.append(f" switchport voice vlan {interface['voice_vlan']}")
+        if interface['ipdt_policy'] is not None:
+            lines.append(f" device-tracking attach-policy {interface['ipdt_policy']}")
+        if interface['ise']:
+            lines.extend([
+                ' authentication priority dot1x mab',
+                ' authentication port-control auto',
+                ' mab',
+            ])
+        if interface['shutdown']:
+            lines.append(' shutdown')
+        lines.append('!')
+
+    lines.extend(['interface Vlan1', ' no ip address', '!', 'end', ''])
+
+    return '\n'.join(lines)
+
+
+def render_restconf(switch_spec, number_of_acl_entries=1000):
+    """Renders a switch spec from `generate_switch_spec` into the JSON documents a
+    RESTCONF query of Cisco-IOS-XE-native:native and Cisco-IOS-XE-vlan-oper:vlans
+    returns. Sections the auditor does not parse (ACLs, certificates, SVIs, per port
+    settings, VLAN member lists) are included so payload sizes are realistic
+
+    Args:
+        switch_spec (dict): Switch spec
+        number_of_acl_entries (int, optional): Entries of the extended ACL added to the
+        native config. Defaults to 1000.
+
+    Returns:
+        tuple: (native config JSON, VLAN JSON) as dicts
+    """
+    interfaces = {}
+
+    for interface in switch_spec['interfaces']:
+        interface_config = {
+            'name': interface['name'],
+            'switchport': {},
+            'Cisco-IOS-XE-ethernet:negotiation': {'auto': True},
+            'Cisco-IOS-XE-cdp:cdp': {'tlv': {'default-wrapper': {'app': False}}},
+            'Cisco-IOS-XE-spanning-tree:spanning-tree': {'portfast': {}, 'bpduguard': {'enable': [None]}},
+        }
+        switchport = interface_config['switchport']
+
+        if interface['description'] is not None:
+            interface_config['description'] = interface['description']
+        if interface['shutdown']:
+            interface_config['shutdown'] = [None]
+
+        if interface['mode'] == 'trunk':
+            switchport['Cisco-IOS-XE-switch:mode'] = {'trunk': {}}
+            if interface['trunk_allowed_vlans'] is not None:
+                switchport['Cisco-IOS-XE-switch:trunk'] = {'allowed': {'vlan': _restconf_allowed_vlans(interface['trunk_allowed_vlans'])}}
+        else:
+            if interface['mode'] == 'access':
+                switchport['Cisco-IOS-XE-switch:mode'] = {'access': {}}
+            if interface['vlan'] is not None:
+                switchport['Cisco-IOS-XE-switch:access'] = {'vlan': {'vlan': interface['vlan']}}
+            if interface['voice_vlan'] is not None:
+                switchport['Cisco-IOS-XE-switch:voice'] = {'vlan': {'vlan': interface['voice_vlan']}}
+
+        if interface['ipdt_policy'] is not None:
+            interface_config['Cisco-IOS-XE-switch:device-tracking'] = {'attach-policy': interface['ipdt_policy']}
+        if interface['ise']:
+            interface_config['Cisco-IOS-XE-sanet:authentication'] = {'priority': ['dot1x', 'mab'], 'port-control': 'auto'}
+            interface_config['Cisco-IOS-XE-sanet:mab'] = {}
+
+        interfaces.setdefault(interface['type'], []).append(interface_config)
+
+    acl_entries = [{
+        'sequence': str((position + 1) * 10),
+        'ace-rule': {'action': 'permit', 'protocol': 'tcp', 'ipv4-address': f'10.{position % 256}.0.0',
+                     'mask': '0.0.255.255', 'dst-any': [None], 'dst-eq': 443},
+    } for position in range(number_of_acl_entries)]
+
+    native_config = {'Cisco-IOS-XE-native:native': {
+        'version': '17.3',
+        'hostname': switch_spec['hostname'],
+        'ip': {
+            'domain': {'name': switch_spec['domain_name']},
+            'access-list': {'Cisco-IOS-XE-acl:extended': [{'name': 'BENCH_ACL', 'access-list-seq-rule': acl_entries}]},
+        },
+        'spanning-tree': {'Cisco-IOS-XE-spanning-tree:mode': 'rapid-pvst'},
+        'vtp': {'Cisco-IOS-XE-vtp:mode': {'transparent': {}}},
+        'crypto': {'Cisco-IOS-XE-crypto:pki': {'certificate': {'chain': [
+            {'name': 'TP-self-signed', 'certificate': [{'serial': '01', 'certtype': 'self-signed'}]},
+        ]}}},
+        'interface': {
+            **interfaces,
+            'AppGigabitEthernet': [{'name': '1/0/1', 'switchport': {'Cisco-IOS-XE-switch:mode': {'trunk': {}}}}],
+            'Vlan': [{'name': vlan_id, 'ip': {'no-address': {'address': False}}} for vlan_id, _ in switch_spec['vlans']],
+        },
+    }}
+
+    vlans_config = {'Cisco-IOS-XE-vlan-oper:vlans': {'vlan': [{
+        'id': vlan_id,
+        'name': name if name is not None else f'VLAN{vlan_id:04d}',
+        'status': 'active',
+        'vlan-interfaces': [{'interface': f"{interface['type']}{interface['name']}", 'subinterface': 0}
+                            for interface in switch_spec['interfaces'] if interface['vlan'] == vlan_id],
+    } for vlan_id, name in switch_spec['vlans']]}}
+
+    return native_config, vlans_config
+
+
+def _restconf_allowed_vlans(trunk_allowed_vlans):
+    """Returns the Cisco-IOS-XE-switch allowed VLAN container for a trunk's allowed VLAN
+    list the way IOS-XE returns it: `none` is an empty leaf and a single VLAN is a number
+    rather than a string"""
+    if trunk_allowed_vlans == 'none':
+        return {'none': [None]}
+    if trunk_allowed_vlans.isdigit():
+        return {'vlans': int(trunk_allowed_vlans)}
+    return {'vlans': trunk_allowed_vlans}
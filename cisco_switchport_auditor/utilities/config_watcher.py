@@ -0,0 +1,412 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from utilities.collectors import parse_config_file
+from utilities.pipeline import SwitchPipeline
+
+# What happened to a config file. switch is None for removed files
+ConfigChangeEvent = namedtuple('ConfigChangeEvent', 'kind filename switch')
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+# Files being written by a backup tool under a temporary name, or editor/hidden files
+IGNORED_SUFFIXES = ('.tmp', '.part', '.partial', '.swp', '~')
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class ConfigDirectoryWatcher:
+    """Watches a directory of running-config backups and keeps the Switch object of
+    every config file up to date in memory, instead of parsing the whole directory
+    again on every run. Supports context management
+
+    Every file is parsed once when the watcher starts. After that, only files that are
+    new or whose size or modification time changed are parsed. A file is parsed once
+    it has not changed for debounce_seconds, so a backup still being written is not
+    parsed half-way. A file saved again with the same content is not parsed again.
+
+    On Linux, changes are picked up with inotify. Elsewhere, or if inotify is
+    unavailable (e.g. the watch limit is reached), the directory is polled every
+    poll_interval seconds instead.
+
+    Each change is passed to on_change as a ConfigChangeEvent (kind, filename, switch)
+    where kind is 'added', 'changed' or 'removed'. on_change runs in the watcher's
+    thread, so it should return quickly.
+
+    Args:
+        config_files_directory (str): Path of location where running config files are
+        on_change (function, optional): Called as on_change(event) for every change.
+        Defaults to None.
+        debounce_seconds (float, optional): Seconds a file must stay unchanged before it
+        is parsed. Defaults to 2.0.
+        poll_interval (float, optional): Seconds between directory scans when polling.
+        Defaults to 2.0.
+        use_inotify (bool, optional): Set to False to always poll. Defaults to True.
+        parser_workers (int, optional): Parser processes for the first sweep of the
+        directory. Defaults to the number of CPUs.
+    """
+    def __init__(self, config_files_directory, on_change=None, debounce_seconds=2.0, poll_interval=2.0,
+                 use_inotify=True, parser_workers=None):
+        self.config_files_directory = config_files_directory
+        self.on_change = on_change
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.parser_workers = parser_workers
+
+        # filename to (size, mtime_ns, sha256, Switch) of the version last parsed
+        self._parsed = {}
+        # filename to (size, mtime_ns) and when it was last seen changing
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._inotify = None
+        self.mode = None
+        self.stats = {'parsed': 0, 'unchanged_content': 0, 'removed': 0, 'failed': 0}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    def start(self):
+        """Parses every config file in the directory, then watches it for changes in a
+        background thread"""
+        self._stopped.clear()
+
+        if self.use_inotify:
+            self._inotify = _Inotify.open(self.config_files_directory)
+        self.mode = 'inotify' if self._inotify is not None else 'polling'
+
+        self._initial_sweep()
+
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+        print(f'Watching {self.config_files_directory} ({self.mode}) - {len(self._parsed)} config files parsed')
+
+    def stop(self):
+        """Stops watching the directory"""
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _initial_sweep(self):
+        """Parses every file through a SwitchPipeline. Files changed while the sweep runs
+        are picked up by the watcher afterwards, as their signature will differ"""
+        signatures = self._scan()
+        filenames = list(signatures)
+        contents = {}
+
+        def read(filename):
+            content = self._read(filename)
+            if content is not None:
+                contents[filename] = content
+            return content
+
+        pipeline = SwitchPipeline(read, parse_config_file, parser_workers=self.parser_workers)
+        for index, switch in pipeline.iter_results(filenames):
+            filename = filenames[index]
+            size, mtime_ns = signatures[filename]
+            with self._lock:
+                self._parsed[filename] = (size, mtime_ns, _sha256(contents.pop(filename)), switch)
+            self.stats['parsed'] += 1
+
+    def _watch(self):
+        while not self._stopped.is_set():
+            if self._inotify is not None:
+                try:
+                    changed_filenames = self._inotify.read_changes(timeout=self._wait_timeout())
+                except OSError as e:
+                    print(f'inotify failed ({e}). Falling back to polling {self.config_files_directory}')
+                    self._inotify.close()
+                    self._inotify = None
+                    self.mode = 'polling'
+                    continue
+
+                if changed_filenames is None:
+                    # Events were dropped: rescan
+                    self._queue_changed_files()
+                for filename in changed_filenames or ():
+                    self._queue(filename, self._signature(filename))
+            else:
+                self._stopped.wait(self._wait_timeout())
+                self._queue_changed_files()
+
+            self._process_pending()
+
+    def _wait_timeout(self):
+        if self._inotify is None:
+            return self.poll_interval
+        with self._lock:
+            if not self._pending:
+                return 1.0
+            # Wake up in time to parse the earliest pending file
+            earliest = min(seen_at for _, seen_at in self._pending.values())
+        return min(1.0, max(0.05, earliest + self.debounce_seconds - time.monotonic()))
+
+    def _scan(self):
+        """Returns filename to (size, mtime_ns) of every config file in the directory"""
+        signatures = {}
+        try:
+            entries = list(os.scandir(self.config_files_directory))
+        except OSError as e:
+            print(f'Could not list {self.config_files_directory} ({e})')
+            return signatures
+
+        for entry in entries:
+            if not _is_config_file(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def _signature(self, filename):
+        if not _is_config_file(filename):
+            return False
+        try:
+            stat = os.stat(os.path.join(self.config_files_directory, filename))
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _queue_changed_files(self):
+        """Polling: queues files whose size or mtime differs from the parsed version,
+        and files that were removed"""
+        signatures = self._scan()
+        with self._lock:
+            known = list(self._parsed) + list(self._pending)
+
+        for filename, signature in signatures.items():
+            self._queue(filename, signature)
+        for filename in known:
+            if filename not in signatures:
+                self._queue(filename, None)
+
+    def _queue(self, filename, signature):
+        """Marks a file as changing. signature is None for a removed file and False for
+        a file that is not a config file"""
+        if signature is False:
+            return
+
+        with self._lock:
+            parsed = self._parsed.get(filename)
+            if parsed is not None and parsed[:2] == signature:
+                self._pending.pop(filename, None)
+                return
+            if parsed is None and signature is None:
+                self._pending.pop(filename, None)
+                return
+
+            pending = self._pending.get(filename)
+            if pending is None or pending[0] != signature:
+                self._pending[filename] = (signature, time.monotonic())
+
+    def _process_pending(self):
+        """Parses the files that have not changed for debounce_seconds"""
+        now = time.monotonic()
+        with self._lock:
+            settled = [filename for filename, (_, seen_at) in self._pending.items()
+                       if now - seen_at >= self.debounce_seconds]
+
+        for filename in settled:
+            signature = self._signature(filename)
+            with self._lock:
+                queued_signature, _ = self._pending[filename]
+                if signature != queued_signature:
+                    # Changed since it was queued (a write still in progress): wait again
+                    self._pending[filename] = (signature, time.monotonic())
+                    continue
+                del self._pending[filename]
+
+            if signature is None:
+                self._removed(filename)
+            else:
+                self._parse(filename, signature)
+
+    def _read(self, filename):
+        try:
+            with open(os.path.join(self.config_files_directory, filename), 'r') as text_file:
+                return text_file.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f'Could not read {filename} ({e}). Skipping {filename}')
+            return None
+
+    def _parse(self, filename, signature):
+        content = self._read(filename)
+        if content is None:
+            return
+
+        sha256 = _sha256(content)
+        with self._lock:
+            previous = self._parsed.get(filename)
+            if previous is not None and previous[2] == sha256:
+                # Saved again with the same content: nothing to parse
+                self._parsed[filename] = (*signature, sha256, previous[3])
+                self.stats['unchanged_content'] += 1
+                return
+
+        try:
+            switch = parse_config_file(filename, content)
+        except Exception as e:
+            print(f'Parsing {filename} failed ({type(e).__name__}: {e}). Keeping its previous result')
+            self.stats['failed'] += 1
+            return
+
+        with self._lock:
+            self._parsed[filename] = (*signature, sha256, switch)
+        self.stats['parsed'] += 1
+        self._emit(ConfigChangeEvent(ADDED if previous is None else CHANGED, filename, switch))
+
+    def _removed(self, filename):
+        with self._lock:
+            previous = self._parsed.pop(filename, None)
+        if previous is None:
+            return
+        self.stats['removed'] += 1
+        self._emit(ConfigChangeEvent(REMOVED, filename, None))
+
+    def _emit(self, event):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(event)
+        except Exception as e:
+            print(f'on_change failed for {event.filename} ({type(e).__name__}: {e})')
+
+    def latest(self, filename):
+        """Returns the Switch object parsed from the current version of a config file
+
+        Args:
+            filename (str): Name of the config file
+
+        Returns:
+            Switch: Switch object, or None if the file has not been parsed
+        """
+        with self._lock:
+            parsed = self._parsed.get(filename)
+        return parsed[3] if parsed is not None else None
+
+    def snapshot(self):
+        """Returns the Switch object of every config file in the directory
+
+        Returns:
+            list: list of Switch objects, in filename order
+        """
+        with self._lock:
+            return [self._parsed[filename][3] for filename in sorted(self._parsed)]
+
+
+class _Inotify:
+    """Minimal inotify(7) binding over ctypes, watching one directory"""
+    def __init__(self, libc, fd):
+        self._libc = libc
+        self.fd = fd
+
+    @classmethod
+    def open(cls, directory):
+        """Returns a watch on directory, or None if inotify is not available"""
+        library = ctypes.util.find_library('c')
+        if library is None:
+            return None
+
+        try:
+            libc = ctypes.CDLL(library, use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return None
+
+        inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            print(f'inotify is not available ({os.strerror(ctypes.get_errno())}). Polling instead')
+            return None
+
+        if inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+            print(f'Could not watch {directory} with inotify ({os.strerror(ctypes.get_errno())}). Polling instead')
+            os.close(fd)
+            return None
+
+        return cls(libc, fd)
+
+    def read_changes(self, timeout):
+        """Waits up to timeout seconds for events
+
+        Returns:
+            set: Names of the files with events, or None if events were dropped and the
+            directory must be rescanned
+
+        Raises:
+            OSError: If the directory was moved or deleted, as it is no longer watched
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        filenames = set()
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                raise OSError('the watched directory was moved or deleted')
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if name:
+                filenames.add(os.fsdecode(name))
+        return filenames
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _is_config_file(filename):
+    return not filename.startswith('.') and not filename.endswith(IGNORED_SUFFIXES)
+
+
+def _sha256(content):
+    return hashlib.sha256(content.encode()).digest()
@@ -0,0 +1,90 @@
+import sqlite3
+from datetime import datetime
+
+INTERFACE_COLUMNS = [
+    'name', 'type', 'description', 'admin_down', 'is_access_port', 'is_trunk_port',
+    'trunk_allowed_vlans', 'vlan', 'vlan_name', 'voice_vlan', 'voice_vlan_name',
+    'ise_compliant', 'IPDT_policy',
+]
+
+
+class SQLiteSwitchSink:
+    """Writes switches to a SQLite database one at a time as they are parsed. Each
+    switch is committed as soon as `write` is called, so the database is usable (and
+    survives) while a long audit is still running. Supports context management
+
+    Three tables are created if missing:
+
+    * switches - one row per switch
+    * vlans - one row per VLAN defined on a switch
+    * interfaces - one row per interface, columns as listed in `INTERFACE_COLUMNS`
+
+    Args:
+        database_path (str, optional): Path of the SQLite database file. Defaults to
+        'switchport_audit.db'.
+    """
+    def __init__(self, database_path='switchport_audit.db'):
+        self.database_path = database_path
+        self._connection = sqlite3.connect(database_path)
+        self._audited_at = datetime.now().isoformat(timespec='seconds')
+        self._create_tables_if_missing()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _create_tables_if_missing(self):
+        interface_columns = ', '.join(INTERFACE_COLUMNS)
+        self._connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS switches (
+                id INTEGER PRIMARY KEY, audited_at TEXT, hostname TEXT,
+                ip_address TEXT, config_filename TEXT
+            );
+            CREATE TABLE IF NOT EXISTS vlans (switch_id INTEGER, id INTEGER, name TEXT);
+            CREATE TABLE IF NOT EXISTS interfaces (switch_id INTEGER, {interface_columns});
+        """)
+
+    def write(self, switch):
+        """Inserts a switch with its VLANs and interfaces and commits
+
+        Args:
+            switch (object): Switch object
+        """
+        with self._connection:
+            cursor = self._connection.execute(
+                'INSERT INTO switches (audited_at, hostname, ip_address, config_filename) VALUES (?, ?, ?, ?)',
+                (self._audited_at, switch.hostname, switch.ip_address, switch.config_filename)
+            )
+            switch_id = cursor.lastrowid
+
+            self._connection.executemany(
+                'INSERT INTO vlans (switch_id, id, name) VALUES (?, ?, ?)',
+                [(switch_id, vlan.id, vlan.name) for vlan in switch.vlans or []]
+            )
+
+            placeholders = ', '.join('?' * (len(INTERFACE_COLUMNS) + 1))
+            self._connection.executemany(
+                f"INSERT INTO interfaces (switch_id, {', '.join(INTERFACE_COLUMNS)}) VALUES ({placeholders})",
+                [(switch_id, *(_to_sqlite_value(getattr(interface, column)) for column in INTERFACE_COLUMNS))
+                 for interface in switch.interfaces or []]
+            )
+
+    def close(self):
+        """Closes the database connection"""
+        if self._connection is None:
+            return
+
+        self._connection.close()
+        self._connection = None
+        print(f'Switches have been saved to the database: {self.database_path}')
+
+
+def _to_sqlite_value(value):
+    """SQLite only stores str, int, float, bytes and None. Other values (e.g. a
+    VlanRangeSet) are stored as their string representation
+    """
+    if value is None or isinstance(value, (str, int, float, bytes)):
+        return value
+    return str(value)
@@ -0,0 +1,769 @@
+import base64
+import datetime
+import email.utils
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import selectors
+import socket
+import ssl
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import paramiko
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from utilities.config_generator import generate_switch_spec, render_restconf, render_running_config
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# YANG models advertised by the simulated devices' netconf-state/capabilities
+CAPABILITIES = [
+    'urn:ietf:params:netconf:base:1.0',
+    'http://cisco.com/ns/yang/Cisco-IOS-XE-native?module=Cisco-IOS-XE-native&revision=2020-07-04',
+    'http://cisco.com/ns/yang/Cisco-IOS-XE-vlan-oper?module=Cisco-IOS-XE-vlan-oper&revision=2019-05-01',
+]
+
+_RESTCONF_PATHS = {
+    '/restconf/data/netconf-state/capabilities': 'capabilities',
+    '/restconf/data/Cisco-IOS-XE-native:native': 'native',
+    '/restconf/data/Cisco-IOS-XE-vlan-oper:vlans': 'vlans',
+}
+
+# Config files that can be copied over SCP/SFTP, by IOS path
+_CONFIG_FILES = {'system:running-config', 'running-config', 'nvram:startup-config', 'startup-config'}
+
+# Output is written in chunks of this size so bandwidth can be throttled
+_CHUNK_SIZE = 16384
+
+# The server side of each SSH session logs here. Collectors disconnecting abruptly is
+# normal, so it is not printed
+_SSH_LOG_CHANNEL = 'device_simulator.ssh'
+logging.getLogger(_SSH_LOG_CHANNEL).addHandler(logging.NullHandler())
+logging.getLogger(_SSH_LOG_CHANNEL).propagate = False
+
+
+class SimulatedDevice:
+    """One simulated switch of a SimulatedFleet. Serves the configs rendered from its
+    switch spec (see `utilities/config_generator.py`)
+
+    Args:
+        fleet (SimulatedFleet): Fleet the device belongs to
+        spec (dict): Switch spec from `generate_switch_spec`
+    """
+    def __init__(self, fleet, spec):
+        self.fleet = fleet
+        self.spec = spec
+        self.hostname = spec['hostname']
+        self.last_change = fleet.last_change
+        self.modified_at = time.time()
+        self.ssh_port = None
+        self.https_port = None
+        self._payloads = {}
+
+    def payload(self, name):
+        """Returns a rendered payload, rendering it on first use
+
+        Args:
+            name (str): 'running_config', 'config_file', 'capabilities', 'native' or 'vlans'
+
+        Returns:
+            bytes: The payload
+        """
+        payload = self._payloads.get(name)
+        if payload is not None:
+            return payload
+
+        if name == 'running_config':
+            running_config = render_running_config(self.spec, last_change=self.last_change)
+            payload = running_config.replace('\n', '\r\n').encode()
+        elif name == 'config_file':
+            # As copied off the device: without terminal line endings
+            payload = render_running_config(self.spec, last_change=self.last_change).encode()
+        elif name == 'capabilities':
+            payload = json.dumps({'ietf-netconf-monitoring:capabilities': {'capability': CAPABILITIES}}).encode()
+        else:
+            native_config, vlans_config = render_restconf(self.spec, number_of_acl_entries=self.fleet.acl_entries)
+            self._payloads['native'] = json.dumps(native_config).encode()
+            self._payloads['vlans'] = json.dumps(vlans_config).encode()
+            return self._payloads[name]
+
+        self._payloads[name] = payload
+        return payload
+
+    def change_config(self, last_change=None):
+        """Makes a configuration change: the first interface's description changes and
+        the "Last configuration change" header moves on
+
+        Args:
+            last_change (str, optional): New header timestamp. Defaults to now.
+        """
+        self.spec['interfaces'][0]['description'] = f'Changed {time.time():.6f}'
+        self.last_change = last_change or time.strftime('%H:%M:%S UTC %a %b %d %Y', time.gmtime())
+        self.modified_at = time.time()
+        self._payloads = {}
+
+    def validators(self, name):
+        """Returns the ETag and Last-Modified headers of a RESTCONF payload. Both change
+        whenever the config changes
+
+        Args:
+            name (str): 'capabilities', 'native' or 'vlans'
+
+        Returns:
+            dict: Header name to value
+        """
+        return {
+            'ETag': f'"{name}-{int(self.modified_at * 1e6):x}"',
+            'Last-Modified': email.utils.formatdate(self.modified_at, usegmt=True),
+        }
+
+
+class SimulatedFleet:
+    """Starts many simulated Cisco IOS-XE switches on the loopback interface so the
+    collectors can be load tested without touching real devices. Each device listens
+    on its own ports of `address`:
+
+    * SSH (paramiko) - password login to a "HOSTNAME#" prompt (a privilege 15 user, the
+      way the collectors expect to log in) or, with `privileged_login=False`, to a
+      "HOSTNAME>" prompt that needs `enable` (any enable secret unless `enable_secret` is
+      set), `terminal length/width` and `show running-config` (optionally piped through
+      `| include <regex>`). running-config and startup-config can also be copied over
+      SCP (`scp -f system:running-config`) and SFTP
+    * HTTPS (self-signed certificate) - basic auth RESTCONF GETs of
+      netconf-state/capabilities, Cisco-IOS-XE-native:native and
+      Cisco-IOS-XE-vlan-oper:vlans, with ETag/Last-Modified validators and 304 Not
+      Modified answers to conditional GETs (If-None-Match/If-Modified-Since)
+
+    Device behaviour can be degraded:
+
+    * latency is added before every login and command/request answer, plus a random
+      exponentially distributed jitter (averaging `jitter`) for a realistic tail
+    * bandwidth caps each session's output in bytes per second
+    * failure_rate is the share of connections that fail (SSH connections are dropped
+      before the SSH banner, RESTCONF requests get HTTP 503)
+    * auth_failure_rate is the share of logins rejected even with valid credentials,
+      the way an overloaded TACACS+/RADIUS server makes logins fail (HTTP 401 for RESTCONF)
+
+    Args:
+        number_of_devices (int, optional): Devices to start. Defaults to 100.
+        username (str, optional): Login username. Defaults to 'admin'.
+        password (str, optional): Login password. Defaults to 'admin'.
+        privileged_login (bool, optional): Set to False to log in to user EXEC mode.
+        Defaults to True.
+        enable_secret (str, optional): Enable secret. Defaults to None which accepts any.
+        latency (float, optional): Seconds added to every answer. Defaults to 0.05.
+        jitter (float, optional): Average random seconds added on top of latency. Defaults to 0.05.
+        bandwidth (int, optional): Bytes per second per session. Defaults to None (unlimited).
+        failure_rate (float, optional): Share of connections that fail. Defaults to 0.0.
+        auth_failure_rate (float, optional): Share of logins rejected. Defaults to 0.0.
+        interfaces_per_device (int, optional): Interfaces per switch. Defaults to 48.
+        vlans_per_device (int, optional): VLANs per switch. Defaults to 50.
+        acl_entries (int, optional): ACL entries in each RESTCONF native config. Defaults to 100.
+        address (str, optional): Address to listen on. Defaults to '127.0.0.1'.
+        ssh (bool, optional): Set to False to not start SSH servers. Defaults to True.
+        restconf (bool, optional): Set to False to not start RESTCONF servers. Defaults to True.
+        validators (bool, optional): Set to False to leave out ETag/Last-Modified and
+        ignore conditional GETs. Defaults to True.
+        seed (int, optional): Seed for the generated configs and injected faults. Defaults to 0.
+    """
+    last_change = '10:21:41 UTC Mon Oct 19 2026'
+
+    def __init__(self, number_of_devices=100, username='admin', password='admin', privileged_login=True,
+                 enable_secret=None, latency=0.05, jitter=0.05, bandwidth=None, failure_rate=0.0, auth_failure_rate=0.0,
+                 interfaces_per_device=48, vlans_per_device=50, acl_entries=100, address='127.0.0.1',
+                 ssh=True, restconf=True, validators=True, seed=0):
+        self.username = username
+        self.password = password
+        self.privileged_login = privileged_login
+        self.enable_secret = enable_secret
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.auth_failure_rate = auth_failure_rate
+        self.acl_entries = acl_entries
+        self.address = address
+        self.ssh = ssh
+        self.restconf = restconf
+        self.validators = validators
+
+        self._random = random.Random(seed)
+        self.devices = [
+            SimulatedDevice(self, generate_switch_spec(f'SIM{number:05d}', number_of_vlans=vlans_per_device,
+                                                       number_of_interfaces=interfaces_per_device, seed=seed + number))
+            for number in range(number_of_devices)
+        ]
+        self._devices_by_hostname = {device.hostname: device for device in self.devices}
+
+        self.stats = {'connections': 0, 'failures_injected': 0, 'auth_failures_injected': 0, 'bytes_sent': 0,
+                      'not_modified': 0}
+        self._stats_lock = threading.Lock()
+
+        self._listeners = {}
+        self._selector = None
+        self._accept_thread = None
+        self._running = threading.Event()
+        self._host_key = None
+        self._ssl_context = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    def __getitem__(self, hostname):
+        return self._devices_by_hostname[hostname]
+
+    def start(self):
+        """Opens every device's listening sockets and starts accepting connections
+
+        Returns:
+            None
+        """
+        _raise_open_file_limit(len(self.devices) * (int(self.ssh) + int(self.restconf)) + 1024)
+
+        if self.ssh:
+            self._host_key = paramiko.RSAKey.generate(2048)
+        if self.restconf:
+            self._ssl_context = _self_signed_ssl_context(self.address)
+
+        self._selector = selectors.DefaultSelector()
+
+        for device in self.devices:
+            if self.ssh:
+                device.ssh_port = self._listen(device, 'ssh')
+            if self.restconf:
+                device.https_port = self._listen(device, 'https')
+
+        self._running.set()
+        self._accept_thread = threading.Thread(target=self._accept_connections, daemon=True)
+        self._accept_thread.start()
+
+    def _listen(self, device, protocol):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.address, 0))
+        listener.listen(128)
+        listener.setblocking(False)
+        self._selector.register(listener, selectors.EVENT_READ, (device, protocol))
+        self._listeners[listener] = (device, protocol)
+        return listener.getsockname()[1]
+
+    def stop(self):
+        """Stops accepting connections and closes the listening sockets. Sessions in
+        progress are left to finish
+
+        Returns:
+            None
+        """
+        self._running.clear()
+        if self._accept_thread is not None:
+            self._accept_thread.join()
+            self._accept_thread = None
+
+        for listener in self._listeners:
+            self._selector.unregister(listener)
+            listener.close()
+        self._listeners = {}
+
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+
+    def endpoints(self):
+        """Returns where each device listens
+
+        Returns:
+            dict: hostname to (address, SSH port, HTTPS port)
+        """
+        return {device.hostname: (self.address, device.ssh_port, device.https_port) for device in self.devices}
+
+    def _accept_connections(self):
+        """Accept thread. One thread accepts for every device; each connection is then
+        served by a thread of its own"""
+        while self._running.is_set():
+            for key, _ in self._selector.select(timeout=0.1):
+                try:
+                    connection, _ = key.fileobj.accept()
+                except (BlockingIOError, InterruptedError):
+                    continue
+
+                device, protocol = key.data
+                connection.setblocking(True)
+                serve = self._serve_ssh if protocol == 'ssh' else self._serve_https
+                threading.Thread(target=serve, args=(device, connection), daemon=True).start()
+
+    def _count(self, stat, value=1):
+        with self._stats_lock:
+            self.stats[stat] += value
+
+    def _chance(self, rate):
+        return rate > 0 and self._random.random() < rate
+
+    def _delay(self):
+        """Sleeps for the configured latency plus jitter"""
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.expovariate(1 / self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _login_allowed(self, username, password):
+        self._delay()
+        if self._chance(self.auth_failure_rate):
+            self._count('auth_failures_injected')
+            return False
+        return username == self.username and password == self.password
+
+    def _send_throttled(self, send, payload):
+        """Sends a payload in chunks, sleeping between chunks when bandwidth is capped"""
+        for start in range(0, len(payload), _CHUNK_SIZE):
+            chunk = payload[start:start + _CHUNK_SIZE]
+            send(chunk)
+            if self.bandwidth:
+                time.sleep(len(chunk) / self.bandwidth)
+        self._count('bytes_sent', len(payload))
+
+    def _serve_ssh(self, device, connection):
+        """Connection thread of an SSH session"""
+        self._count('connections')
+
+        if self._chance(self.failure_rate):
+            self._count('failures_injected')
+            connection.close()
+            return
+
+        fleet = self
+        session_requested = threading.Event()
+        requests = {}
+
+        class SSHServer(paramiko.ServerInterface):
+            def get_allowed_auths(self, username):
+                return 'password'
+
+            def check_auth_password(self, username, password):
+                if fleet._login_allowed(username, password):
+                    return paramiko.AUTH_SUCCESSFUL
+                return paramiko.AUTH_FAILED
+
+            def check_channel_request(self, kind, chanid):
+                if kind == 'session':
+                    return paramiko.OPEN_SUCCEEDED
+                return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+            def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+                return True
+
+            def check_channel_shell_request(self, channel):
+                requests['shell'] = True
+                session_requested.set()
+                return True
+
+            def check_channel_exec_request(self, channel, command):
+                program, _, path = command.decode(errors='replace').partition(' -f ')
+                if program.strip() != 'scp':
+                    return False
+                requests['scp'] = path.strip()
+                session_requested.set()
+                return True
+
+            def check_channel_subsystem_request(self, channel, name):
+                if not super().check_channel_subsystem_request(channel, name):
+                    return False
+                requests['sftp'] = True
+                session_requested.set()
+                return True
+
+        transport = paramiko.Transport(connection)
+        transport.set_log_channel(_SSH_LOG_CHANNEL)
+        transport.add_server_key(self._host_key)
+        transport.set_subsystem_handler('sftp', paramiko.SFTPServer, _SimulatedSFTPServer, fleet, device)
+
+        try:
+            transport.start_server(server=SSHServer())
+            channel = transport.accept(timeout=30)
+            if channel is None or not session_requested.wait(timeout=30):
+                return
+            if 'shell' in requests:
+                self._run_shell(device, channel)
+            elif 'scp' in requests:
+                self._run_scp(device, channel, requests['scp'])
+            else:
+                # paramiko runs the SFTP server in its own thread until the client is done
+                while transport.is_active() and not channel.closed:
+                    time.sleep(0.05)
+                return
+            # Like a real device, let the client close the connection after "exit"
+            channel.send_exit_status(0)
+            channel.close()
+            deadline = time.monotonic() + 5
+            while transport.is_active() and time.monotonic() < deadline:
+                time.sleep(0.05)
+        except (paramiko.SSHException, EOFError, OSError):
+            pass
+        finally:
+            transport.close()
+
+    def _run_shell(self, device, channel):
+        """Answers the IOS commands netmiko sends until the session exits"""
+        privileged = self.privileged_login
+        awaiting_secret = False
+        buffer = b''
+
+        def prompt():
+            return f"\r\n{device.hostname}{'#' if privileged else '>'}".encode()
+
+        channel.sendall(prompt())
+
+        while True:
+            data = channel.recv(4096)
+            if not data:
+                return
+            buffer += data
+
+            while b'\n' in buffer or b'\r' in buffer:
+                line, buffer = _split_line(buffer)
+                command = line.decode(errors='replace').strip()
+
+                if awaiting_secret:
+                    # Enable secrets are not echoed
+                    awaiting_secret = False
+                    if self.enable_secret is None or command == self.enable_secret:
+                        privileged = True
+                        channel.sendall(prompt())
+                    else:
+                        channel.sendall(b'\r\n% Access denied\r\n' + prompt())
+                    continue
+
+                channel.sendall(line + b'\r\n')
+
+                if command in ('exit', 'logout', 'quit'):
+                    return
+
+                if command == '':
+                    channel.sendall(prompt())
+
+                elif command == 'enable':
+                    if privileged:
+                        channel.sendall(prompt())
+                    else:
+                        awaiting_secret = True
+                        channel.sendall(b'Password: ')
+
+                elif command.startswith(('terminal length', 'terminal width')):
+                    channel.sendall(prompt())
+
+                elif privileged and command.partition('|')[0].strip() in ('show running-config', 'show run', 'sh run'):
+                    self._delay()
+                    self._send_throttled(channel.sendall, _filter_output(device.payload('running_config'),
+                                                                         command.partition('|')[2].strip()))
+                    channel.sendall(prompt())
+
+                else:
+                    channel.sendall(b"                   ^\r\n% Invalid input detected at '^' marker.\r\n" + prompt())
+
+    def _run_scp(self, device, channel, path):
+        """Sends a config file with the SCP source ("scp -f") protocol"""
+        if path not in _CONFIG_FILES or not self.privileged_login:
+            channel.sendall(f'\x01scp: {path}: Permission denied or no such file\n'.encode())
+            return
+
+        self._delay()
+        payload = device.payload('config_file')
+        if channel.recv(1) != b'\0':
+            return
+        channel.sendall(f"C0644 {len(payload)} {path.rpartition(':')[2]}\n".encode())
+        if channel.recv(1) != b'\0':
+            return
+        self._send_throttled(channel.sendall, payload)
+        channel.sendall(b'\0')
+        channel.recv(1)
+
+    def _serve_https(self, device, connection):
+        """Connection thread of an HTTPS connection"""
+        self._count('connections')
+        fleet = self
+
+        try:
+            connection = self._ssl_context.wrap_socket(connection, server_side=True)
+        except (ssl.SSLError, OSError):
+            connection.close()
+            return
+
+        class RestconfHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if fleet._chance(fleet.failure_rate):
+                    fleet._count('failures_injected')
+                    fleet._delay()
+                    self._respond(503, b'')
+                    return
+
+                if not fleet._login_allowed(*_basic_auth(self.headers.get('Authorization'))):
+                    self._respond(401, b'', {'WWW-Authenticate': 'Basic realm="restconf"'})
+                    return
+
+                name = _RESTCONF_PATHS.get(self.path.split('?')[0].rstrip('/'))
+                if name is None:
+                    self._respond(404, b'')
+                    return
+
+                if not fleet.validators:
+                    self._respond(200, device.payload(name), {'Content-Type': 'application/yang-data+json'})
+                    return
+
+                validators = device.validators(name)
+                if self._not_modified(validators):
+                    fleet._count('not_modified')
+                    self._respond(304, b'', validators)
+                    return
+
+                self._respond(200, device.payload(name), {'Content-Type': 'application/yang-data+json', **validators})
+
+            def _not_modified(self, validators):
+                # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+                if_none_match = self.headers.get('If-None-Match')
+                if if_none_match is not None:
+                    return validators['ETag'] in [tag.strip() for tag in if_none_match.split(',')]
+
+                if_modified_since = self.headers.get('If-Modified-Since')
+                if if_modified_since is None:
+                    return False
+                try:
+                    since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+                except (TypeError, ValueError):
+                    return False
+                return int(device.modified_at) <= since
+
+            def _respond(self, status_code, body, headers=None):
+                self.send_response(status_code)
+                for header, value in (headers or {}).items():
+                    self.send_header(header, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                fleet._send_throttled(self.wfile.write, body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            RestconfHandler(connection, connection.getpeername(), None)
+        except (ssl.SSLError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    def print_summary(self):
+        """Prints the connections served and faults injected
+
+        Returns:
+            None
+        """
+        print(f"Simulated fleet - Devices: {len(self.devices)} | Connections: {self.stats['connections']} "
+              f"| Failures injected: {self.stats['failures_injected']} "
+              f"| Auth failures injected: {self.stats['auth_failures_injected']} "
+              f"| Not modified (304): {self.stats['not_modified']} "
+              f"| MB sent: {self.stats['bytes_sent'] / 1e6:.1f}")
+
+
+class _SimulatedSFTPServer(paramiko.SFTPServerInterface):
+    """Read-only SFTP server of a simulated device's config files"""
+    def __init__(self, server, fleet, device):
+        super().__init__(server)
+        self.fleet = fleet
+        self.device = device
+
+    def _attributes(self, path):
+        if path.lstrip('/') not in _CONFIG_FILES or not self.fleet.privileged_login:
+            return None
+        attributes = paramiko.SFTPAttributes()
+        attributes.st_size = len(self.device.payload('config_file'))
+        attributes.st_mode = 0o100444
+        attributes.st_mtime = int(self.device.modified_at)
+        attributes.filename = path.lstrip('/').rpartition(':')[2]
+        return attributes
+
+    def stat(self, path):
+        return self._attributes(path) or paramiko.SFTP_NO_SUCH_FILE
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        if flags & (os.O_WRONLY | os.O_RDWR):
+            return paramiko.SFTP_PERMISSION_DENIED
+        if self._attributes(path) is None:
+            return paramiko.SFTP_NO_SUCH_FILE
+
+        self.fleet._delay()
+        handle = _ConfigFileHandle(self.fleet, self.device.payload('config_file'))
+        handle.filename = path
+        return handle
+
+
+class _ConfigFileHandle(paramiko.SFTPHandle):
+    def __init__(self, fleet, payload):
+        super().__init__()
+        self.fleet = fleet
+        self.payload = payload
+
+    def read(self, offset, length):
+        chunk = self.payload[offset:offset + length]
+        if self.fleet.bandwidth:
+            time.sleep(len(chunk) / self.fleet.bandwidth)
+        self.fleet._count('bytes_sent', len(chunk))
+        return chunk
+
+    def stat(self):
+        attributes = paramiko.SFTPAttributes()
+        attributes.st_size = len(self.payload)
+        return attributes
+
+
+def _split_line(buffer):
+    """Splits the first line off a buffer of received bytes. Handles \\r, \\n and \\r\\n"""
+    for position, byte in enumerate(buffer):
+        if byte in b'\r\n':
+            end = position + 1
+            if byte == ord('\r') and buffer[end:end + 1] == b'\n':
+                end += 1
+            return buffer[:position], buffer[end:]
+    return buffer, b''
+
+
+def _filter_output(output, pipe):
+    """Applies an IOS output filter (`include <regex>`) to command output"""
+    if not pipe:
+        return output
+    keyword, _, pattern = pipe.partition(' ')
+    if not 'include'.startswith(keyword) or not keyword.startswith('i'):
+        return output
+    regex = re.compile(pattern.strip().encode())
+    return b''.join(line for line in output.splitlines(keepends=True) if regex.search(line))
+
+
+def _basic_auth(header):
+    """Returns (username, password) from an HTTP basic Authorization header"""
+    if not header or not header.startswith('Basic '):
+        return None, None
+    try:
+        username, _, password = base64.b64decode(header[6:]).decode().partition(':')
+    except ValueError:
+        return None, None
+    return username, password
+
+
+def _self_signed_ssl_context(address):
+    """Returns a server SSLContext with a newly generated self-signed certificate"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'simulated-switch')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=365))
+        .sign(key, hashes.SHA256())
+    )
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    # load_cert_chain only reads files
+    with tempfile.TemporaryDirectory() as directory:
+        certificate_path = os.path.join(directory, 'certificate.pem')
+        key_path = os.path.join(directory, 'key.pem')
+        with open(certificate_path, 'wb') as certificate_file:
+            certificate_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+        with open(key_path, 'wb') as key_file:
+            key_file.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                             serialization.NoEncryption()))
+        context.load_cert_chain(certificate_path, key_path)
+    return context
+
+
+def _raise_open_file_limit(needed):
+    """Raises the soft limit of open files (256 by default on macOS) towards the hard
+    limit, since every device holds listening sockets open"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def _run_fleet(fleet_arguments, connection, stop_event):
+    fleet = SimulatedFleet(**fleet_arguments)
+    fleet.start()
+    connection.send(fleet.endpoints())
+    stop_event.wait()
+    connection.send(fleet.stats)
+    fleet.stop()
+
+
+class FleetProcess:
+    """Runs a SimulatedFleet in a separate process, so the devices' SSH/TLS work does
+    not compete with the collectors being measured for the same interpreter. Use as a
+    context manager
+
+    Args:
+        **fleet_arguments: Arguments of SimulatedFleet
+    """
+    def __init__(self, **fleet_arguments):
+        self._fleet_arguments = fleet_arguments
+        self._process = None
+        self._connection = None
+        self._stop_event = None
+        self.endpoints = None
+        self.stats = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    def start(self):
+        """Starts the fleet and waits until every device is listening
+
+        Returns:
+            dict: hostname to (address, SSH port, HTTPS port)
+        """
+        self._connection, child_connection = multiprocessing.Pipe()
+        self._stop_event = multiprocessing.Event()
+        self._process = multiprocessing.Process(target=_run_fleet, daemon=True,
+                                                args=(self._fleet_arguments, child_connection, self._stop_event))
+        self._process.start()
+        self.endpoints = self._connection.recv()
+        return self.endpoints
+
+    def stop(self):
+        """Stops the fleet and keeps its stats
+
+        Returns:
+            None
+        """
+        if self._process is None:
+            return
+        self._stop_event.set()
+        if self._connection.poll(30):
+            self.stats = self._connection.recv()
+        self._process.join(timeout=30)
+        self._process = None
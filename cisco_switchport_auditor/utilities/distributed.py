@@ -0,0 +1,391 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from utilities.pipeline import SwitchPipeline, _available_cpus
+from utilities.serialization import switch_from_dict, switch_to_dict
+
+# Coordinator and workers exchange one JSON object per line over TCP:
+#
+# worker -> coordinator                          coordinator -> worker
+# {"type": "hello", "worker": name, "token": t}  {"type": "welcome"} or {"type": "rejected", "reason": r}
+# {"type": "request", "count": n}                {"type": "hosts", "hosts": [...]}, {"type": "wait", "seconds": s}
+#                                                or {"type": "done"}
+# {"type": "result", "host": h, "switch": {...}} (no reply)
+# {"type": "failed", "host": h, "error": e}      (no reply)
+
+DEFAULT_PORT = 9700
+
+
+def _send_message(file, message):
+    file.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+    file.flush()
+
+
+def _read_message(file):
+    line = file.readline()
+    if not line:
+        raise ConnectionError('connection closed')
+    return json.loads(line)
+
+
+class AuditCoordinator:
+    """Hands hosts out to AuditWorkers and gathers their results. Workers pull up to
+    `shard_size` hosts at a time, so fast workers (or workers close to their switches)
+    end up auditing more hosts.
+
+    Each host handed out is leased to that worker. If the worker disconnects (it died,
+    or lost its network) or does not return a result within `lease_timeout`, the host is
+    put back in the queue for another worker. A host is given up on after being leased
+    `max_attempts` times. Collection/parsing failures reported by a worker are final.
+
+    Args:
+        list_of_hosts (list): list of hostnames or IP addresses
+        address (str, optional): Address to listen on. Set to '0.0.0.0' for workers on
+        other machines. Defaults to '127.0.0.1'.
+        port (int, optional): TCP port to listen on. Set to 0 for any free port. Defaults to 9700.
+        shard_size (int, optional): Maximum hosts handed to a worker per request. Defaults to 8.
+        lease_timeout (float, optional): Seconds a worker has to return a host's result.
+        Defaults to 900.
+        max_attempts (int, optional): Times a host is leased before it is given up on.
+        Defaults to 3.
+        token (str, optional): Shared secret workers must present. Defaults to None (no check).
+    """
+    def __init__(self, list_of_hosts, address='127.0.0.1', port=DEFAULT_PORT, shard_size=8, lease_timeout=900,
+                 max_attempts=3, token=None):
+        self.list_of_hosts = list(list_of_hosts)
+        self.address = address
+        self.port = port
+        self.shard_size = shard_size
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.token = token
+
+        self._pending = list(reversed(self.list_of_hosts))
+        self._leases = {}
+        self._attempts = {host: 0 for host in self.list_of_hosts}
+        self._results = {}
+        self.failures = {}
+        self.worker_stats = {}
+
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._server = None
+        self._start_time = None
+
+    def start(self):
+        """Starts accepting workers in a background thread
+
+        Returns:
+            tuple: (address, port) the coordinator is listening on
+        """
+        coordinator = self
+
+        class WorkerHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                coordinator._handle_worker(self.rfile, self.wfile, self.client_address)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((self.address, self.port), WorkerHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._start_time = time.perf_counter()
+
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f'Coordinator waiting for workers on {self.address}:{self.port} ({len(self.list_of_hosts)} hosts)')
+
+        return self.address, self.port
+
+    def stop(self):
+        """Stops accepting workers"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def is_finished(self):
+        """bool: True once every host has a result or has failed"""
+        with self._lock:
+            return self._is_finished()
+
+    def _is_finished(self):
+        return len(self._results) + len(self.failures) == len(self.list_of_hosts)
+
+    def wait(self, timeout=None):
+        """Blocks until every host has a result or has failed
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait. Defaults to None (no limit).
+
+        Returns:
+            bool: True if finished, False if the timeout was reached
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._finished:
+            while not self._is_finished():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Wake up periodically so expired leases are requeued even if no worker asks
+                self._finished.wait(timeout=1.0 if remaining is None else min(1.0, remaining))
+                self._expire_leases()
+
+        return True
+
+    def results(self):
+        """Returns the Switch objects received so far in the order of list_of_hosts.
+        Switches are rebuilt from the workers' results, without raw configs
+
+        Returns:
+            list: list of Switch objects
+        """
+        with self._lock:
+            return [switch_from_dict(self._results[host]) for host in self.list_of_hosts if host in self._results]
+
+    def _handle_worker(self, rfile, wfile, client_address):
+        """Runs for the lifetime of one worker connection. Any hosts still leased to the
+        worker when the connection ends are requeued
+        """
+        worker = None
+        leased = set()
+
+        try:
+            hello = _read_message(rfile)
+            if hello.get('type') != 'hello' or (self.token is not None and hello.get('token') != self.token):
+                _send_message(wfile, {'type': 'rejected', 'reason': 'invalid hello or token'})
+                return
+
+            worker = f"{hello.get('worker')}@{client_address[0]}:{client_address[1]}"
+            with self._lock:
+                self.worker_stats[worker] = {'results': 0, 'failed': 0, 'connected': True}
+            _send_message(wfile, {'type': 'welcome'})
+
+            while True:
+                message = _read_message(rfile)
+                message_type = message.get('type')
+
+                if message_type == 'request':
+                    _send_message(wfile, self._lease_hosts(worker, leased, message.get('count', 1)))
+                elif message_type == 'result':
+                    self._complete(worker, leased, message['host'], switch_dict=message['switch'])
+                elif message_type == 'failed':
+                    self._complete(worker, leased, message['host'], error=message.get('error'))
+
+        except (ConnectionError, OSError, ValueError):
+            pass
+
+        finally:
+            if worker is not None:
+                self._requeue(worker, leased)
+
+    def _lease_hosts(self, worker, leased, count):
+        with self._lock:
+            self._expire_leases()
+
+            if self._is_finished():
+                return {'type': 'done'}
+
+            hosts = []
+            deadline = time.monotonic() + self.lease_timeout
+
+            while self._pending and len(hosts) < min(count, self.shard_size):
+                host = self._pending.pop()
+                if host in self._results or host in self.failures:
+                    continue
+                self._attempts[host] += 1
+                self._leases[host] = (worker, deadline)
+                leased.add(host)
+                hosts.append(host)
+
+            if not hosts:
+                # Everything left is leased to other workers; one of them may still die
+                return {'type': 'wait', 'seconds': 1}
+
+            return {'type': 'hosts', 'hosts': hosts}
+
+    def _complete(self, worker, leased, host, switch_dict=None, error=None):
+        with self._lock:
+            leased.discard(host)
+            if self._leases.get(host, (None,))[0] == worker:
+                del self._leases[host]
+
+            # A host whose lease expired can be returned by two workers. The first wins
+            if host in self._results or host in self.failures or host not in self._attempts:
+                return
+
+            if switch_dict is not None:
+                self._results[host] = switch_dict
+                self.worker_stats[worker]['results'] += 1
+            else:
+                self.failures[host] = error
+                self.worker_stats[worker]['failed'] += 1
+
+            self._finished.notify_all()
+
+    def _requeue(self, worker, leased):
+        with self._lock:
+            self.worker_stats[worker]['connected'] = False
+            requeued = [host for host in leased if self._leases.get(host, (None,))[0] == worker]
+
+            for host in requeued:
+                del self._leases[host]
+                self._return_to_queue(host, f'worker {worker} disconnected')
+
+            if requeued:
+                print(f'Worker {worker} disconnected with {len(requeued)} hosts unfinished. Reassigning them')
+
+            self._finished.notify_all()
+
+    def _expire_leases(self):
+        """Requeues hosts whose lease has run out. Must be called with the lock held"""
+        now = time.monotonic()
+
+        for host, (worker, deadline) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[host]
+                print(f'Lease of {host} to worker {worker} expired. Reassigning it')
+                self._return_to_queue(host, f'lease to worker {worker} expired')
+
+        if self._is_finished():
+            self._finished.notify_all()
+
+    def _return_to_queue(self, host, reason):
+        if host in self._results or host in self.failures:
+            return
+        if self._attempts[host] >= self.max_attempts:
+            self.failures[host] = f'given up after {self._attempts[host]} attempts ({reason})'
+        else:
+            self._pending.append(host)
+
+    def print_summary(self):
+        """Prints how many hosts each worker audited and which hosts failed
+
+        Returns:
+            None
+        """
+        with self._lock:
+            elapsed = time.perf_counter() - self._start_time if self._start_time else 0.0
+            print(f'Coordinator - {len(self._results)} switches audited, {len(self.failures)} failed in {elapsed:.1f}s')
+            print(f"{'Worker':<40}{'Results':>9}{'Failed':>8}{'Connected':>11}")
+            for worker, stats in self.worker_stats.items():
+                print(f"{worker:<40}{stats['results']:>9}{stats['failed']:>8}{str(stats['connected']):>11}")
+            for host, error in self.failures.items():
+                print(f'Failed - {host}: {error}')
+
+
+class AuditWorker:
+    """Pulls hosts from an AuditCoordinator, collects them with a pool of threads,
+    parses them with a pool of processes and streams each Switch back as soon as it is
+    parsed (as `switch_to_dict` output, without raw configs). Runs until the coordinator
+    has no hosts left.
+
+    Args:
+        coordinator_address (str): Hostname or IP address of the coordinator
+        collect_function (function): Called as collect_function(host). Returns the raw
+        config of the host (see `utilities/collectors.py`)
+        parse_function (function): Called as parse_function(host, raw_config) in a parser
+        process. Returns a Switch object
+        coordinator_port (int, optional): Coordinator TCP port. Defaults to 9700.
+        collector_workers (int, optional): Hosts collected at the same time. Defaults to 8.
+        parser_workers (int, optional): Parser processes. Defaults to the number of CPUs.
+        name (str, optional): Name reported to the coordinator. Defaults to this machine's
+        hostname and a random suffix.
+        token (str, optional): Shared secret expected by the coordinator. Defaults to None.
+    """
+    def __init__(self, coordinator_address, collect_function, parse_function, coordinator_port=DEFAULT_PORT,
+                 collector_workers=8, parser_workers=None, name=None, token=None):
+        self.coordinator_address = coordinator_address
+        self.coordinator_port = coordinator_port
+        self._collect_function = collect_function
+        self._parse_function = parse_function
+        self.collector_workers = collector_workers
+        self.parser_workers = parser_workers or _available_cpus()
+        self.name = name or f'{socket.gethostname()}-{uuid.uuid4().hex[:6]}'
+        self.token = token
+
+        self._send_lock = threading.Lock()
+        self.audited = 0
+        self.failed = 0
+
+    def run(self):
+        """Connects to the coordinator and audits hosts until none are left
+
+        Returns:
+            int: Number of hosts this worker audited successfully
+        """
+        parser_pool = ProcessPoolExecutor(max_workers=self.parser_workers)
+        SwitchPipeline._start_parser_processes(parser_pool)
+        collector_pool = ThreadPoolExecutor(max_workers=self.collector_workers)
+        free_slots = threading.BoundedSemaphore(self.collector_workers)
+
+        with socket.create_connection((self.coordinator_address, self.coordinator_port)) as connection:
+            rfile = connection.makefile('rb')
+            wfile = connection.makefile('wb')
+
+            try:
+                self._send(wfile, {'type': 'hello', 'worker': self.name, 'token': self.token})
+                reply = _read_message(rfile)
+                if reply['type'] != 'welcome':
+                    print(f"Coordinator rejected worker {self.name}: {reply.get('reason')}")
+                    return 0
+
+                while True:
+                    free_slots.acquire()
+                    count = 1
+                    while count < self.collector_workers and free_slots.acquire(blocking=False):
+                        count += 1
+
+                    self._send(wfile, {'type': 'request', 'count': count})
+                    reply = _read_message(rfile)
+                    hosts = reply.get('hosts', []) if reply['type'] == 'hosts' else []
+
+                    for _ in range(count - len(hosts)):
+                        free_slots.release()
+
+                    for host in hosts:
+                        collector_pool.submit(self._audit_host, host, parser_pool, wfile, free_slots)
+
+                    if reply['type'] == 'done':
+                        break
+                    if reply['type'] == 'wait':
+                        time.sleep(reply['seconds'])
+
+            finally:
+                collector_pool.shutdown(wait=True)
+                parser_pool.shutdown(wait=True)
+
+        print(f'Worker {self.name} finished - {self.audited} switches audited, {self.failed} failed')
+        return self.audited
+
+    def _send(self, wfile, message):
+        with self._send_lock:
+            _send_message(wfile, message)
+
+    def _audit_host(self, host, parser_pool, wfile, free_slots):
+        """Collector thread task. Collects and parses one host and sends the result"""
+        try:
+            raw_config = self._collect_function(host)
+            if raw_config is None:
+                raise RuntimeError('no configuration was returned')
+            switch = parser_pool.submit(self._parse_function, host, raw_config).result()
+            message = {'type': 'result', 'host': host, 'switch': switch_to_dict(switch)}
+        except Exception as e:
+            print(f"Audit of {host} failed ({type(e).__name__}: {e})")
+            message = {'type': 'failed', 'host': host, 'error': f"{type(e).__name__}: {e}"}
+        finally:
+            free_slots.release()
+
+        try:
+            with self._send_lock:
+                _send_message(wfile, message)
+                if message['type'] == 'result':
+                    self.audited += 1
+                else:
+                    self.failed += 1
+        except OSError:
+            # The coordinator is gone; it requeues this host for another worker
+            pass
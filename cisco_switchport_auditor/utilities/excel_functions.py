@@ -1,6 +1,9 @@
 import pandas as pd
 from datetime import datetime
 
+from models.interface_table import InterfaceTable
+from utilities.compliance_summary import summarise_compliance, summary_filename, write_compliance_summary
+
 def set_df_name(df, switch):
     """Gives a pandas DF a df_name attribute and names it
     after the switch's hostname
@@ -47,7 +50,7 @@ def write_dfs_to_excel_sheets(list_of_switch_specific_interface_dfs):
         list_of_switch_specific_interface_dfs (list): A list of pandas DataFrames
 
     Returns:
-        None
+        str: Name of the excel file
     """    
 
     now = datetime.now().strftime("%Y-%m-%d--%H-%M-%S")
@@ -56,6 +59,68 @@ def write_dfs_to_excel_sheets(list_of_switch_specific_interface_dfs):
         if df.df_name is None:
             continue
         df.to_excel(writer, sheet_name=df.df_name, index=False)
-    writer.save()
+    writer.close()
     print(f'An excel file ({now}__switchport_audit.xlsx) has been saved')
+    return f'{now}__switchport_audit.xlsx'
+
+
+class ExcelSwitchSink:
+    """Writes switches to an excel file one at a time as they are parsed, rather than
+    building every DataFrame first. Each switch's interfaces are written to a sheet named
+    after the switch's hostname as soon as `write` is called, matching the layout of
+    `write_dfs_to_excel_sheets`. Supports context management
+
+    With include_summary set, each switch's interfaces are also added to an
+    InterfaceTable and the compliance summary (see `utilities/compliance_summary.py`)
+    is written next to the excel file when the sink is closed.
+
+    Args:
+        filename (str, optional): Name of the excel file. Defaults to the current date
+        and time (e.g. 2022-01-01--13-00-00__switchport_audit.xlsx).
+        include_summary (bool, optional): Set to False to skip the compliance summary.
+        Defaults to True.
+        site_of (dict, function, optional): See `summarise_compliance`. Defaults to None.
+    """
+    def __init__(self, filename=None, include_summary=True, site_of=None):
+        now = datetime.now().strftime("%Y-%m-%d--%H-%M-%S")
+        self.filename = filename or f'{now}__switchport_audit.xlsx'
+        self.site_of = site_of
+        self._writer = pd.ExcelWriter(self.filename, engine='xlsxwriter')
+        self._summary_table = InterfaceTable() if include_summary else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def write(self, switch):
+        """Writes a switch's interfaces to a new excel sheet. Switches without a
+        hostname are skipped
+
+        Args:
+            switch (object): Switch object
+        """
+        if switch.hostname is None:
+            return
+
+        df = pd.DataFrame([interface.__dict__ for interface in switch.interfaces])
+        df.to_excel(self._writer, sheet_name=switch.hostname, index=False)
+
+        if self._summary_table is not None:
+            self._summary_table.add_switch(switch)
+
+    def close(self):
+        """Finishes writing the excel file (and the compliance summary) to the working
+        directory"""
+        if self._writer is None:
+            return
+
+        self._writer.close()
+        self._writer = None
+        print(f'An excel file ({self.filename}) has been saved')
 
+        if self._summary_table is not None:
+            summary = summarise_compliance(self._summary_table, site_of=self.site_of)
+            write_compliance_summary(summary, summary_filename(self.filename))
+            self._summary_table = None
@@ -0,0 +1,188 @@
+import heapq
+import sqlite3
+import statistics
+import threading
+
+
+class DurationHistory:
+    """Per-host collection and parse durations kept in a SQLite file between runs, used
+    by SwitchPipeline to start the longest hosts first. Supports context management
+
+    Hosts are otherwise collected in the order given, so a large stack that happens to
+    be near the end of the list starts last and the run waits on it after every other
+    host is done. Starting the longest hosts first (LPT scheduling) lets the short ones
+    fill in around them.
+
+    A host's expected duration is the moving average of its collect + parse seconds
+    over earlier runs. A host with no history is estimated from its size in host_sizes
+    (e.g. port counts from an inventory), at the seconds per interface measured on the
+    hosts with history. Without a size it is given the median duration, so it is
+    neither started first nor last. Without any history the order is unchanged.
+
+    Only the order hosts are started in changes. Results are still returned in the
+    order of list_of_hosts.
+
+    Args:
+        history_path (str, optional): Path of the SQLite file. Defaults to 'host_durations.db'.
+        host_sizes (dict, optional): host to number of interfaces, used to estimate hosts
+        with no history. Defaults to None.
+        smoothing (float, optional): Weight of the newest measurement in the moving
+        average, from 0 to 1. Defaults to 0.5.
+    """
+    def __init__(self, history_path='host_durations.db', host_sizes=None, smoothing=0.5):
+        self.history_path = history_path
+        self.host_sizes = host_sizes or {}
+        self.smoothing = smoothing
+        self._connection = sqlite3.connect(history_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS hosts (
+                host TEXT PRIMARY KEY, collect_seconds REAL, parse_seconds REAL, interfaces INTEGER
+            )
+        """)
+
+        self._run_hosts = []
+        self._run_order = []
+        self._run_workers = 1
+        self._run_durations = {}
+        self._run_without_history = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def estimates(self, list_of_hosts):
+        """Returns the expected collect + parse seconds of each host
+
+        Args:
+            list_of_hosts (list): list of hostnames, IP addresses or config filenames
+
+        Returns:
+            dict: host to seconds, or None for hosts with no history or size
+        """
+        rows = self._history()
+        history = {host: seconds for host, seconds, _ in rows}
+        sized = [(seconds, interfaces) for _, seconds, interfaces in rows if interfaces]
+        seconds_per_interface = (sum(seconds for seconds, _ in sized) / sum(interfaces for _, interfaces in sized)
+                                 if sized else None)
+
+        estimates = {}
+        for host in list_of_hosts:
+            if host in history:
+                estimates[host] = history[host]
+            elif seconds_per_interface is not None and self.host_sizes.get(host):
+                estimates[host] = seconds_per_interface * self.host_sizes[host]
+            else:
+                estimates[host] = None
+        return estimates
+
+    def _history(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT host, COALESCE(collect_seconds, 0) + COALESCE(parse_seconds, 0), interfaces FROM hosts'
+            ).fetchall()
+
+    def longest_first(self, list_of_hosts, workers=1):
+        """Returns the positions of list_of_hosts ordered by expected duration, longest
+        first. Hosts with the same estimate keep their order
+
+        Args:
+            list_of_hosts (list): list of hostnames, IP addresses or config filenames
+            workers (int, optional): Number of collector workers, for the makespan
+            report of `print_summary`. Defaults to 1.
+
+        Returns:
+            list: Indexes into list_of_hosts
+        """
+        estimates = self.estimates(list_of_hosts)
+        known = [seconds for seconds in estimates.values() if seconds is not None]
+        default = statistics.median(known) if known else 0.0
+
+        seconds = [estimates[host] if estimates[host] is not None else default for host in list_of_hosts]
+        order = sorted(range(len(list_of_hosts)), key=lambda index: -seconds[index])
+
+        hosts_with_history = {host for host, _, _ in self._history()}
+
+        with self._lock:
+            self._run_hosts = list(list_of_hosts)
+            self._run_order = [list_of_hosts[index] for index in order]
+            self._run_workers = workers
+            self._run_durations = {}
+            self._run_without_history = sum(1 for host in list_of_hosts if host not in hosts_with_history)
+
+        return order
+
+    def record(self, host, collect_seconds=None, parse_seconds=None, interfaces=None):
+        """Adds a measurement of a host to its moving average
+
+        Args:
+            host (str): Hostname, IP address or config filename
+            collect_seconds (float, optional): Seconds collection took. Defaults to None.
+            parse_seconds (float, optional): Seconds parsing took. Defaults to None.
+            interfaces (int, optional): Number of interfaces of the parsed switch. Defaults to None.
+        """
+        weight = self.smoothing
+
+        with self._lock, self._connection:
+            self._connection.execute("""
+                INSERT INTO hosts (host, collect_seconds, parse_seconds, interfaces) VALUES (?, ?, ?, ?)
+                ON CONFLICT (host) DO UPDATE SET
+                    collect_seconds = CASE WHEN excluded.collect_seconds IS NULL THEN collect_seconds
+                        WHEN collect_seconds IS NULL THEN excluded.collect_seconds
+                        ELSE ? * excluded.collect_seconds + (1 - ?) * collect_seconds END,
+                    parse_seconds = CASE WHEN excluded.parse_seconds IS NULL THEN parse_seconds
+                        WHEN parse_seconds IS NULL THEN excluded.parse_seconds
+                        ELSE ? * excluded.parse_seconds + (1 - ?) * parse_seconds END,
+                    interfaces = COALESCE(excluded.interfaces, interfaces)
+            """, (host, collect_seconds, parse_seconds, interfaces, weight, weight, weight, weight))
+
+            self._run_durations[host] = (self._run_durations.get(host, 0.0) + (collect_seconds or 0.0)
+                                         + (parse_seconds or 0.0))
+
+    def makespans(self):
+        """Returns how long the last run's hosts take with its collector workers when
+        started in the order given and longest first, using the durations measured in
+        the run
+
+        Returns:
+            tuple: (seconds in the order given, seconds longest first), simulated
+        """
+        with self._lock:
+            durations = dict(self._run_durations)
+            input_order = [host for host in self._run_hosts if host in durations]
+            scheduled = [host for host in self._run_order if host in durations]
+            workers = self._run_workers
+
+        return (_makespan([durations[host] for host in input_order], workers),
+                _makespan([durations[host] for host in scheduled], workers))
+
+    def print_summary(self):
+        """Prints the makespan of the last run's hosts in the order given against longest
+        first, and how many hosts had no history
+
+        Returns:
+            None
+        """
+        input_seconds, scheduled_seconds = self.makespans()
+        saved = 100 * (1 - scheduled_seconds / input_seconds) if input_seconds else 0.0
+        print(f"Scheduling - Makespan in the order given: {input_seconds:.1f}s | Longest first: "
+              f"{scheduled_seconds:.1f}s ({saved:.0f}% shorter) | Hosts without history: {self._run_without_history}")
+
+    def close(self):
+        """Closes the history"""
+        if self._connection is None:
+            return
+
+        self._connection.close()
+        self._connection = None
+
+
+def _makespan(durations, workers):
+    """Returns when the last job finishes if each job is started, in order, on whichever
+    of the workers is free first"""
+    free_at = [0.0] * max(1, workers)
+    for seconds in durations:
+        heapq.heappush(free_at, heapq.heappop(free_at) + seconds)
+    return max(free_at)
@@ -0,0 +1,164 @@
+import json
+
+from parsers.parser_config_switch_restconf import (DOMAIN_NAME_PATH, INTERFACE_TYPES_TO_AUDIT, SPANNING_TREE_MODE_PATH,
+                                                   VTP_MODE_PATH)
+
+# The fastest JSON backend installed is used to decode RESTCONF responses. orjson and
+# ujson are optional; the standard library json module is used when neither is installed
+try:
+    import orjson as _json_backend
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    try:
+        import ujson as _json_backend
+        JSON_BACKEND = 'ujson'
+    except ImportError:
+        _json_backend = json
+        JSON_BACKEND = 'json'
+
+# ijson is optional. Without it the incremental extractors decode the whole document
+# and then trim it, so the result is the same but the peak memory saving is lost
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:
+    ijson = None
+
+NATIVE_KEY = 'Cisco-IOS-XE-native:native'
+VLANS_KEY = 'Cisco-IOS-XE-vlan-oper:vlans'
+
+# Global settings of the native config kept by the incremental extractor
+_NATIVE_PATHS = (('hostname',), DOMAIN_NAME_PATH, SPANNING_TREE_MODE_PATH, VTP_MODE_PATH)
+_NATIVE_PREFIXES = {'.'.join((NATIVE_KEY, *path)): path for path in _NATIVE_PATHS}
+_INTERFACE_PREFIX = f'{NATIVE_KEY}.interface.'
+_VLAN_ITEM_PREFIX = f'{VLANS_KEY}.vlan.item'
+_SCALAR_EVENTS = {'string', 'number', 'boolean', 'null'}
+
+
+def decode_json(data):
+    """Decodes a JSON document with the fastest JSON backend installed
+
+    Args:
+        data (bytes): JSON document (e.g. the body of a RESTCONF response)
+
+    Returns:
+        dict: Decoded JSON
+    """
+    return _json_backend.loads(data)
+
+
+def extract_native_config(stream):
+    """Reads a Cisco-IOS-XE-native:native RESTCONF document from a file-like object and
+    keeps only what ParserConfigSwitchRestconf uses: the hostname, domain name,
+    spanning-tree mode, VTP mode and the interface types in `INTERFACE_TYPES_TO_AUDIT`.
+    Everything else (crypto, AAA, routing, other
+    interface types, ...) is skipped while streaming, without being built in memory
+
+    Args:
+        stream (file): Binary file-like object of the JSON document (e.g. the raw body
+        of a streamed requests response)
+
+    Returns:
+        dict: The document in the same shape as the full document, trimmed to
+        {NATIVE_KEY: {'hostname': str, 'interface': {interface type: [interfaces]}}} plus
+        the `ip`, `spanning-tree` and `vtp` entries of the other settings that are configured
+    """
+    if ijson is None:
+        return _trim_native_config(decode_json(stream.read()))
+
+    native_config = {'hostname': None, 'interface': {}}
+    builder = None
+    building_path = None
+    building_prefix = None
+
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ('end_array', 'end_map') and prefix == building_prefix:
+                _set_native_value(native_config, building_path, builder.value)
+                builder = None
+            continue
+
+        if prefix in _NATIVE_PREFIXES and event in _SCALAR_EVENTS:
+            _set_native_value(native_config, _NATIVE_PREFIXES[prefix], value)
+
+        elif prefix in _NATIVE_PREFIXES and event in ('start_array', 'start_map'):
+            building_path = _NATIVE_PREFIXES[prefix]
+
+        elif (event == 'start_array' and prefix.startswith(_INTERFACE_PREFIX)
+              and prefix[len(_INTERFACE_PREFIX):] in INTERFACE_TYPES_TO_AUDIT):
+            building_path = ('interface', prefix[len(_INTERFACE_PREFIX):])
+
+        else:
+            continue
+
+        if event in ('start_array', 'start_map'):
+            builder = ObjectBuilder()
+            builder.event(event, value)
+            building_prefix = prefix
+
+    return {NATIVE_KEY: native_config}
+
+
+def extract_vlans(stream):
+    """Reads a Cisco-IOS-XE-vlan-oper:vlans RESTCONF document from a file-like object
+    and keeps only the ID and name of each VLAN. The per VLAN member port lists are
+    skipped while streaming
+
+    Args:
+        stream (file): Binary file-like object of the JSON document
+
+    Returns:
+        dict: {VLANS_KEY: {'vlan': [{'id': int, 'name': str}]}}
+    """
+    if ijson is None:
+        return _trim_vlans(decode_json(stream.read()))
+
+    vlans = []
+    vlan = None
+
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if prefix == _VLAN_ITEM_PREFIX:
+            if event == 'start_map':
+                vlan = {'id': None, 'name': None}
+            elif event == 'end_map':
+                vlans.append(vlan)
+                vlan = None
+
+        elif vlan is not None and event in _SCALAR_EVENTS:
+            if prefix == f'{_VLAN_ITEM_PREFIX}.id':
+                vlan['id'] = value
+            elif prefix == f'{_VLAN_ITEM_PREFIX}.name':
+                vlan['name'] = value
+
+    return {VLANS_KEY: {'vlan': vlans}}
+
+
+def _set_native_value(native_config, path, value):
+    for key in path[:-1]:
+        native_config = native_config.setdefault(key, {})
+    native_config[path[-1]] = value
+
+
+def _trim_native_config(native_config):
+    native_config = native_config[NATIVE_KEY]
+    interfaces = native_config.get('interface', {})
+
+    trimmed = {
+        'hostname': native_config.get('hostname'),
+        'interface': {interface_type: interfaces[interface_type]
+                      for interface_type in interfaces if interface_type in INTERFACE_TYPES_TO_AUDIT},
+    }
+    for path in _NATIVE_PATHS[1:]:
+        value = native_config
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None:
+            _set_native_value(trimmed, path, value)
+
+    return {NATIVE_KEY: trimmed}
+
+
+def _trim_vlans(vlans_config):
+    return {VLANS_KEY: {'vlan': [{'id': vlan['id'], 'name': vlan.get('name')}
+                                 for vlan in vlans_config[VLANS_KEY]['vlan']]}}
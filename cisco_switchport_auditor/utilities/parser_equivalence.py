@@ -0,0 +1,403 @@
+import io
+import json
+import random
+import statistics
+import time
+from collections import namedtuple
+
+from models.interface import Interface
+from models.interface_table import InterfaceTable
+from models.switch import Switch
+from parsers.parser_config_switch_regex import ParserRunningConfigSwitch
+from parsers.parser_config_switch_restconf import INTERFACE_TYPES_TO_AUDIT, ParserConfigSwitchRestconf
+from utilities.config_generator import (PORTS_PER_STACK_MEMBER, generate_switch_spec, render_restconf,
+                                        render_running_config)
+from utilities.json_decoding import decode_json, extract_native_config, extract_vlans
+from utilities.serialization import CONFIG_ATTRIBUTES
+
+# A switch spec rendered into every input a parser engine can take
+RenderedSwitch = namedtuple('RenderedSwitch', ['host', 'running_config', 'native_json', 'vlans_json'])
+
+# One attribute on which an engine's result differs from the reference engine's.
+# interface is None for Switch attributes
+Difference = namedtuple('Difference', ['engine', 'field', 'hostname', 'interface', 'expected', 'found'])
+
+EquivalenceReport = namedtuple('EquivalenceReport', ['reference', 'switches', 'interfaces', 'timings',
+                                                     'differences', 'reproducers'])
+
+# Attributes compared between engines. Raw configs differ by design
+SWITCH_FIELDS = [field for field in Switch.__fields__ if field not in CONFIG_ATTRIBUTES and field != 'interfaces']
+INTERFACE_FIELDS = [field for field in Interface.__fields__
+                    if field not in CONFIG_ATTRIBUTES and field != 'switch_vlans']
+
+# Values the minimiser tries giving each interface of a reproducer, so the attributes
+# that do not matter to a difference are left out of the rendered config
+PLAIN_INTERFACE_VALUES = {
+    'type': 'GigabitEthernet',
+    'description': None,
+    'shutdown': False,
+    'vlan': None,
+    'voice_vlan': None,
+    'trunk_allowed_vlans': None,
+    'ise': False,
+    'ipdt_policy': None,
+}
+
+
+def _parse_regex(rendered):
+    switch = Switch(ip_address=rendered.host)
+    ParserRunningConfigSwitch(switch, rendered.running_config)
+    return switch, switch.interfaces
+
+
+def _parse_regex_table(rendered):
+    switch = Switch(ip_address=rendered.host)
+    table = InterfaceTable()
+    ParserRunningConfigSwitch(switch, rendered.running_config, interface_table=table)
+    return switch, list(table)
+
+
+def _parse_restconf(rendered):
+    switch = Switch(ip_address=rendered.host)
+    ParserConfigSwitchRestconf(switch, decode_json(rendered.native_json), decode_json(rendered.vlans_json))
+    return switch, switch.interfaces
+
+
+def _parse_restconf_incremental(rendered):
+    switch = Switch(ip_address=rendered.host)
+    ParserConfigSwitchRestconf(switch, extract_native_config(io.BytesIO(rendered.native_json)),
+                               extract_vlans(io.BytesIO(rendered.vlans_json)))
+    return switch, switch.interfaces
+
+
+def _parse_restconf_table(rendered):
+    switch = Switch(ip_address=rendered.host)
+    table = InterfaceTable()
+    ParserConfigSwitchRestconf(switch, decode_json(rendered.native_json), decode_json(rendered.vlans_json),
+                               interface_table=table)
+    return switch, list(table)
+
+
+# Parser engines compared by `check_parser_equivalence`. Each takes a RenderedSwitch and
+# returns (Switch object, its interfaces as Interface objects or InterfaceTable rows).
+# Decoding the raw input is part of the engine, so timings are comparable. A new engine
+# is added here to have it checked against (and timed with) the others
+PARSER_ENGINES = {
+    'regex': _parse_regex,
+    'regex_table': _parse_regex_table,
+    'restconf': _parse_restconf,
+    'restconf_incremental': _parse_restconf_incremental,
+    'restconf_table': _parse_restconf_table,
+}
+
+
+def random_switch_spec(seed):
+    """Generates a switch spec (see `generate_switch_spec`) with more variety than a
+    benchmark switch needs: every audited interface type, access ports without
+    `switchport mode`, unconfigured ports, trunks allowing all, no, a single or a range
+    of VLANs, and unusual descriptions
+
+    Args:
+        seed (int): Seed. The same seed always gives the same spec
+
+    Returns:
+        dict: Switch spec
+    """
+    rng = random.Random(seed)
+    spec = generate_switch_spec(f'FUZZ{seed:05d}', number_of_vlans=rng.randint(1, 60),
+                                number_of_interfaces=rng.randint(1, 2 * PORTS_PER_STACK_MEMBER),
+                                trunk_ratio=rng.random() / 2, seed=seed)
+    vlan_ids = [vlan_id for vlan_id, _ in spec['vlans']]
+
+    for interface in spec['interfaces']:
+        interface['type'] = rng.choices(INTERFACE_TYPES_TO_AUDIT, weights=[1, 6, 1, 1, 1])[0]
+
+        if rng.random() < 0.1:
+            interface['description'] = rng.choice(['Uplink to CORE-01 Gi1/0/48', '1234', 'Desk  12'])
+
+        if interface['mode'] == 'trunk':
+            roll = rng.random()
+            if roll < 0.2:
+                interface['trunk_allowed_vlans'] = None
+            elif roll < 0.3:
+                interface['trunk_allowed_vlans'] = 'none'
+            elif roll < 0.5:
+                interface['trunk_allowed_vlans'] = str(rng.choice(vlan_ids))
+            elif roll < 0.6 and len(vlan_ids) > 1:
+                first, last = sorted(rng.sample(vlan_ids, 2))
+                interface['trunk_allowed_vlans'] = f'{first}-{last}'
+        else:
+            roll = rng.random()
+            if roll < 0.05:
+                interface.update(mode=None, vlan=None, voice_vlan=None, ise=False)
+            elif roll < 0.2:
+                interface['mode'] = None
+
+    return spec
+
+
+def render_switch(spec, number_of_acl_entries=10):
+    """Renders a switch spec into the running-config and RESTCONF documents (as the
+    bytes a device would send) the engines parse
+
+    Args:
+        spec (dict): Switch spec
+        number_of_acl_entries (int, optional): See `render_restconf`. Defaults to 10.
+
+    Returns:
+        RenderedSwitch: Rendered switch
+    """
+    native_config, vlans_config = render_restconf(spec, number_of_acl_entries=number_of_acl_entries)
+    return RenderedSwitch(spec['hostname'], render_running_config(spec), json.dumps(native_config).encode(),
+                          json.dumps(vlans_config).encode())
+
+
+def run_engine(engine, rendered):
+    """Parses a rendered switch with one engine. An exception is returned rather than
+    raised, so it is reported as a difference
+
+    Args:
+        engine (str): Name of an engine in PARSER_ENGINES
+        rendered (RenderedSwitch): Rendered switch
+
+    Returns:
+        tuple: (result or exception, seconds the engine took)
+    """
+    start = time.perf_counter()
+    try:
+        result = PARSER_ENGINES[engine](rendered)
+    except Exception as exception:
+        result = exception
+    return result, time.perf_counter() - start
+
+
+def _typed(value):
+    """Makes values compare equal only when they are equal and of the same type (10 and
+    '10', or True and 1, are different answers)"""
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(_typed(item) for item in value)
+    return type(value), value
+
+
+def compare_results(engine, hostname, expected, found):
+    """Lists every compared attribute on which an engine's result differs from the
+    reference engine's. Interfaces are matched by name
+
+    Args:
+        engine (str): Name of the engine that produced found
+        hostname (str): Hostname of the generated switch
+        expected (tuple): Result of the reference engine, or the exception it raised
+        found (tuple): Result of the engine, or the exception it raised
+
+    Returns:
+        list: Difference named tuples
+    """
+    if isinstance(expected, Exception) or isinstance(found, Exception):
+        if isinstance(expected, Exception) and isinstance(found, Exception) and repr(expected) == repr(found):
+            return []
+        return [Difference(engine, 'exception', hostname, None,
+                           expected if isinstance(expected, Exception) else None,
+                           found if isinstance(found, Exception) else None)]
+
+    (expected_switch, expected_interfaces), (found_switch, found_interfaces) = expected, found
+    differences = []
+
+    for field in SWITCH_FIELDS:
+        expected_value, found_value = getattr(expected_switch, field), getattr(found_switch, field)
+        if _typed(expected_value) != _typed(found_value):
+            differences.append(Difference(engine, field, hostname, None, expected_value, found_value))
+
+    expected_by_name = {interface.name: interface for interface in expected_interfaces or []}
+    found_by_name = {interface.name: interface for interface in found_interfaces or []}
+    names = list(expected_by_name) + [name for name in found_by_name if name not in expected_by_name]
+
+    for name in names:
+        if name not in expected_by_name or name not in found_by_name:
+            differences.append(Difference(engine, 'interfaces', hostname, name, name in expected_by_name,
+                                          name in found_by_name))
+            continue
+
+        for field in INTERFACE_FIELDS:
+            expected_value = getattr(expected_by_name[name], field)
+            found_value = getattr(found_by_name[name], field)
+            if _typed(expected_value) != _typed(found_value):
+                differences.append(Difference(engine, field, hostname, name, expected_value, found_value))
+
+    return differences
+
+
+def minimise_reproducer(spec, still_differs):
+    """Shrinks a switch spec while a difference still shows: interfaces and VLANs are
+    removed (halves first, then smaller chunks down to one at a time) and then each
+    remaining interface's attributes are set to PLAIN_INTERFACE_VALUES where possible
+
+    Args:
+        spec (dict): Switch spec that shows the difference
+        still_differs (function): Takes a spec and returns True if it still shows the
+        difference
+
+    Returns:
+        dict: The smallest spec found
+    """
+    spec = dict(spec)
+    spec['interfaces'] = _shrink(spec['interfaces'], lambda interfaces: still_differs({**spec, 'interfaces': interfaces}))
+    spec['vlans'] = _shrink(spec['vlans'], lambda vlans: still_differs({**spec, 'vlans': vlans}))
+
+    for position in range(len(spec['interfaces'])):
+        for attribute, plain_value in PLAIN_INTERFACE_VALUES.items():
+            interface = spec['interfaces'][position]
+            if interface[attribute] == plain_value:
+                continue
+
+            interfaces = list(spec['interfaces'])
+            interfaces[position] = {**interface, attribute: plain_value}
+            if still_differs({**spec, 'interfaces': interfaces}):
+                spec['interfaces'] = interfaces
+
+    return spec
+
+
+def _shrink(items, still_differs):
+    """Removes chunks of items for as long as still_differs holds without them"""
+    chunk = max(1, len(items) // 2)
+
+    while True:
+        start = 0
+        while start < len(items):
+            candidate = items[:start] + items[start + chunk:]
+            if still_differs(candidate):
+                items = candidate
+            else:
+                start += chunk
+
+        if chunk == 1:
+            return items
+        chunk = max(1, chunk // 2)
+
+
+def _differs_on(engine, field, reference):
+    """Returns a still_differs function for `minimise_reproducer` that checks a spec for
+    a difference on one field between an engine and the reference engine"""
+    def still_differs(spec):
+        rendered = render_switch(spec)
+        expected, _ = run_engine(reference, rendered)
+        found, _ = run_engine(engine, rendered)
+        return any(difference.field == field
+                   for difference in compare_results(engine, spec['hostname'], expected, found))
+    return still_differs
+
+
+def check_parser_equivalence(number_of_switches=100, seed=0, engines=None, reference='regex', minimise=True):
+    """Generates random switches (`random_switch_spec`), renders each into a running-config
+    and the matching RESTCONF documents, parses them with every engine and compares each
+    engine's Switch and Interface attributes with the reference engine's. Every engine is
+    timed on the same inputs
+
+    For the first switch that shows each (engine, attribute) difference, the spec is
+    minimised (`minimise_reproducer`) into a reproducer
+
+    Args:
+        number_of_switches (int, optional): Switches to generate. Defaults to 100.
+        seed (int, optional): Seed of the first switch, the others follow on from it.
+        Defaults to 0.
+        engines (list, optional): Names of engines in PARSER_ENGINES to compare. Defaults
+        to None which is all of them.
+        reference (str, optional): Engine the others are compared with. Defaults to 'regex'.
+        minimise (bool, optional): Set to False to skip minimising reproducers. Defaults to True.
+
+    Returns:
+        EquivalenceReport: timings is engine to a list of seconds per switch, differences is
+        (engine, field) to a list of Difference, reproducers is (engine, field) to
+        (seed, minimal spec)
+    """
+    engines = [reference] + [engine for engine in (engines or PARSER_ENGINES) if engine != reference]
+    timings = {engine: [] for engine in engines}
+    differences = {}
+    first_seeds = {}
+    number_of_interfaces = 0
+
+    for switch_seed in range(seed, seed + number_of_switches):
+        spec = random_switch_spec(switch_seed)
+        rendered = render_switch(spec)
+        number_of_interfaces += len(spec['interfaces'])
+
+        results = {}
+        for engine in engines:
+            results[engine], seconds = run_engine(engine, rendered)
+            timings[engine].append(seconds)
+
+        for engine in engines[1:]:
+            for difference in compare_results(engine, spec['hostname'], results[reference], results[engine]):
+                key = (engine, difference.field)
+                differences.setdefault(key, []).append(difference)
+                first_seeds.setdefault(key, switch_seed)
+
+    reproducers = {}
+    if minimise:
+        for (engine, field), switch_seed in first_seeds.items():
+            minimal_spec = minimise_reproducer(random_switch_spec(switch_seed), _differs_on(engine, field, reference))
+            reproducers[(engine, field)] = (switch_seed, minimal_spec)
+
+    return EquivalenceReport(reference, number_of_switches, number_of_interfaces, timings, differences, reproducers)
+
+
+def _describe(value, other):
+    if repr(value) == repr(other):
+        return f'{value!r} ({type(value).__name__})'
+    return repr(value)
+
+
+def print_equivalence_report(report):
+    """Prints the timing of each engine, then each (engine, attribute) difference with
+    an example and its minimised reproducer (the running-config and RESTCONF documents)
+
+    Args:
+        report (EquivalenceReport): From `check_parser_equivalence`
+
+    Returns:
+        None
+    """
+    reference_seconds = sum(report.timings[report.reference])
+
+    print(f'{report.switches} switches | {report.interfaces} interfaces | reference engine: {report.reference}')
+    print(f"{'Engine':<22}{'Total (s)':>10}{'Median (ms)':>13}{'Interfaces/s':>14}{'Speed-up':>10}{'Differences':>13}")
+    for engine, seconds in report.timings.items():
+        total = sum(seconds)
+        number_of_differences = sum(len(differences) for (differing_engine, _), differences
+                                    in report.differences.items() if differing_engine == engine)
+        print(f"{engine:<22}{total:>10.2f}{statistics.median(seconds) * 1000:>13.1f}"
+              f"{report.interfaces / total:>14.0f}{reference_seconds / total:>9.1f}x{number_of_differences:>13}")
+
+    if not report.differences:
+        print('\nEvery engine gave the same answers')
+        return
+
+    printed_reproducers = {}
+
+    for (engine, field), differences in report.differences.items():
+        example = differences[0]
+        location = example.hostname if example.interface is None else f'{example.hostname} {example.interface}'
+        switches = len({difference.hostname for difference in differences})
+
+        print(f'\n{engine} differs on {field}: {len(differences)} times on {switches} switches')
+        print(f'  e.g. {location}: {report.reference} {_describe(example.expected, example.found)}, '
+              f'{engine} {_describe(example.found, example.expected)}')
+
+        if (engine, field) not in report.reproducers:
+            continue
+
+        switch_seed, minimal_spec = report.reproducers[(engine, field)]
+        rendered = render_switch(minimal_spec, number_of_acl_entries=0)
+        if rendered in printed_reproducers:
+            print(f'  Reproducer: same as {printed_reproducers[rendered]}')
+            continue
+        printed_reproducers[rendered] = f'{engine} {field}'
+
+        print(f"  Reproducer (from random_switch_spec({switch_seed}), {len(minimal_spec['interfaces'])} interfaces, "
+              f"{len(minimal_spec['vlans'])} VLANs):")
+        print('    running-config:')
+        for line in rendered.running_config.splitlines():
+            if line and line != '!':
+                print(f'      {line}')
+        print(f'    native: {rendered.native_json.decode()}')
+        print(f'    vlans: {rendered.vlans_json.decode()}')
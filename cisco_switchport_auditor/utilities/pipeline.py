@@ -0,0 +1,315 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class StageMetrics:
+    """Throughput counters for one stage of a SwitchPipeline
+
+    Args:
+        name (str): Name of the stage (e.g. collect)
+        workers (int): Number of workers running the stage
+    """
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.waiting_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, busy_seconds, waiting_seconds=0.0, failed=False):
+        """Adds the timings of one processed item to the stage totals
+
+        Args:
+            busy_seconds (float): Seconds spent doing the stage's work
+            waiting_seconds (float, optional): Seconds spent blocked on another stage. Defaults to 0.0.
+            failed (bool, optional): Set to True if the item failed. Defaults to False.
+        """
+        with self._lock:
+            self.items += 1
+            self.busy_seconds += busy_seconds
+            self.waiting_seconds += waiting_seconds
+            if failed:
+                self.failures += 1
+
+    @property
+    def capacity(self):
+        """float: Items per second the stage can sustain with all of its workers busy"""
+        if self.busy_seconds == 0:
+            return float('inf')
+        return self.items * self.workers / self.busy_seconds
+
+
+class SwitchPipeline:
+    """Runs collection and parsing as two overlapping stages instead of one after
+    the other:
+
+    * collect - a pool of threads runs `collect_function` (SSH, RESTCONF, file reads)
+      and pushes the raw configs into a bounded queue
+    * parse - a pool of processes runs `parse_function` on the raw configs
+    * write - a single consumer (the caller's thread) assembles the Switch objects
+
+    The queue between collect and parse and the number of configs handed to the parser
+    processes are both capped at `queue_size`. When parsing falls behind, collectors
+    block instead of holding more configs in memory.
+
+    Args:
+        collect_function (function): Called as collect_function(host). Returns the raw
+        config of the host, or None if collection failed
+        parse_function (function): Called as parse_function(host, raw_config) in a parser
+        process. Returns a Switch object. Must be a module-level function so it can be
+        sent to the parser processes
+        collector_workers (int, optional): Number of collector threads. Defaults to 8.
+        parser_workers (int, optional): Number of parser processes. Defaults to the number of
+        CPUs this process may run on.
+        queue_size (int, optional): Maximum number of raw configs waiting to be parsed.
+        Defaults to twice the number of parser processes.
+        duration_history (DurationHistory, optional): Records each host's collect and parse
+        seconds and starts the hosts expected to take longest first. Results are still
+        in the order of list_of_hosts. See `utilities/host_scheduling.py`. Defaults to None.
+    """
+    def __init__(self, collect_function, parse_function, collector_workers=8, parser_workers=None, queue_size=None,
+                 duration_history=None):
+        self._collect_function = collect_function
+        self._parse_function = parse_function
+        self.duration_history = duration_history
+
+        self.collector_workers = collector_workers
+        self.parser_workers = parser_workers or _available_cpus()
+        self.queue_size = queue_size or self.parser_workers * 2
+
+        self._cancelled = threading.Event()
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self.metrics = {
+            'collect': StageMetrics('collect', self.collector_workers),
+            'parse': StageMetrics('parse', self.parser_workers),
+            'write': StageMetrics('write', 1),
+        }
+        self.wall_seconds = 0.0
+
+    def run(self, list_of_hosts):
+        """Collects and parses every host and returns the Switch objects in the order
+        the hosts were given. Hosts that failed collection or parsing are left out
+
+        Args:
+            list_of_hosts (list): list of hostnames, IP addresses or config filenames
+
+        Returns:
+            list: list of Switch objects
+        """
+        switches = [None] * len(list_of_hosts)
+
+        for index, switch in self.iter_results(list_of_hosts):
+            switches[index] = switch
+
+        return [switch for switch in switches if switch is not None]
+
+    def iter_results(self, list_of_hosts, ordered=False):
+        """Collects and parses every host, yielding each Switch object as soon as it has
+        been parsed. Hosts that failed collection or parsing are not yielded
+
+        Args:
+            list_of_hosts (list): list of hostnames, IP addresses or config filenames
+            ordered (bool, optional): Set to True to yield in the order of list_of_hosts.
+            Switches parsed ahead of an earlier host are held back until that host is
+            done. Defaults to False.
+
+        Yields:
+            tuple: (index of the host in list_of_hosts, Switch object)
+        """
+        self._reset_metrics()
+        self._cancelled.clear()
+        start = time.perf_counter()
+
+        raw_configs = queue.Queue(maxsize=self.queue_size)
+        parsed_switches = queue.Queue()
+        parses_in_flight = threading.BoundedSemaphore(self.queue_size)
+
+        parser_pool = ProcessPoolExecutor(max_workers=self.parser_workers)
+        self._start_parser_processes(parser_pool)
+        collector_pool = ThreadPoolExecutor(max_workers=self.collector_workers)
+
+        if self.duration_history is not None:
+            start_order = self.duration_history.longest_first(list_of_hosts, workers=self.collector_workers)
+        else:
+            start_order = range(len(list_of_hosts))
+
+        try:
+            for index in start_order:
+                collector_pool.submit(self._collect, index, list_of_hosts[index], raw_configs)
+
+            dispatcher = threading.Thread(
+                target=self._dispatch,
+                args=(len(list_of_hosts), raw_configs, parser_pool, parsed_switches, parses_in_flight),
+                daemon=True
+            )
+            dispatcher.start()
+
+            held_back = {}
+            next_index = 0
+
+            for _ in range(len(list_of_hosts)):
+                wait_start = time.perf_counter()
+                index, switch = parsed_switches.get()
+                write_start = time.perf_counter()
+
+                if not ordered:
+                    if switch is not None:
+                        yield index, switch
+                else:
+                    held_back[index] = switch
+                    while next_index in held_back:
+                        next_switch = held_back.pop(next_index)
+                        if next_switch is not None:
+                            yield next_index, next_switch
+                        next_index += 1
+
+                self.metrics['write'].record(time.perf_counter() - write_start, write_start - wait_start,
+                                             failed=switch is None)
+
+        finally:
+            self._cancelled.set()
+            collector_pool.shutdown(wait=True, cancel_futures=True)
+            parser_pool.shutdown(wait=True, cancel_futures=True)
+            self.wall_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _start_parser_processes(parser_pool):
+        """Starts the parser processes before any collector thread exists. On platforms
+        that fork, forking while collector threads hold locks can deadlock the children
+        """
+        parser_pool.submit(os.getpid).result()
+
+    def _collect(self, index, host, raw_configs):
+        """Collector thread task. Every host puts exactly one item on the queue, with a
+        raw config of None if collection failed, so the dispatcher knows when it is done
+        """
+        if self._cancelled.is_set():
+            return
+
+        collect_start = time.perf_counter()
+        try:
+            raw_config = self._collect_function(host)
+        except Exception as e:
+            print(f"Collection from {host} failed ({type(e).__name__}: {e}). Skipping {host}")
+            raw_config = None
+        put_start = time.perf_counter()
+
+        while not self._cancelled.is_set():
+            try:
+                raw_configs.put((index, host, raw_config), timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+        self.metrics['collect'].record(put_start - collect_start, time.perf_counter() - put_start,
+                                       failed=raw_config is None)
+        if self.duration_history is not None:
+            self.duration_history.record(host, collect_seconds=put_start - collect_start)
+
+    def _dispatch(self, number_of_hosts, raw_configs, parser_pool, parsed_switches, parses_in_flight):
+        """Dispatcher thread. Moves raw configs from the collect queue to the parser
+        processes, never handing more than `queue_size` configs to them at once
+        """
+        for _ in range(number_of_hosts):
+            item = self._get_unless_cancelled(raw_configs)
+            if item is None:
+                return
+
+            index, host, raw_config = item
+
+            if raw_config is None:
+                parsed_switches.put((index, None))
+                continue
+
+            while not parses_in_flight.acquire(timeout=0.1):
+                if self._cancelled.is_set():
+                    return
+
+            try:
+                future = parser_pool.submit(_timed_parse, self._parse_function, host, raw_config)
+            except RuntimeError:
+                return
+
+            future.add_done_callback(
+                lambda future, index=index, host=host: self._parsed(future, index, host, parsed_switches, parses_in_flight)
+            )
+
+    def _get_unless_cancelled(self, raw_configs):
+        while not self._cancelled.is_set():
+            try:
+                return raw_configs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _parsed(self, future, index, host, parsed_switches, parses_in_flight):
+        """Done callback of a parse task. Hands the Switch object to the writer"""
+        parses_in_flight.release()
+
+        if future.cancelled():
+            return
+
+        try:
+            switch, parse_seconds = future.result()
+        except Exception as e:
+            print(f"Parsing the config of {host} failed ({type(e).__name__}: {e}). Skipping {host}")
+            self.metrics['parse'].record(0.0, failed=True)
+            parsed_switches.put((index, None))
+            return
+
+        self.metrics['parse'].record(parse_seconds)
+        if self.duration_history is not None:
+            self.duration_history.record(host, parse_seconds=parse_seconds, interfaces=len(switch.interfaces or []))
+        parsed_switches.put((index, switch))
+
+    def limiting_stage(self):
+        """Returns the stage with the lowest capacity, i.e. the stage that limited
+        the throughput of the last run
+
+        Returns:
+            StageMetrics: Metrics of the limiting stage
+        """
+        return min(self.metrics.values(), key=lambda stage: stage.capacity)
+
+    def print_metrics(self):
+        """Prints per-stage throughput of the last run and the limiting stage
+
+        Waiting time for the collect stage is time spent blocked on a full queue (parsing
+        is behind). Waiting time for the write stage is time spent waiting for a parsed
+        switch (collection or parsing is behind)
+
+        Returns:
+            None
+        """
+        print(f"Pipeline - Wall time: {self.wall_seconds:.2f}s")
+        print(f"{'Stage':<10}{'Workers':>8}{'Items':>8}{'Failed':>8}{'Busy (s)':>11}{'Waiting (s)':>13}{'Capacity (items/s)':>20}")
+        for stage in self.metrics.values():
+            print(f"{stage.name:<10}{stage.workers:>8}{stage.items:>8}{stage.failures:>8}"
+                  f"{stage.busy_seconds:>11.2f}{stage.waiting_seconds:>13.2f}{stage.capacity:>20.2f}")
+        print(f"Limiting stage: {self.limiting_stage().name}")
+
+
+def _available_cpus():
+    """Returns the number of CPUs this process may run on, which can be fewer than
+    the CPUs in the machine (e.g. containers, taskset)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _timed_parse(parse_function, host, raw_config):
+    """Parser process task. Runs the parse function and times it
+
+    Returns:
+        tuple: (Switch object, seconds spent parsing)
+    """
+    start = time.perf_counter()
+    switch = parse_function(host, raw_config)
+    return switch, time.perf_counter() - start
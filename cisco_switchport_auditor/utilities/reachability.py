@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import time
+
+
+def check_hosts_reachable(list_of_hosts, port, timeout=3, negative_cache_ttl=300,
+                          cache_file='reachability_cache.json', max_concurrent_probes=500):
+    """Probes a TCP port on every host at the same time before any SSH or RESTCONF
+    session is attempted. Hosts that refuse or do not answer within `timeout` seconds
+    are considered unreachable.
+
+    Hosts that failed a probe within the last `negative_cache_ttl` seconds are not probed
+    again and are reported as unreachable straight away. Failures are kept in `cache_file`
+    so the negative cache survives between runs
+
+    Args:
+        list_of_hosts (list): list of hostnames or IP addresses
+        port (int): TCP port to probe (e.g. 22 for SSH, 443 for RESTCONF)
+        timeout (int, optional): Seconds to wait for a TCP handshake. Defaults to 3.
+        negative_cache_ttl (int, optional): Seconds a failed probe is remembered for. Set to
+        0 to always probe. Defaults to 300.
+        cache_file (str, optional): Path of the JSON negative cache. Set to None to not
+        persist the cache. Defaults to 'reachability_cache.json'.
+        max_concurrent_probes (int, optional): Maximum number of probes in flight at the
+        same time. Keeps the number of open file descriptors bounded. Defaults to 500.
+
+    Returns:
+        tuple: (list of reachable hosts, list of unreachable hosts). Both lists keep the
+        order hosts were provided in
+    """
+    now = time.time()
+    negative_cache = _load_negative_cache(cache_file)
+
+    hosts_to_probe = []
+    recently_failed = set()
+
+    for host in list_of_hosts:
+        failed_at = negative_cache.get(_cache_key(host, port))
+        if failed_at is not None and now - failed_at < negative_cache_ttl:
+            recently_failed.add(host)
+        else:
+            hosts_to_probe.append(host)
+
+    probe_results = asyncio.run(_probe_hosts(hosts_to_probe, port, timeout, max_concurrent_probes))
+
+    for host, is_reachable in probe_results.items():
+        if is_reachable:
+            negative_cache.pop(_cache_key(host, port), None)
+        else:
+            negative_cache[_cache_key(host, port)] = now
+
+    _save_negative_cache(cache_file, negative_cache, now, negative_cache_ttl)
+
+    reachable_hosts = []
+    unreachable_hosts = []
+
+    for host in list_of_hosts:
+        if host in recently_failed or probe_results.get(host) is False:
+            unreachable_hosts.append(host)
+        else:
+            reachable_hosts.append(host)
+
+    return reachable_hosts, unreachable_hosts
+
+
+def print_unreachable_hosts(unreachable_hosts, port):
+    """Prints the hosts that were removed by the reachability pre-check
+
+    Args:
+        unreachable_hosts (list): list of hostnames or IP addresses
+        port (int): TCP port that was probed
+
+    Returns:
+        None
+    """
+    if len(unreachable_hosts) == 0:
+        return
+
+    print("-" * 100)
+    print(f"{len(unreachable_hosts)} host(s) did not answer on TCP port {port} and were skipped:")
+    for host in unreachable_hosts:
+        print(f"    {host}")
+    print("-" * 100)
+
+
+async def _probe_hosts(list_of_hosts, port, timeout, max_concurrent_probes):
+    """Runs a TCP probe against every host concurrently
+
+    Returns:
+        dict: host as the key, True if the host accepted the connection else False
+    """
+    semaphore = asyncio.Semaphore(max_concurrent_probes)
+
+    async def probe(host):
+        async with semaphore:
+            return host, await _probe_host(host, port, timeout)
+
+    results = await asyncio.gather(*(probe(host) for host in list_of_hosts))
+
+    return dict(results)
+
+
+async def _probe_host(host, port, timeout):
+    """Opens and immediately closes a TCP connection to the host
+
+    Returns:
+        bool: True if the TCP handshake completed within the timeout, else False
+    """
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+    except (asyncio.TimeoutError, OSError):
+        return False
+
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+    return True
+
+
+def _cache_key(host, port):
+    return f"{host}:{port}"
+
+
+def _load_negative_cache(cache_file):
+    """Reads the negative cache from disk. A missing or corrupt cache file
+    results in an empty cache
+
+    Returns:
+        dict: "host:port" as the key and the time of the failed probe as the value
+    """
+    if cache_file is None or not os.path.exists(cache_file):
+        return {}
+
+    try:
+        with open(cache_file, 'r') as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_negative_cache(cache_file, negative_cache, now, negative_cache_ttl):
+    """Writes the negative cache to disk, dropping entries that have expired"""
+    if cache_file is None:
+        return
+
+    unexpired_entries = {key: failed_at for key, failed_at in negative_cache.items()
+                         if now - failed_at < negative_cache_ttl}
+
+    with open(cache_file, 'w') as json_file:
+        json.dump(unexpired_entries, json_file)
@@ -11,11 +11,11 @@ def regex_search(regex, configuration):
         If a match is found in the list of strings, the value of the first 
         capture group is returned
     """    
+    compiled_regex = re.compile(regex)
+
     for entry in configuration:
-        if re.search(regex, entry):
-            match = re.search(regex, entry).group(1)
-            return match
-        else:
-            continue
+        match = compiled_regex.search(entry)
+        if match:
+            return match.group(1)
     
     return False
\ No newline at end of file
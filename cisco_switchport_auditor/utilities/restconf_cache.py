@@ -0,0 +1,227 @@
+import io
+import json
+import sqlite3
+import threading
+import zlib
+
+from utilities.json_decoding import decode_json
+from utilities.serialization import switch_to_dict
+
+
+class RestconfResponseCache:
+    """Local cache of RESTCONF responses that makes later requests conditional. Kept in a
+    SQLite file that persists between runs. Supports context management
+
+    For every response that carried an ETag or Last-Modified validator, the validators
+    and the body are stored and later requests for the same URL send If-None-Match /
+    If-Modified-Since. When the device answers 304 Not Modified, `restconf_request`
+    returns `NOT_MODIFIED` and the body is not downloaded.
+
+    The Switch parsed from a host's native and VLAN documents is stored as well, keyed by
+    the validators of both documents, so when both come back 304 the stored switch is
+    reused without decoding JSON or parsing. If only one comes back 304, its stored body
+    is decoded and the switch parsed as usual.
+
+    Switches are stored with `switch_to_dict`, so reused Switch objects have no raw
+    configs (`config_restconf`) unless include_config is set.
+
+    Args:
+        cache_path (str, optional): Path of the SQLite file. Defaults to 'restconf_cache.db'.
+        include_config (bool, optional): Set to True to also store the raw configs, so
+        reused Switch objects keep them. Defaults to False.
+    """
+    def __init__(self, cache_path='restconf_cache.db', include_config=False):
+        self.cache_path = cache_path
+        self.include_config = include_config
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, size INTEGER NOT NULL, body BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS switches (host TEXT PRIMARY KEY, validators TEXT NOT NULL, switch BLOB NOT NULL);
+        """)
+
+        self._pending = {}
+        self._reset_run_stats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _reset_run_stats(self):
+        self.run_stats = {'downloaded': 0, 'not_modified': 0, 'bytes_downloaded': 0, 'bytes_saved': 0,
+                          'switches_reused': 0}
+
+    def conditional_headers(self, url):
+        """Returns the If-None-Match/If-Modified-Since headers for a URL, empty if nothing
+        is cached for it
+
+        Args:
+            url (str): RESTCONF URL
+
+        Returns:
+            dict: Header name to value
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT etag, last_modified FROM responses WHERE url = ?', (url,)).fetchone()
+
+        if row is None:
+            return {}
+
+        etag, last_modified = row
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store_response(self, url, etag, last_modified, body):
+        """Stores a 200 response. Responses without validators cannot be made conditional,
+        so they are not stored
+
+        Args:
+            url (str): RESTCONF URL
+            etag (str): ETag header, or None
+            last_modified (str): Last-Modified header, or None
+            body (bytes): Response body
+        """
+        with self._lock, self._connection:
+            self.run_stats['downloaded'] += 1
+            self.run_stats['bytes_downloaded'] += len(body)
+
+            if not etag and not last_modified:
+                self._connection.execute('DELETE FROM responses WHERE url = ?', (url,))
+                return
+
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses (url, etag, last_modified, size, body) VALUES (?, ?, ?, ?, ?)',
+                (url, etag, last_modified, len(body), zlib.compress(body))
+            )
+
+    def not_modified(self, url):
+        """Records a 304 response, counting the cached body's size as saved
+
+        Args:
+            url (str): RESTCONF URL
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            self.run_stats['not_modified'] += 1
+            self.run_stats['bytes_saved'] += row[0] if row is not None else 0
+
+    def cached_document(self, url, decoder=None):
+        """Decodes the cached body of a URL
+
+        Args:
+            url (str): RESTCONF URL
+            decoder (function, optional): See `restconf_request`. Defaults to None which
+            decodes the whole body.
+
+        Returns:
+            dict: JSON document
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT body FROM responses WHERE url = ?', (url,)).fetchone()
+
+        body = zlib.decompress(row[0])
+        if decoder is not None:
+            return decoder(io.BytesIO(body))
+        return decode_json(body)
+
+    def validators(self, urls):
+        """Returns the cached validators of several URLs as one string, or None if any
+        URL has none
+
+        Args:
+            urls (list): RESTCONF URLs
+
+        Returns:
+            str: Validators of every URL
+        """
+        validators = []
+        with self._lock:
+            for url in urls:
+                row = self._connection.execute('SELECT etag, last_modified FROM responses WHERE url = ?',
+                                               (url,)).fetchone()
+                if row is None:
+                    return None
+                validators.append(f'{row[0]} {row[1]}')
+        return '|'.join(validators)
+
+    def unchanged_switch(self, host, validators):
+        """Returns the switch stored for a host if it was parsed from documents with the
+        same validators
+
+        Args:
+            host (str): Hostname or IP address
+            validators (str): From `validators`
+
+        Returns:
+            dict: Stored switch (see `switch_to_dict`), or None if the documents must be parsed
+        """
+        if validators is None:
+            return None
+
+        with self._lock:
+            row = self._connection.execute('SELECT switch FROM switches WHERE host = ? AND validators = ?',
+                                           (host, validators)).fetchone()
+            if row is None:
+                return None
+            self.run_stats['switches_reused'] += 1
+
+        return decode_json(zlib.decompress(row[0]))
+
+    def parsing(self, host, validators):
+        """Records the validators of the documents a host's switch is about to be parsed
+        from. Stored with the parsed switch by `record`
+
+        Args:
+            host (str): Hostname or IP address
+            validators (str): From `validators`, or None
+        """
+        with self._lock:
+            self._pending[host] = validators
+
+    def record(self, switch):
+        """Stores a switch parsed in this run, keyed by the host it was collected from
+        (`switch.ip_address`). Reused switches are left as they are
+
+        Args:
+            switch (object): Switch object
+        """
+        with self._lock:
+            validators = self._pending.pop(switch.ip_address, None)
+            if validators is None:
+                return
+
+            switch_json = json.dumps(switch_to_dict(switch, include_config=self.include_config)).encode()
+            with self._connection:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO switches (host, validators, switch) VALUES (?, ?, ?)',
+                    (switch.ip_address, validators, zlib.compress(switch_json))
+                )
+
+    def print_summary(self):
+        """Prints how many responses were not modified and the bytes and parses saved
+        this run, then resets the run's counters
+
+        Returns:
+            None
+        """
+        stats = self.run_stats
+        print(f"RESTCONF cache - Downloaded: {stats['downloaded']} ({stats['bytes_downloaded'] / 1e6:.1f} MB) "
+              f"| Not modified (304): {stats['not_modified']} ({stats['bytes_saved'] / 1e6:.1f} MB saved) "
+              f"| Switches reused without parsing: {stats['switches_reused']}")
+        self._reset_run_stats()
+
+    def close(self):
+        """Closes the cache"""
+        if self._connection is None:
+            return
+
+        self._connection.close()
+        self._connection = None
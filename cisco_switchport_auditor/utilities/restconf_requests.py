@@ -1,9 +1,31 @@
+import io
 from re import match
 import requests
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
+from utilities.json_decoding import decode_json
 
-def restconf_request(host, username, password, yang_model, yang_path, port=443, verify=False, timeout=15):
+# Returned by restconf_request when a conditional request is answered 304 Not Modified
+NOT_MODIFIED = 'not_modified'
+
+
+def restconf_url(host, yang_model, yang_path, port=443):
+    """Returns the URL of a RESTCONF resource
+
+    Args:
+        host (str): Hostname or IP address
+        yang_model (str): YANG model (e.g. Cisco-IOS-XE-native)
+        yang_path (str): YANG model path of the resource
+        port (int, optional): HTTPS port. Defaults to 443.
+
+    Returns:
+        str: URL
+    """
+    return f"https://{host}:{port}/restconf/data/{yang_model}{yang_path}"
+
+
+def restconf_request(host, username, password, yang_model, yang_path, port=443, verify=False, timeout=15,
+                     decoder=None, response_hook=None, response_cache=None):
     """Makes a RESTCONF request
 
     Args:
@@ -15,28 +37,61 @@ def restconf_request(host, username, password, yang_model, yang_path, port=443,
         port (int, optional): HTTPS port. Defaults to 443.
         verify (bool, optional): Validate certificate is trusted. Defaults to False.
         timeout (int, optional): Timeout before request is considered timed out. Defaults to 15.
+        decoder (function, optional): Called with the streamed response body (a binary
+        file-like object) to decode it incrementally, e.g. `extract_native_config` in
+        `utilities/json_decoding.py`. Defaults to None which reads the whole body and
+        decodes it with the fastest JSON backend installed.
+        response_hook (function, optional): Called with the HTTP status code of the response,
+        or with the exception if the request failed (e.g. `ConcurrencySlot.record_response`
+        in `utilities/adaptive_concurrency.py`). Defaults to None.
+        response_cache (RestconfResponseCache, optional): Makes the request conditional on
+        the validators of the cached response and caches the new response. See
+        `utilities/restconf_cache.py`. Defaults to None.
 
     Returns:
-        [dict]: If successful, JSON output from RESTCONF device is returned
+        [dict]: If successful, JSON output from RESTCONF device is returned. NOT_MODIFIED
+        if the device answered 304 to a conditional request
     """
     requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
         
     headers = {"Accept": "application/yang-data+json"}
 
-    url = f"https://{host}:{port}/restconf/data/{yang_model}{yang_path}"
+    url = restconf_url(host, yang_model, yang_path, port=port)
+
+    if response_cache is not None:
+        headers.update(response_cache.conditional_headers(url))
+
+    restconf_data = None
 
     try: 
-        restconf_data = requests.get(url=url, headers=headers, auth=(username, password), verify=verify, timeout=timeout)
+        restconf_data = requests.get(url=url, headers=headers, auth=(username, password), verify=verify, timeout=timeout,
+                                     stream=decoder is not None and response_cache is None)
 
         http_status_code = restconf_data.status_code
 
+        if response_hook is not None:
+            response_hook(http_status_code)
+
         if http_status_code == 200:
-            return restconf_data.json()
+            if response_cache is not None:
+                # The whole body is needed for the cache, so it is decoded after being read
+                body = restconf_data.content
+                response_cache.store_response(url, restconf_data.headers.get('ETag'),
+                                              restconf_data.headers.get('Last-Modified'), body)
+                return decoder(io.BytesIO(body)) if decoder is not None else decode_json(body)
+            if decoder is not None:
+                restconf_data.raw.decode_content = True
+                return decoder(restconf_data.raw)
+            return decode_json(restconf_data.content)
 
         elif http_status_code == 204:
             print(f'{http_status_code} - No content was returned from: {host}')
             return False
 
+        elif http_status_code == 304 and response_cache is not None:
+            response_cache.not_modified(url)
+            return NOT_MODIFIED
+
         elif http_status_code == 400:
             print(f"400 - Bad HTTP request. Check if {host} is running restconf or your URL is correct")
             return False
@@ -56,12 +111,20 @@ def restconf_request(host, username, password, yang_model, yang_path, port=443,
         elif http_status_code == 405:
             print(f'405 - HTTP Method Not Allowed. Check if your request to {host} is correct')
             return False
+
+        elif http_status_code in (429, 503):
+            print(f"{http_status_code} - {host} is rate limiting RESTCONF requests or too busy to answer")
+            return False
    
     except requests.exceptions.Timeout as HTTP_Timeout:
+        if response_hook is not None:
+            response_hook(HTTP_Timeout)
         print(HTTP_Timeout)
         print(f"HTTP request timed out to {host} after {timeout} seconds")
 
     except requests.exceptions.ConnectionError as ConnectionError:
+        if response_hook is not None:
+            response_hook(ConnectionError)
         print(ConnectionError)
         print(f"An HTTP connection error was experieced to {host}")
 
@@ -69,7 +132,11 @@ def restconf_request(host, username, password, yang_model, yang_path, port=443,
         print(e)
         print(f"Catch-all exception for failed http request to {host}. Request failed")
 
-def validate_yang_model_availability(host, username, password):
+    finally:
+        if restconf_data is not None:
+            restconf_data.close()
+
+def validate_yang_model_availability(host, username, password, response_hook=None, port=443):
     """Checks if the YANG models that this project uses are supported on the device
     before making additional RESTCONF requests.
 
@@ -80,12 +147,15 @@ def validate_yang_model_availability(host, username, password):
         host (str): Hostname or IP address
         username (str): Username allowed to make RESTCONF requests
         password (str): Password of user allowed to make RESTCONF requests
+        response_hook (function, optional): See `restconf_request`. Defaults to None.
+        port (int, optional): HTTPS port. Defaults to 443.
 
     Returns:
         [bool]: If all models are found, returns True, else False if missing or request fails
     """    
         
-    request = restconf_request(host, username, password, "netconf-state", "/capabilities")
+    request = restconf_request(host, username, password, "netconf-state", "/capabilities", port=port,
+                               response_hook=response_hook)
 
     supported_YANG_models = ["Cisco-IOS-XE-native", "Cisco-IOS-XE-vlan-oper"]
 
@@ -0,0 +1,70 @@
+from models.interface import Interface
+from models.switch import Switch
+from models.vlan import Vlan
+
+# Attributes holding the raw configuration. Left out unless include_config is set as
+# they make up most of the size of a serialized switch
+CONFIG_ATTRIBUTES = {'config', 'config_restconf'}
+
+
+def switch_to_dict(switch, include_config=False):
+    """Converts a Switch object (and its interfaces) into a dict of plain types that
+    can be written as JSON
+
+    Args:
+        switch (object): Switch object
+        include_config (bool, optional): Set to True to include the raw configuration
+        of the switch and its interfaces. Defaults to False.
+
+    Returns:
+        dict: The switch's attributes. VLANs are dicts of id and name, interfaces are dicts
+        of their attributes (without `switch_vlans`, which is the switch's `vlans`)
+    """
+    switch_dict = {}
+
+    for attribute, value in switch.__dict__.items():
+        if attribute in CONFIG_ATTRIBUTES and not include_config:
+            continue
+        if attribute == 'vlans':
+            value = None if value is None else [{'id': vlan.id, 'name': vlan.name} for vlan in value]
+        elif attribute == 'interfaces':
+            value = None if value is None else [_interface_to_dict(interface, include_config) for interface in value]
+        switch_dict[attribute] = value
+
+    return switch_dict
+
+
+def _interface_to_dict(interface, include_config):
+    interface_dict = {}
+
+    for attribute, value in interface.__dict__.items():
+        if attribute == 'switch_vlans' or (attribute in CONFIG_ATTRIBUTES and not include_config):
+            continue
+        if attribute == 'trunk_allowed_vlans' and value is not None:
+            value = str(value)
+        interface_dict[attribute] = value
+
+    return interface_dict
+
+
+def switch_from_dict(switch_dict):
+    """Rebuilds a Switch object from a dict made by `switch_to_dict`
+
+    Args:
+        switch_dict (dict): Serialized switch
+
+    Returns:
+        Switch: Switch object with Interface objects and Vlan named tuples
+    """
+    switch_dict = dict(switch_dict)
+
+    vlans = switch_dict.pop('vlans', None)
+    interfaces = switch_dict.pop('interfaces', None)
+
+    switch = Switch(**switch_dict)
+    switch.vlans = None if vlans is None else [Vlan(vlan['id'], vlan['name']) for vlan in vlans]
+
+    if interfaces is not None:
+        switch.interfaces = [Interface(switch_vlans=switch.vlans, **interface) for interface in interfaces]
+
+    return switch
@@ -0,0 +1,154 @@
+import atexit
+import gzip
+import io
+import os
+import queue
+import threading
+import time
+
+SESSION_LOG_LEVELS = ('off', 'errors', 'full')
+
+
+class SessionLogBuffer(io.BufferedIOBase):
+    """In-memory file Netmiko writes an SSH session log to. Nothing is written to disk
+    while the session is running; the finished log is handed to a SessionLogWriter
+    """
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def getvalue(self):
+        """Returns everything written to the buffer
+
+        Returns:
+            bytes: The session log
+        """
+        return b''.join(self._chunks)
+
+
+class SessionLogWriter:
+    """Writes finished SSH session logs to disk from a single background thread, so
+    collection threads never wait on disk I/O. Logs are gzip compressed and saved as
+    `<logs_directory>/<host>/<host>__<time>.log.gz`.
+
+    Host folders are only created the first time a host's log is written. After each
+    write, that host's logs older than `max_age_days` are deleted, followed by the
+    oldest logs until the host's folder is no larger than `max_bytes_per_host`
+
+    Args:
+        logs_directory (str, optional): Base folder of the logs. Defaults to 'LOGS'.
+        max_age_days (float, optional): Logs older than this are deleted. Set to None to
+        keep logs regardless of age. Defaults to 30.
+        max_bytes_per_host (int, optional): Maximum size of a host's log folder. Set to
+        None for no limit. Defaults to 50 MB.
+        max_pending_logs (int, optional): Maximum number of logs waiting to be written
+        before `submit` blocks. Defaults to 256.
+        compression_level (int, optional): gzip compression level. Defaults to 6.
+    """
+    def __init__(self, logs_directory='LOGS', max_age_days=30, max_bytes_per_host=50 * 1024 * 1024,
+                 max_pending_logs=256, compression_level=6):
+        self.logs_directory = logs_directory
+        self.max_age_days = max_age_days
+        self.max_bytes_per_host = max_bytes_per_host
+        self.compression_level = compression_level
+
+        self._pending_logs = queue.Queue(maxsize=max_pending_logs)
+        self._created_host_directories = set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, host, started_at, session_log):
+        """Queues a finished session log to be written
+
+        Args:
+            host (str): Hostname or IP address the session was with
+            started_at (str): Time the session started (used in the filename)
+            session_log (bytes): The session log
+        """
+        self._pending_logs.put((host, started_at, session_log))
+
+    def close(self):
+        """Writes every queued log and stops the background thread"""
+        if not self._thread.is_alive():
+            return
+
+        self._pending_logs.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            pending_log = self._pending_logs.get()
+            if pending_log is None:
+                return
+
+            try:
+                self._write(*pending_log)
+            except OSError as e:
+                print(f"Could not save the session log of {pending_log[0]}: {e}")
+
+    def _write(self, host, started_at, session_log):
+        host_directory = os.path.join(self.logs_directory, host)
+
+        if host_directory not in self._created_host_directories:
+            os.makedirs(host_directory, exist_ok=True)
+            self._created_host_directories.add(host_directory)
+
+        with open(os.path.join(host_directory, f"{host}__{started_at}.log.gz"), 'wb') as log_file:
+            log_file.write(gzip.compress(session_log, compresslevel=self.compression_level))
+
+        self._rotate(host_directory)
+
+    def _rotate(self, host_directory):
+        """Deletes a host's logs that are too old, then the oldest logs while the host's
+        folder is over its size limit. The newest log is always kept
+        """
+        if self.max_age_days is None and self.max_bytes_per_host is None:
+            return
+
+        logs = []
+        with os.scandir(host_directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    logs.append((stat.st_mtime, stat.st_size, entry.path))
+
+        logs.sort(reverse=True)
+        total_bytes = 0
+        oldest_allowed = time.time() - self.max_age_days * 86400 if self.max_age_days is not None else None
+
+        for position, (modified_at, size, path) in enumerate(logs):
+            total_bytes += size
+            too_old = oldest_allowed is not None and modified_at < oldest_allowed
+            too_big = self.max_bytes_per_host is not None and total_bytes > self.max_bytes_per_host
+
+            if position > 0 and (too_old or too_big):
+                os.remove(path)
+                total_bytes -= size
+
+
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+
+def get_default_session_log_writer():
+    """Returns the SessionLogWriter shared by every ssh_handler that is not given one.
+    It is created on first use and flushed when the program exits
+
+    Returns:
+        SessionLogWriter
+    """
+    global _default_writer
+
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = SessionLogWriter()
+            atexit.register(_default_writer.close)
+
+    return _default_writer
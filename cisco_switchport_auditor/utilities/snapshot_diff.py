@@ -0,0 +1,138 @@
+import pandas as pd
+
+INTERFACE_KEY = ['switch_hostname', 'name']
+
+# Interface attributes compared between two audits and the (nullable) pandas dtype
+# each one is normalised to, so the same value compares equal whether it came from
+# Switch objects or an exported table
+INTERFACE_FIELD_DTYPES = {
+    'admin_down': 'boolean',
+    'description': 'object',
+    'IPDT_policy': 'object',
+    'is_access_port': 'boolean',
+    'is_trunk_port': 'boolean',
+    'ise_compliant': 'boolean',
+    'trunk_allowed_vlans': 'object',
+    'type': 'object',
+    'vlan': 'Int64',
+    'vlan_name': 'object',
+    'voice_vlan': 'Int64',
+    'voice_vlan_name': 'object',
+}
+
+CHANGE_TYPES = ['added', 'removed', 'changed']
+
+
+def interfaces_to_frame(audit):
+    """Builds one DataFrame of every interface in an audit, with one column per
+    compared attribute
+
+    Args:
+        audit (list, DataFrame): list of Switch objects (e.g. as returned by the
+        `master_functions` entry points) or a DataFrame with `switch_hostname` and
+        `name` columns (e.g. from `read_excel_export`)
+
+    Returns:
+        DataFrame: interfaces with the key and attribute columns
+    """
+    if isinstance(audit, pd.DataFrame):
+        frame = audit.reindex(columns=INTERFACE_KEY + list(INTERFACE_FIELD_DTYPES))
+    else:
+        columns = {column: [] for column in INTERFACE_KEY + list(INTERFACE_FIELD_DTYPES)}
+        for switch in audit:
+            for interface in switch.interfaces or []:
+                columns['switch_hostname'].append(interface.switch_hostname or switch.hostname)
+                for column in columns:
+                    if column != 'switch_hostname':
+                        columns[column].append(getattr(interface, column))
+        frame = pd.DataFrame(columns)
+
+    frame['trunk_allowed_vlans'] = frame['trunk_allowed_vlans'].map(lambda value: None if pd.isna(value) else str(value))
+
+    return frame.astype(INTERFACE_FIELD_DTYPES)
+
+
+def read_excel_export(filename):
+    """Reads an excel file written by `output_switchport_info_to_excel` (or
+    ExcelSwitchSink) back into a single DataFrame of interfaces
+
+    Args:
+        filename (str): Path of the excel file
+
+    Raises:
+        ImportError: openpyxl, which pandas reads .xlsx files with, is not installed
+
+    Returns:
+        DataFrame: interfaces from every sheet
+    """
+    try:
+        sheets = pd.read_excel(filename, sheet_name=None)
+    except ImportError as error:
+        raise ImportError('Reading an excel export needs openpyxl (pip install openpyxl)') from error
+    return pd.concat(sheets.values(), ignore_index=True)
+
+
+def diff_snapshots(old_audit, new_audit, fields=None):
+    """Compares two audits and lists what changed between them. Interfaces are matched
+    on (switch hostname, interface name) with a hashed join and each attribute is
+    compared column-wise, so no per-interface Python loop is involved
+
+    Args:
+        old_audit (list, DataFrame): The earlier audit. See `interfaces_to_frame`
+        new_audit (list, DataFrame): The later audit. See `interfaces_to_frame`
+        fields (list, optional): Attributes to compare. Defaults to every attribute
+        in INTERFACE_FIELD_DTYPES.
+
+    Returns:
+        DataFrame: One row per change with the columns switch_hostname, name, change
+        ('added', 'removed' or 'changed'), field, old_value and new_value. Added and
+        removed interfaces have no field or values
+    """
+    fields = list(fields or INTERFACE_FIELD_DTYPES)
+
+    old_frame = interfaces_to_frame(old_audit).drop_duplicates(INTERFACE_KEY, keep='last')
+    new_frame = interfaces_to_frame(new_audit).drop_duplicates(INTERFACE_KEY, keep='last')
+
+    merged = old_frame[INTERFACE_KEY + fields].merge(
+        new_frame[INTERFACE_KEY + fields], on=INTERFACE_KEY, how='outer', suffixes=('_old', '_new'), indicator=True
+    )
+
+    changes = [
+        _added_or_removed(merged[merged['_merge'] == 'right_only'], 'added'),
+        _added_or_removed(merged[merged['_merge'] == 'left_only'], 'removed'),
+    ]
+
+    in_both = merged[merged['_merge'] == 'both']
+
+    for field in fields:
+        old_values = in_both[f'{field}_old']
+        new_values = in_both[f'{field}_new']
+
+        unchanged = (old_values == new_values).fillna(False).astype(bool) | (old_values.isna() & new_values.isna())
+        changed = in_both[~unchanged.to_numpy()]
+
+        changes.append(pd.DataFrame({
+            'switch_hostname': changed['switch_hostname'],
+            'name': changed['name'],
+            'change': 'changed',
+            'field': field,
+            'old_value': changed[f'{field}_old'].astype(object),
+            'new_value': changed[f'{field}_new'].astype(object),
+        }))
+
+    diff = pd.concat(changes, ignore_index=True)
+    diff['change'] = pd.Categorical(diff['change'], categories=CHANGE_TYPES)
+    diff['field'] = pd.Categorical(diff['field'], categories=fields)
+
+    return diff.sort_values(INTERFACE_KEY + ['change'], ignore_index=True)
+
+
+def _added_or_removed(rows, change):
+    return pd.DataFrame({
+        'switch_hostname': rows['switch_hostname'],
+        'name': rows['name'],
+        'change': change,
+        'field': None,
+        'old_value': None,
+        'new_value': None,
+    })
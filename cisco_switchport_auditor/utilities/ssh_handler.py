@@ -1,14 +1,27 @@
 import datetime
-import os
 import socket
 
+import paramiko
 from netmiko import ConnectHandler, NetmikoTimeoutException, NetmikoAuthenticationException
 
+from utilities.session_logging import SESSION_LOG_LEVELS, SessionLogBuffer, get_default_session_log_writer
+
+FILE_TRANSFER_PROTOCOLS = ('scp', 'sftp')
+# IOS file system paths of the configs that can be copied
+CONFIG_FILE_PATHS = {
+    'running-config': 'system:running-config',
+    'startup-config': 'nvram:startup-config',
+}
+
 class ssh_handler:
-    def __init__(self, host, username, password, secret=None, device_type='cisco_ios', port=22):
-        """A SSH handler class that utilizes Netmko. Manages creating a log folder and
+    def __init__(self, host, username, password, secret=None, device_type='cisco_ios', port=22,
+                 session_log_level='full', session_log_writer=None):
+        """A SSH handler class that utilizes Netmko. Manages session logging and
         basic send command functions. Support added to use with context management
 
+        Session logs are kept in memory during the session and handed to a background
+        SessionLogWriter (gzip compressed, rotated) when the session ends
+
         Args:
             host (str): Hostname or IP address of device to SSH into
             username (str): SSH device username
@@ -16,44 +29,51 @@ class ssh_handler:
             secret (str, optional): Enable password if required. Defaults to None.
             device_type (str, optional): Netmiko Device type. Defaults to 'cisco_ios'.
             port (int, optional): SSH Port. Defaults to 22.
+            session_log_level (str, optional): 'off' to not log, 'errors' to only save the
+            log of sessions that failed, 'full' to save every session. Defaults to 'full'.
+            session_log_writer (SessionLogWriter, optional): Writer to save logs with.
+            Defaults to the shared writer saving to the LOGS folder.
         """        
+        if session_log_level not in SESSION_LOG_LEVELS:
+            raise ValueError(f"session_log_level must be one of {SESSION_LOG_LEVELS}, not {session_log_level!r}")
+
         self.host = host
         self.username = username
         self.password = password
         self.secret = secret
         self.device_type = device_type
         self.port = port
+        self.session_log_level = session_log_level
+        self._session_log_writer = session_log_writer
 
         self._ssh_session = None
+        self._session_log = None
+        self._session_started_at = None
         self.hostname = None
 
     def __enter__(self):
-        self._create_host_log_folder_if_missing()
         self.connect()
         return self
         
     def __exit__ (self, type, value, traceback):
         self.disconnect()
+        self._save_session_log(failed=type is not None)
 
     def __del__(self):
         self.disconnect()
 
-    def _create_host_log_folder_if_missing(self):
-        """Checks if there is a folder called LOGS. If one is not present
-        a LOGS folder will be created. Then creates a host specific folder
-        within the logs folder equal to the IP or hostname of the host
-        """        
-        base_logs_dir = os.path.exists("LOGS")
-        if base_logs_dir is True:
-            pass
-        if base_logs_dir is False:
-            os.mkdir("LOGS")
+    def _save_session_log(self, failed):
+        """Hands the in-memory session log to the session log writer if the logging
+        level asks for it. Only runs once per session
+        """
+        if self._session_log is None:
+            return
 
-        host_specific_dir = os.path.exists(f"LOGS/{self.host}/")
-        if host_specific_dir is True:
-            pass
-        if host_specific_dir is False:
-            os.mkdir(f"LOGS/{self.host}/")
+        session_log, self._session_log = self._session_log, None
+
+        if self.session_log_level == 'full' or (self.session_log_level == 'errors' and failed):
+            writer = self._session_log_writer or get_default_session_log_writer()
+            writer.submit(self.host, self._session_started_at, session_log.getvalue())
 
 
     def connect(self):
@@ -65,7 +85,8 @@ class ssh_handler:
             NetmikoAuthenticationException: See Netmiko docs
         """        
 
-        now = datetime.datetime.now().strftime("%Y-%m-%d--%H-%M-%S")
+        self._session_started_at = datetime.datetime.now().strftime("%Y-%m-%d--%H-%M-%S")
+        self._session_log = SessionLogBuffer() if self.session_log_level != 'off' else None
 
         try:
             self._ssh_session = ConnectHandler(
@@ -75,7 +96,7 @@ class ssh_handler:
                 password = self.password,
                 secret = self.secret,
                 port = self.port,
-                session_log = f"LOGS/{self.host}/{self.host}__{now}.log",
+                session_log = self._session_log,
                 banner_timeout = 45
 
             )
@@ -86,12 +107,20 @@ class ssh_handler:
 
         except NetmikoTimeoutException:
             print(F'************* Attempt to connect to {self.host} timed out *****************')
+            self._save_session_log(failed=True)
             raise NetmikoTimeoutException
 
         except NetmikoAuthenticationException:
             print(F'************* Invalid credentials used on: {self.host} *****************')
+            self._save_session_log(failed=True)
             raise NetmikoAuthenticationException
 
+        except Exception:
+            # __exit__ does not run when __enter__ raises, so any other failure (e.g. a
+            # ReadTimeout entering enable mode) saves the session log here
+            self._save_session_log(failed=True)
+            raise
+
     def _get_hostname(self):
         """Obtains the hostname of the device from netmiko setting base_prompt feature
         """
@@ -128,4 +157,118 @@ class ssh_handler:
         except (socket.error, OSError):
             pass
         except AttributeError:
-            pass
\ No newline at end of file
+            pass
+
+
+def copy_config_file(host, username, password, filename='running-config', protocol='scp', port=22, timeout=45,
+                     on_connected=None):
+    """Copies the running-config or startup-config off a device over SCP or SFTP, instead
+    of reading "show running-config" off an interactive Netmiko channel. There is no
+    prompt handling or waiting for output to stop: the file arrives as one sized
+    stream, and the device serves it without rendering it to a terminal.
+
+    The device must allow file transfers for privilege 15 logins (`ip scp server enable`
+    for SCP; SFTP needs a release with the SFTP server). Nothing is written to disk and
+    no session log is kept
+
+    Args:
+        host (str): Hostname or IP address of device
+        username (str): SSH device username
+        password (str): SSH device password
+        filename (str, optional): 'running-config' or 'startup-config'. Defaults to 'running-config'.
+        protocol (str, optional): 'scp' or 'sftp'. Defaults to 'scp'.
+        port (int, optional): SSH Port. Defaults to 22.
+        timeout (float, optional): Seconds to wait to connect and for each read. Defaults to 45.
+        on_connected (function, optional): Called with no arguments once the login has
+        succeeded, before the file is transferred. Defaults to None.
+
+    Raises:
+        NetmikoTimeoutException: The device did not answer in time
+        NetmikoAuthenticationException: The credentials were refused
+        IOError: The device refused or failed the transfer
+
+    Returns:
+        bytes: Contents of the config file
+    """
+    if protocol not in FILE_TRANSFER_PROTOCOLS:
+        raise ValueError(f"protocol must be one of {FILE_TRANSFER_PROTOCOLS}, not {protocol!r}")
+    if filename not in CONFIG_FILE_PATHS:
+        raise ValueError(f"filename must be one of {tuple(CONFIG_FILE_PATHS)}, not {filename!r}")
+
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+    try:
+        client.connect(host, port=port, username=username, password=password, timeout=timeout,
+                       banner_timeout=45, auth_timeout=timeout, look_for_keys=False, allow_agent=False)
+    except paramiko.AuthenticationException:
+        client.close()
+        print(F'************* Invalid credentials used on: {host} *****************')
+        raise NetmikoAuthenticationException
+    except (socket.timeout, paramiko.SSHException, OSError):
+        client.close()
+        print(F'************* Attempt to connect to {host} timed out *****************')
+        raise NetmikoTimeoutException
+
+    try:
+        if on_connected is not None:
+            on_connected()
+        if protocol == 'sftp':
+            return _sftp_get(client, CONFIG_FILE_PATHS[filename], timeout)
+        return _scp_get(client, CONFIG_FILE_PATHS[filename], timeout)
+    finally:
+        client.close()
+
+
+def _sftp_get(client, path, timeout):
+    sftp = client.open_sftp()
+    sftp.get_channel().settimeout(timeout)
+    try:
+        with sftp.open(path, 'rb') as config_file:
+            config_file.prefetch()
+            return config_file.read()
+    finally:
+        sftp.close()
+
+
+def _scp_get(client, path, timeout):
+    """Receives one file with the SCP source ("scp -f") protocol"""
+    channel = client.get_transport().open_session(timeout=timeout)
+    channel.settimeout(timeout)
+    try:
+        channel.exec_command(f'scp -f {path}')
+        channel.sendall(b'\0')
+
+        header = _scp_read_line(channel)
+        if not header.startswith(b'C'):
+            raise IOError(f"SCP transfer of {path} failed: {header.lstrip(bytes([1, 2])).decode(errors='replace').strip()}")
+
+        size = int(header.split(b' ')[1])
+        channel.sendall(b'\0')
+
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = channel.recv(min(remaining, 65536))
+            if not chunk:
+                raise IOError(f'SCP transfer of {path} ended after {size - remaining} of {size} bytes')
+            chunks.append(chunk)
+            remaining -= len(chunk)
+
+        # Status byte after the file, then acknowledge it
+        if channel.recv(1) != b'\0':
+            raise IOError(f'SCP transfer of {path} failed after the file was sent')
+        channel.sendall(b'\0')
+        return b''.join(chunks)
+    finally:
+        channel.close()
+
+
+def _scp_read_line(channel):
+    line = b''
+    while not line.endswith(b'\n'):
+        byte = channel.recv(1)
+        if not byte:
+            break
+        line += byte
+    return line
\ No newline at end of file
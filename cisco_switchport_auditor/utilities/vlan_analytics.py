@@ -0,0 +1,260 @@
+import numpy as np
+
+from models.vlan_range_set import VlanRangeSet
+
+VLAN_ID_SPACE = 4096
+BYTES_PER_SWITCH_ROW = VLAN_ID_SPACE // 8
+
+
+class VlanMatrix:
+    """Packs the VLANs of a list of switch objects into bitmaps so estate-wide VLAN
+    questions can be answered with vectorized bit operations instead of looping over
+    `switch.vlans` and `interface.vlan`.
+
+    There is one row per switch and one bit per VLAN ID (4096 bits/512 bytes per row).
+    Three matrices are kept:
+
+    * `defined` - VLANs defined on the switch (`switch.vlans`)
+    * `in_use` - VLANs assigned to a switchport as an access or voice VLAN
+    * `trunked` - VLANs allowed on at least one of the switch's trunk ports
+
+    Args:
+        list_of_switch_objects (list): list of Switch objects
+    """
+    def __init__(self, list_of_switch_objects):
+        self.hostnames = [self._label_switch(switch) for switch in list_of_switch_objects]
+        self._row_by_hostname = {hostname: row for row, hostname in enumerate(self.hostnames)}
+
+        self.defined = self._build_matrix(list_of_switch_objects, self._defined_vlan_ids)
+        self.in_use = self._build_matrix(list_of_switch_objects, self._in_use_vlan_ids)
+        self.trunked = self._build_trunk_matrix(list_of_switch_objects)
+
+    @staticmethod
+    def _label_switch(switch):
+        """Switches without a parsed hostname are labelled with their IP address or
+        config filename so every row can still be identified
+        """
+        return switch.hostname or switch.ip_address or switch.config_filename
+
+    @staticmethod
+    def _defined_vlan_ids(switch):
+        return [vlan.id for vlan in switch.vlans or []]
+
+    @staticmethod
+    def _in_use_vlan_ids(switch):
+        vlan_ids = []
+        for interface in switch.interfaces or []:
+            if interface.vlan is not None:
+                vlan_ids.append(interface.vlan)
+            if interface.voice_vlan is not None:
+                vlan_ids.append(interface.voice_vlan)
+        return vlan_ids
+
+    def _build_matrix(self, list_of_switch_objects, get_vlan_ids):
+        """Sets one bit per (switch, VLAN ID) pair in a packed uint8 matrix. Bits are
+        written directly into the packed representation so a full boolean matrix never
+        has to be allocated
+
+        Args:
+            list_of_switch_objects (list): list of Switch objects
+            get_vlan_ids (function): returns the VLAN IDs of a switch to set
+
+        Returns:
+            numpy.ndarray: uint8 matrix of shape (number of switches, 512)
+        """
+        rows = []
+        vlan_ids = []
+
+        for row, switch in enumerate(list_of_switch_objects):
+            switch_vlan_ids = get_vlan_ids(switch)
+            rows.extend([row] * len(switch_vlan_ids))
+            vlan_ids.extend(switch_vlan_ids)
+
+        matrix = np.zeros((len(list_of_switch_objects), BYTES_PER_SWITCH_ROW), dtype=np.uint8)
+
+        vlan_ids = np.asarray(vlan_ids, dtype=np.int64)
+        valid = (vlan_ids >= 0) & (vlan_ids < VLAN_ID_SPACE)
+        rows = np.asarray(rows, dtype=np.int64)[valid]
+        vlan_ids = vlan_ids[valid]
+
+        np.bitwise_or.at(matrix, (rows, vlan_ids >> 3), _bit_masks(vlan_ids))
+
+        return matrix
+
+    @staticmethod
+    def _build_trunk_matrix(list_of_switch_objects):
+        """Unions the allowed VLANs of every trunk port on a switch and packs the
+        result into one row per switch
+
+        Returns:
+            numpy.ndarray: uint8 matrix of shape (number of switches, 512)
+        """
+        matrix = np.zeros((len(list_of_switch_objects), BYTES_PER_SWITCH_ROW), dtype=np.uint8)
+
+        for row, switch in enumerate(list_of_switch_objects):
+            trunked_vlans = VlanRangeSet()
+            for interface in switch.interfaces or []:
+                if interface.trunk_allowed_vlans is not None:
+                    trunked_vlans = trunked_vlans | interface.trunk_allowed_vlans
+            if trunked_vlans:
+                matrix[row] = trunked_vlans.to_bitmap()
+
+        return matrix
+
+    def _rows_for(self, hostnames):
+        if hostnames is None:
+            return slice(None)
+        return [self._row_by_hostname[hostname] for hostname in hostnames]
+
+    def _column(self, matrix, vlan_id):
+        return (matrix[:, vlan_id >> 3] & _bit_masks(vlan_id)) != 0
+
+    def _hostnames_where(self, mask):
+        return [self.hostnames[row] for row in np.flatnonzero(mask)]
+
+    def _per_switch_vlan_ids(self, matrix):
+        """Converts each row of a packed matrix to the VLAN IDs that are set.
+        Switches with no bits set are left out
+
+        Returns:
+            dict: hostname as the key and a list of VLAN IDs as the value
+        """
+        rows, vlan_ids = np.nonzero(np.unpackbits(matrix, axis=1))
+
+        per_switch = {}
+        for row, row_vlan_ids in zip(*_group_by_row(rows, vlan_ids)):
+            per_switch[self.hostnames[row]] = row_vlan_ids.tolist()
+
+        return per_switch
+
+    def switches_with_vlan(self, vlan_id):
+        """Returns the switches that have a VLAN defined
+
+        Args:
+            vlan_id (int): VLAN ID (e.g. 948)
+
+        Returns:
+            list: hostnames of the switches that have the VLAN defined
+        """
+        return self._hostnames_where(self._column(self.defined, vlan_id))
+
+    def switches_using_vlan(self, vlan_id):
+        """Returns the switches that have a switchport in a VLAN (access or voice)
+
+        Args:
+            vlan_id (int): VLAN ID (e.g. 948)
+
+        Returns:
+            list: hostnames of the switches with the VLAN assigned to a switchport
+        """
+        return self._hostnames_where(self._column(self.in_use, vlan_id))
+
+    def switches_trunking_vlan(self, vlan_id):
+        """Returns the switches that carry a VLAN on at least one trunk port
+
+        Args:
+            vlan_id (int): VLAN ID (e.g. 948)
+
+        Returns:
+            list: hostnames of the switches with a trunk allowing the VLAN
+        """
+        return self._hostnames_where(self._column(self.trunked, vlan_id))
+
+    def trunked_vlans_not_defined(self):
+        """Finds VLANs allowed on a switch's trunks that are not defined on the switch.
+        Trunks allowing every VLAN (the default) will list every undefined VLAN
+
+        Returns:
+            dict: hostname as the key and a list of VLAN IDs as the value
+        """
+        return self._per_switch_vlan_ids(self.trunked & ~self.defined)
+
+    def vlan_switch_counts(self, in_use=False):
+        """Counts, for every VLAN ID, how many switches define (or use) it
+
+        Args:
+            in_use (bool, optional): Count switches using the VLAN on a switchport
+            instead of switches defining it. Defaults to False.
+
+        Returns:
+            numpy.ndarray: array of length 4096 indexed by VLAN ID
+        """
+        matrix = self.in_use if in_use else self.defined
+        return np.unpackbits(matrix, axis=1).sum(axis=0, dtype=np.int64)
+
+    def orphan_vlans(self):
+        """Finds VLANs that are defined on a switch but not assigned to any of
+        its switchports
+
+        Returns:
+            dict: hostname as the key and a list of orphaned VLAN IDs as the value
+        """
+        return self._per_switch_vlan_ids(self.defined & ~self.in_use)
+
+    def undefined_vlans_in_use(self):
+        """Finds switchports assigned to VLANs that are not defined on the switch
+
+        Returns:
+            dict: hostname as the key and a list of undefined VLAN IDs as the value
+        """
+        return self._per_switch_vlan_ids(self.in_use & ~self.defined)
+
+    def estate_orphan_vlans(self):
+        """Finds VLANs that are defined somewhere in the estate but not assigned to a
+        switchport on any switch
+
+        Returns:
+            list: VLAN IDs
+        """
+        defined_anywhere = np.bitwise_or.reduce(self.defined, axis=0)
+        used_anywhere = np.bitwise_or.reduce(self.in_use, axis=0)
+        return np.flatnonzero(np.unpackbits(defined_anywhere & ~used_anywhere)).tolist()
+
+    def inconsistent_vlans(self, hostnames=None):
+        """Finds VLANs that are defined on some but not all of a group of switches
+        (e.g. all switches in one site that should share a VLAN database)
+
+        Args:
+            hostnames (list, optional): hostnames that make up the group. Defaults to
+            None which compares every switch.
+
+        Returns:
+            dict: VLAN ID as the key and a list of hostnames missing the VLAN as the value
+        """
+        group_rows = self._rows_for(hostnames)
+        group = self.defined[group_rows]
+        group_hostnames = self.hostnames if hostnames is None else list(hostnames)
+
+        if len(group) == 0:
+            return {}
+
+        defined_on_any = np.bitwise_or.reduce(group, axis=0)
+        defined_on_all = np.bitwise_and.reduce(group, axis=0)
+        inconsistent = np.flatnonzero(np.unpackbits(defined_on_any & ~defined_on_all))
+
+        missing_bits = (group[:, inconsistent >> 3] & _bit_masks(inconsistent)) == 0
+
+        return {int(vlan_id): [group_hostnames[row] for row in np.flatnonzero(missing_bits[:, column])]
+                for column, vlan_id in enumerate(inconsistent)}
+
+
+def _bit_masks(vlan_ids):
+    """Returns the mask of each VLAN ID's bit inside its byte. Bits are stored most
+    significant bit first to match `numpy.unpackbits`
+    """
+    return (np.uint8(0x80) >> np.asarray(vlan_ids & 7, dtype=np.uint8)).astype(np.uint8)
+
+
+def _group_by_row(rows, values):
+    """Splits `values` into one array per distinct row. `rows` must be sorted,
+    which `numpy.nonzero` guarantees
+
+    Returns:
+        tuple: (distinct rows, list of value arrays)
+    """
+    if len(rows) == 0:
+        return [], []
+
+    boundaries = np.flatnonzero(np.diff(rows)) + 1
+    distinct_rows = rows[np.concatenate(([0], boundaries))]
+    return distinct_rows, np.split(values, boundaries)